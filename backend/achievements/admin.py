@@ -1,6 +1,7 @@
 from django.contrib import admin
 
-from .models import Achievement, UserAchievement
+from .events import retry_failed_events
+from .models import Achievement, AchievementEvent, UserAchievement
 from admin_logs.mixins import LoggingMixin
 
 
@@ -28,3 +29,18 @@ class UserAchievementAdmin(LoggingMixin, admin.ModelAdmin):
     list_filter = ("achievement", "created_at")
     search_fields = ("user__email", "achievement__name")
     autocomplete_fields = ("user", "achievement")
+
+
+@admin.register(AchievementEvent)
+class AchievementEventAdmin(admin.ModelAdmin):
+    list_display = ("event_type", "object_id", "status", "created_at", "processed_at")
+    list_filter = ("event_type", "status")
+    readonly_fields = ("event_type", "object_id", "status", "error", "created_at", "processed_at")
+    actions = ["retry_events"]
+
+    def has_add_permission(self, request):
+        return False
+
+    @admin.action(description="Retry selected failed events")
+    def retry_events(self, request, queryset):
+        self.message_user(request, f"Queued again: {retry_failed_events(queryset)}")
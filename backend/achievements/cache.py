@@ -0,0 +1,115 @@
+import threading
+from collections import OrderedDict
+
+from core.config import AppConfig
+from .models import Achievement, UserAchievement, AchievementCacheVersion
+
+
+class AchievementCatalogue:
+    """
+    Process-level mapping of achievement name to id.
+
+    Loaded with a single query on first use; names missing from the catalogue
+    are created on demand and remembered.
+    """
+
+    def __init__(self):
+        self._ids: dict[str, int] | None = None
+        self._lock = threading.Lock()
+
+    def get_id(self, name: str, description: str) -> int:
+        with self._lock:
+            self._load()
+
+            achievement_id = self._ids.get(name)
+            if achievement_id is None:
+                achievement_id = Achievement.objects.get_or_create(
+                    name=name,
+                    defaults={"condition": description}
+                )[0].pk
+                self._ids[name] = achievement_id
+
+            return achievement_id
+
+    def clear(self) -> None:
+        with self._lock:
+            self._ids = None
+
+    def _load(self) -> None:
+        if self._ids is None:
+            self._ids = dict(Achievement.objects.values_list('name', 'achievement_id'))
+
+
+class AwardedCache:
+    """
+    Bounded LRU cache of the achievement ids already awarded to each user.
+
+    A user's set is loaded with one query on a cache miss, after that checking
+    whether a rule is already satisfied does not touch the database.
+    """
+
+    def __init__(self, max_users: int):
+        self.max_users = max_users
+        self._sets: OrderedDict[int, set[int]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def has(self, user_id: int, achievement_id: int) -> bool:
+        with self._lock:
+            awarded = self._sets.get(user_id)
+            if awarded is not None:
+                self._sets.move_to_end(user_id)
+                return achievement_id in awarded
+
+        awarded = set(UserAchievement.objects.filter(user_id=user_id).values_list('achievement_id', flat=True))
+        with self._lock:
+            self._store(user_id, awarded)
+        return achievement_id in awarded
+
+    def add(self, user_id: int, achievement_id: int) -> None:
+        with self._lock:
+            awarded = self._sets.get(user_id)
+            if awarded is not None:
+                awarded.add(achievement_id)
+                self._sets.move_to_end(user_id)
+
+    def evict(self, user_id: int) -> None:
+        with self._lock:
+            self._sets.pop(user_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._sets.clear()
+
+    def _store(self, user_id: int, awarded: set[int]) -> None:
+        self._sets[user_id] = awarded
+        self._sets.move_to_end(user_id)
+        while len(self._sets) > self.max_users:
+            self._sets.popitem(last=False)
+
+
+class CacheSync:
+    """
+    Drops the caches of this process when another process reported a change.
+
+    Signals only reach the process that changed the data, so an admin edit made in the
+    web process bumps AchievementCacheVersion instead, and long-running workers compare
+    it with the version they last saw before each batch.
+    """
+
+    def __init__(self, *caches):
+        self.caches = caches
+        self._version: int | None = None
+        self._lock = threading.Lock()
+
+    def check(self) -> None:
+        version = AchievementCacheVersion.current()
+        with self._lock:
+            if version != self._version:
+                for cache in self.caches:
+                    cache.clear()
+                self._version = version
+
+
+catalogue = AchievementCatalogue()
+awarded_cache = AwardedCache(max_users=AppConfig.ACHIEVEMENT_AWARDED_CACHE_SIZE)
+cache_sync = CacheSync(catalogue, awarded_cache)
@@ -0,0 +1,115 @@
+from django.db import transaction as db_transaction
+from django.utils import timezone
+
+from bank_accounts.models import BankAccount
+from transactions.models import Transaction
+from .cache import cache_sync
+from .models import AchievementEvent
+from .rules import evaluate_event
+
+
+def enqueue_event(event_type: str, object_id: int) -> None:
+    """
+    Queues an achievement event once the surrounding transaction commits,
+    so the request that caused it never waits on rule evaluation.
+    """
+    db_transaction.on_commit(
+        lambda: AchievementEvent.objects.create(event_type=event_type, object_id=object_id)
+    )
+
+
+def enqueue_events(event_type: str, object_ids: list[int]) -> None:
+    """Same as `enqueue_event` for many objects, inserted with one statement."""
+    db_transaction.on_commit(
+        lambda: AchievementEvent.objects.bulk_create([
+            AchievementEvent(event_type=event_type, object_id=object_id) for object_id in object_ids
+        ])
+    )
+
+
+def _load_objects(events: list[AchievementEvent]) -> dict[str, dict]:
+    """Fetches the objects referenced by a batch of events with one query per event type."""
+    ids = {event_type: set() for event_type, _ in AchievementEvent.EVENT_TYPES}
+    for event in events:
+        ids[event.event_type].add(event.object_id)
+
+    accounts = (BankAccount.objects
+                .select_related('owner')
+                .in_bulk(ids['account_created'] | ids['co_owner_added']))
+
+    return {
+        'transaction_created': (Transaction.objects
+                                .select_related('sender_account__owner', 'receiver_account__owner')
+                                .in_bulk(ids['transaction_created'])),
+        'account_created': accounts,
+        'co_owner_added': accounts,
+    }
+
+
+def process_event_batch(batch_size: int) -> tuple[int, int]:
+    """
+    Claims up to `batch_size` pending events and evaluates the achievement rules for them.
+
+    Rows are locked with SKIP LOCKED where the database supports it, so several workers
+    can drain the queue concurrently. Each event is evaluated in its own savepoint:
+    a failing event is marked as failed without losing the rest of the batch.
+    The caches of this process are checked against changes made elsewhere first.
+
+    Returns:
+        tuple[int]: Number of processed events, number of failed events
+    """
+    processed, failed = 0, 0
+    cache_sync.check()
+
+    with db_transaction.atomic():
+        events = list(
+            AchievementEvent.objects
+            .filter(status='pending')
+            .order_by('id')
+            .select_for_update(skip_locked=True)[:batch_size]
+        )
+        if not events:
+            return processed, failed
+
+        objects = _load_objects(events)
+        now = timezone.now()
+
+        for event in events:
+            obj = objects[event.event_type].get(event.object_id)
+            try:
+                with db_transaction.atomic():
+                    if obj is not None:
+                        evaluate_event(event.event_type, obj)
+                event.status = 'processed'
+                processed += 1
+            except Exception as e:
+                event.status = 'failed'
+                event.error = str(e)
+                failed += 1
+            event.processed_at = now
+
+        AchievementEvent.objects.bulk_update(events, ['status', 'error', 'processed_at'])
+
+    return processed, failed
+
+
+def process_events(batch_size: int) -> tuple[int, int]:
+    """
+    Processes batches of pending events until the queue is empty.
+
+    Returns:
+        tuple[int]: Number of processed events, number of failed events
+    """
+    total_processed, total_failed = 0, 0
+    while True:
+        processed, failed = process_event_batch(batch_size)
+        if not processed and not failed:
+            return total_processed, total_failed
+        total_processed += processed
+        total_failed += failed
+
+
+def retry_failed_events(events=None) -> int:
+    """Queues failed events (all of them, or those of the `events` queryset) again. Returns their number."""
+    events = AchievementEvent.objects.all() if events is None else events
+    return events.filter(status='failed').update(status='pending', error='', processed_at=None)
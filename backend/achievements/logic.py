@@ -1,128 +1,92 @@
 from datetime import timedelta
-from typing import Iterable
-from django.utils import timezone
-from decimal import Decimal
-from django.db.models import Sum
+from django.db import transaction as db_transaction
+from django.db.models import F, Case, When, Value, DecimalField, Count
 
 from bank_accounts.models import UserBankAccount, BankAccount
 from users.models import User
-from .models import Achievement, UserAchievement
+from .cache import catalogue, awarded_cache
+from .models import UserAchievement, UserActivityCounters
 from transactions.models import Transaction
 
 
-def _get_or_create(name: str, description: str) -> Achievement:
-    return Achievement.objects.get_or_create(
-        name=name,
-        defaults={"condition": description}
-    )[0]
+def award(user: User, name: str, description: str) -> None:
+    achievement_id = catalogue.get_id(name, description)
+    if awarded_cache.has(user.pk, achievement_id):
+        return
 
+    UserAchievement.objects.get_or_create(user=user, achievement_id=achievement_id)
+    db_transaction.on_commit(lambda: awarded_cache.add(user.pk, achievement_id))
 
-def _award(user: User, achievement: Achievement | None) -> None:
-    UserAchievement.objects.get_or_create(user=user, achievement=achievement)
 
+def _lock_counters(user_id: int) -> UserActivityCounters:
+    return UserActivityCounters.objects.select_for_update().get_or_create(user_id=user_id)[0]
 
-def award_big_wallet(user: User, date, user_account_ids: Iterable[int]) -> None:
-    user_spent = (Transaction.objects.filter(
-        sender_account_id__in=user_account_ids,
-        created_at__date=date,).aggregate(total=Sum('amount'))['total'] or Decimal('0')
-    )
-
-    if user_spent >= Decimal('100000'):
-        ach = _get_or_create(
-            'Большой кошелёк',
-            'Потратить больше 100000 за день'
-        )
-        _award(user, ach)
-
-
-def award_first_transaction(user: User, transaction_count: int) -> None:
-    if transaction_count == 1:
-        ach = _get_or_create(
-            "Первый перевод",
-            "Совершить первый перевод денег"
-        )
-        _award(user, ach)
-
-
-def award_loyal_client(user: User, transaction_count: int) -> None:
-    if transaction_count >= 10:
-        ach = _get_or_create(
-            "Лояльный клиент",
-            "Совершить 10 переводов"
-        )
-        _award(user, ach)
-
-
-def award_currency_broker(user: User, sender_currency: str, receiver_currency: str) -> None:
-    if sender_currency != receiver_currency:
-        ach = _get_or_create(
-            "Валютный брокер",
-            "Отправить перевод в другой валюте"
-        )
-        _award(user, ach)
-
-
-def award_family_bank(user: User) -> None:
-    shared_accounts = UserBankAccount.objects.filter(user=user).values('bank_account')
-
-    for entry in shared_accounts:
-        count = UserBankAccount.objects.filter(bank_account=entry['bank_account']).exclude(user=user).count()
-        if count >= 2:
-            ach = _get_or_create("Семейный банк", "Вы владелец счёта с двумя и более другими пользователями")
-            _award(user, ach)
-            break
-
-
-def award_reverse_transfer(sender_user: BankAccount, receiver_user: BankAccount) -> None:
-    now = timezone.now()
-    since = now - timedelta(hours=24)
-    reverse_exists = Transaction.objects.filter(
-        sender_account__owner=receiver_user,
-        receiver_account__owner=sender_user,
-        created_at__gte=since
-    ).exists()
 
-    if reverse_exists:
-        ach = _get_or_create("Обратная связь", "Получить деньги обратно от получателя в течение 24 часов")
-        _award(sender_user, ach)
+def record_transaction(transaction: Transaction) -> UserActivityCounters:
+    """
+    Applies a completed transaction to the activity counters of its sender and receiver.
 
+    Scalar counters are updated with F-expressions; the JSON fields are rewritten
+    while the row is locked. Must be called inside an atomic block.
 
-def award_generosity(user: User) -> None:
-    recent = Transaction.objects.filter(sender_account__owner=user).order_by('-created_at')[:5]
-    unique_receivers = {t.receiver_account.owner_id for t in recent}
+    Returns:
+        UserActivityCounters: Up-to-date counters of the sender
+    """
+    sender_id = transaction.sender_account.owner_id
+    receiver_id = transaction.receiver_account.owner_id
+    day = transaction.created_at.date()
 
-    if len(unique_receivers) >= 5:
-        ach = _get_or_create("Щедрость", "Сделать 5 переводов подряд разным пользователям")
-        _award(user, ach)
+    counters = _lock_counters(sender_id)
+    recent_receivers = counters.recent_receivers + [receiver_id]
+    UserActivityCounters.objects.filter(pk=sender_id).update(
+        sent_count=F('sent_count') + 1,
+        spent_today=Case(
+            When(spent_day=day, then=F('spent_today') + transaction.amount),
+            default=Value(transaction.amount),
+            output_field=DecimalField(),
+        ),
+        spent_day=day,
+        recent_receivers=recent_receivers[-UserActivityCounters.RECENT_RECEIVERS_SIZE:],
+    )
+    counters.refresh_from_db()
 
+    receiver_counters = counters if receiver_id == sender_id else _lock_counters(receiver_id)
+    receiver_counters.last_incoming[str(transaction.receiver_account_id)] = transaction.created_at.isoformat()
+    UserActivityCounters.objects.filter(pk=receiver_id).update(last_incoming=receiver_counters.last_incoming)
 
-def award_first_account(user: User) -> None:
-    if BankAccount.objects.filter(owner=user).count() == 1:
-        ach = _get_or_create(
-            "Первый счёт",
-            "Открыть свой первый банковский счёт"
-        )
-        _award(user, ach)
+    return counters
 
 
-def award_chain_reaction(user: User, sender_account: BankAccount) -> None:
-    five_minutes_ago = timezone.now() - timedelta(minutes=5)
-    recent_incoming = Transaction.objects.filter(
-        receiver_account=sender_account,
-        created_at__gte=five_minutes_ago
+def has_reverse_transfer(transaction: Transaction) -> bool:
+    """Whether the receiver sent money to the sender in the 24 hours before the transaction."""
+    since = transaction.created_at - timedelta(hours=24)
+    return Transaction.objects.filter(
+        sender_account__owner_id=transaction.receiver_account.owner_id,
+        receiver_account__owner_id=transaction.sender_account.owner_id,
+        created_at__gte=since,
+        created_at__lte=transaction.created_at
     ).exists()
-    if recent_incoming:
-        ach = _get_or_create("Цепная реакция", "Совершить перевод в течение 5 минут после получения денег")
-        _award(user, ach)
 
 
-def award_payment_explorer(user: User) -> None:
-    used_systems = (
+def used_payment_systems(user: User) -> set[str]:
+    return set(
         BankAccount.objects
         .filter(users__user=user)
         .values_list('payment_system', flat=True)
         .distinct()
     )
-    if len(set(used_systems)) >= 3:
-        ach = _get_or_create("Платёжный путешественник", "Совершить переводы с 3 и более разных платёжных систем")
-        _award(user, ach)
+
+
+def max_co_owners(user: User) -> int:
+    """The largest number of other members on any account the user belongs to."""
+    user_accounts = UserBankAccount.objects.filter(user=user).values('bank_account')
+    return (
+        UserBankAccount.objects
+        .filter(bank_account__in=user_accounts)
+        .exclude(user=user)
+        .values('bank_account')
+        .annotate(members=Count('user'))
+        .order_by('-members')
+        .values_list('members', flat=True)
+        .first()
+    ) or 0
@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from achievements.events import process_event_batch, retry_failed_events
+from core.config import AppConfig
+
+
+class Command(BaseCommand):
+    help = "Evaluates achievement rules for queued transaction and account events"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=AppConfig.ACHIEVEMENT_EVENTS_BATCH_SIZE,
+            help="Number of events claimed per batch",
+        )
+        parser.add_argument(
+            '--retry-failed',
+            action='store_true',
+            help="Queue the events that failed earlier again before processing",
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS(f"[{timezone.now()}] Achievement events processing begins..."))
+
+        if options['retry_failed']:
+            self.stdout.write(f"Failed events queued again: {retry_failed_events()}")
+
+        total_processed, total_failed = 0, 0
+        while True:
+            processed, failed = process_event_batch(options['batch_size'])
+            if not processed and not failed:
+                break
+
+            total_processed += processed
+            total_failed += failed
+            self.stdout.write(f"Batch done: {processed} processed, {failed} failed.")
+
+        if total_failed:
+            self.stdout.write(self.style.ERROR(f"Failed events: {total_failed}"))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"[{timezone.now()}] Achievement events processing completed. Processed: {total_processed}"
+        ))
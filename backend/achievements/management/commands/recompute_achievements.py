@@ -0,0 +1,85 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from achievements.cache import catalogue, awarded_cache
+from achievements.models import UserAchievement, UserAchievementProgress, AchievementCacheVersion
+from achievements.rules import RULES, save_progress
+
+
+class Command(BaseCommand):
+    help = "Re-evaluates achievement rules for all users with one set-based query per rule"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rules',
+            nargs='+',
+            metavar='RULE',
+            help="Keys of the rules to recompute (default: all). Available: " +  # noqa
+                 ", ".join(r.key for r in RULES.values()),
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help="Number of awards inserted per statement",
+        )
+
+    def handle(self, *args, **options):
+        rules = list(RULES.values())
+        if options['rules']:
+            by_key = {r.key: r for r in rules}
+            unknown = set(options['rules']) - set(by_key)
+            if unknown:
+                raise CommandError(f"Unknown rules: {', '.join(sorted(unknown))}")
+            rules = [by_key[key] for key in options['rules']]
+
+        self.stdout.write(self.style.SUCCESS(f"[{timezone.now()}] Achievements recomputation begins..."))
+
+        chunk_size = options['chunk_size']
+        for rule in rules:
+            if rule.backfill is None:
+                self.stdout.write(self.style.WARNING(f"{rule.key}: no backfill query, skipped."))
+                continue
+
+            achievement_id = catalogue.get_id(rule.name, rule.description)
+            awarded_before = UserAchievement.objects.filter(achievement_id=achievement_id).count()
+
+            candidates, chunk = 0, []
+            for user_id in rule.backfill():
+                chunk.append(user_id)
+                if len(chunk) >= chunk_size:
+                    candidates += self._flush(chunk, rule, achievement_id)
+                    self.stdout.write(f"{rule.key}: {candidates} users evaluated...")
+
+            candidates += self._flush(chunk, rule, achievement_id)
+
+            awarded = UserAchievement.objects.filter(achievement_id=achievement_id).count() - awarded_before
+            self.stdout.write(self.style.SUCCESS(
+                f"{rule.key}: {candidates} users satisfy the rule, {awarded} new awards."
+            ))
+
+        # Workers in other processes hold awarded sets that miss the backfilled awards
+        awarded_cache.clear()
+        AchievementCacheVersion.bump()
+        self.stdout.write(self.style.SUCCESS(f"[{timezone.now()}] Achievements recomputation completed."))
+
+    @staticmethod
+    def _flush(user_ids: list[int], rule, achievement_id: int) -> int:
+        """Inserts the awards of a chunk of users and marks their progress as complete."""
+        size = len(user_ids)
+        if user_ids:
+            UserAchievement.objects.bulk_create(
+                [UserAchievement(user_id=user_id, achievement_id=achievement_id) for user_id in user_ids],
+                ignore_conflicts=True,
+            )
+            save_progress([
+                UserAchievementProgress(
+                    user_id=user_id,
+                    achievement_id=achievement_id,
+                    current=rule.target,
+                    target=rule.target,
+                )
+                for user_id in user_ids
+            ])
+            user_ids.clear()
+        return size
@@ -0,0 +1,29 @@
+# Generated by Django 5.1.7 on 2026-10-19 16:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('achievements', '0004_alter_userachievement_achievement'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AchievementEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event_type', models.CharField(choices=[('transaction_created', 'Transaction created'), ('account_created', 'Account created'), ('co_owner_added', 'Co-owner added')], max_length=20)),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('processed', 'Processed'), ('failed', 'Failed')], default='pending', max_length=10)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('processed_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'achievement_events',
+                'indexes': [models.Index(fields=['status', 'id'], name='achievement_event_status_idx')],
+            },
+        ),
+    ]
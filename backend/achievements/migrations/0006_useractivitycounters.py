@@ -0,0 +1,48 @@
+# Generated by Django 5.1.7 on 2026-10-19 16:04
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def seed_sent_counts(apps, schema_editor):
+    Transaction = apps.get_model('transactions', 'Transaction')
+    UserActivityCounters = apps.get_model('achievements', 'UserActivityCounters')
+
+    sent_counts = (Transaction.objects
+                   .values('sender_account__owner')
+                   .annotate(total=Count('transaction_id')))
+    UserActivityCounters.objects.bulk_create(
+        [UserActivityCounters(user_id=row['sender_account__owner'], sent_count=row['total']) for row in sent_counts],
+        batch_size=1000,
+        ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('achievements', '0005_achievementevent'),
+        ('users', '0004_alter_user_options_alter_user_table'),
+        ('transactions', '0011_alter_transaction_converted_amount'),
+        ('bank_accounts', '0017_alter_bankaccount_payment_system_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserActivityCounters',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='activity_counters', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('sent_count', models.PositiveIntegerField(default=0)),
+                ('spent_day', models.DateField(blank=True, null=True)),
+                ('spent_today', models.DecimalField(decimal_places=2, default=0, max_digits=15)),
+                ('recent_receivers', models.JSONField(blank=True, default=list, help_text='Owner ids of the last receivers, oldest first')),
+                ('last_incoming', models.JSONField(blank=True, default=dict, help_text='Timestamp of the last incoming transfer per owned account id')),
+            ],
+            options={
+                'db_table': 'user_activity_counters',
+            },
+        ),
+        migrations.RunPython(seed_sent_counts, migrations.RunPython.noop),
+    ]
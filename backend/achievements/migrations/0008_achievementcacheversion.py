@@ -0,0 +1,23 @@
+# Generated by Django 5.1.7 on 2026-10-19 17:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('achievements', '0007_userachievementprogress'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AchievementCacheVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveBigIntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'achievement_cache_version',
+            },
+        ),
+    ]
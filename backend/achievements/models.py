@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models import F
 
 from users.models import User
 
@@ -35,3 +36,107 @@ class UserAchievement(models.Model):
 
     def __str__(self):
         return f"{self.user} - {self.achievement} - {self.created_at}"
+
+
+class UserAchievementProgress(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='achievement_progress'
+    )
+    achievement = models.ForeignKey(
+        Achievement,
+        on_delete=models.CASCADE,
+        related_name='progress'
+    )
+    current = models.PositiveIntegerField(default=0)
+    target = models.PositiveIntegerField(default=1)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'user_achievement_progress'
+        unique_together = (('user', 'achievement'), )
+
+    def __str__(self):
+        return f"{self.user} - {self.achievement} - {self.current}/{self.target}"
+
+
+class UserActivityCounters(models.Model):
+    RECENT_RECEIVERS_SIZE = 5
+
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='activity_counters'
+    )
+    sent_count = models.PositiveIntegerField(default=0)
+    spent_day = models.DateField(null=True, blank=True)
+    spent_today = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+    recent_receivers = models.JSONField(
+        default=list,
+        blank=True,
+        help_text="Owner ids of the last receivers, oldest first",
+    )
+    last_incoming = models.JSONField(
+        default=dict,
+        blank=True,
+        help_text="Timestamp of the last incoming transfer per owned account id",
+    )
+
+    class Meta:
+        db_table = 'user_activity_counters'
+
+    def __str__(self):
+        return f"Activity counters of {self.user}"
+
+
+class AchievementEvent(models.Model):
+    EVENT_TYPES = [
+        ('transaction_created', 'Transaction created'),
+        ('account_created', 'Account created'),
+        ('co_owner_added', 'Co-owner added'),
+    ]
+
+    EVENT_STATUS = [
+        ('pending', 'Pending'),
+        ('processed', 'Processed'),
+        ('failed', 'Failed'),
+    ]
+
+    event_type = models.CharField(max_length=20, choices=EVENT_TYPES)
+    object_id = models.PositiveBigIntegerField()
+    status = models.CharField(max_length=10, choices=EVENT_STATUS, default='pending')
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'achievement_events'
+        indexes = [
+            models.Index(fields=['status', 'id'], name='achievement_event_status_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_event_type_display()} #{self.object_id} - {self.status}"
+
+
+class AchievementCacheVersion(models.Model):
+    """
+    Single-row counter bumped whenever achievements or awards change outside the event
+    worker. Each process compares it with the version its caches were loaded at, see
+    `achievements.cache.CacheSync`.
+    """
+    version = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        db_table = 'achievement_cache_version'
+
+    @classmethod
+    def current(cls) -> int:
+        return cls.objects.get_or_create(pk=1)[0].version
+
+    @classmethod
+    def bump(cls) -> None:
+        if not cls.objects.filter(pk=1).update(version=F('version') + 1):
+            cls.objects.get_or_create(pk=1, defaults={'version': 1})
@@ -0,0 +1,314 @@
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Callable, Iterable
+
+from itertools import combinations
+
+from django.db.models import F, Q, Count, Sum, Exists, OuterRef, Window
+from django.db.models.functions import Lag, TruncDate
+
+from bank_accounts.models import BankAccount, UserBankAccount
+from transactions.models import Transaction
+from .cache import catalogue, awarded_cache
+from .logic import award, record_transaction, has_reverse_transfer, used_payment_systems, max_co_owners
+from .models import UserAchievementProgress
+
+
+class Rule:
+    """
+    Declarative achievement rule.
+
+    A rule lists the events it reacts to and the context data its condition reads.
+    The engine fetches the data once per event for all interested rules, so a rule
+    only costs something on the events it declared. The optional backfill returns
+    the ids of every user satisfying the rule, computed over the whole table at once.
+    The optional progress reads the same context and reports how far the user is
+    towards `target`; rules without it are either done or not started. Progress of a
+    daily rule only counts on the day the user last spent money.
+    """
+
+    def __init__(self, name: str, description: str, events: tuple[str], needs: tuple[str], check: Callable,
+                 backfill: Callable[[], Iterable[int]] | None = None, target: int = 1,
+                 progress: Callable[[dict], int] | None = None, daily: bool = False):
+        self.key = check.__name__
+        self.name = name
+        self.description = description
+        self.events = events
+        self.needs = needs
+        self.check = check
+        self.backfill = backfill
+        self.target = target
+        self.progress = progress
+        self.daily = daily
+
+    def current_progress(self, context: dict, achieved: bool) -> int:
+        if achieved:
+            return self.target
+        if self.progress is None:
+            return 0
+        return min(int(self.progress(context)), self.target - 1)
+
+    def __repr__(self):
+        return f"Rule({self.name!r}, events={self.events})"
+
+
+RULES: dict[str, Rule] = {}
+
+# Data loaded lazily on demand of at least one rule; receives the event context
+PROVIDERS = {
+    'reverse_transfer': lambda context: has_reverse_transfer(context['transaction']),
+    'payment_systems': lambda context: used_payment_systems(context['user']),
+    'max_co_owners': lambda context: max_co_owners(context['user']),
+}
+
+# Data always present in the context of an event
+BASE_CONTEXT = {
+    'transaction_created': ('user', 'transaction', 'counters'),
+    'account_created': ('user', 'account'),
+    'co_owner_added': ('user', 'account'),
+}
+
+
+def rule(name: str, description: str, events: tuple[str], needs: tuple[str] = (), backfill=None,
+         target: int = 1, progress=None, daily: bool = False):
+    """Registers the decorated function as the condition of an achievement rule."""
+    def decorator(check):
+        for event_type in events:
+            missing = set(needs) - set(BASE_CONTEXT[event_type]) - set(PROVIDERS)
+            if missing:
+                raise ValueError(f"Rule '{name}' needs unknown data: {', '.join(sorted(missing))}")
+
+        RULES[name] = Rule(name, description, tuple(events), tuple(needs), check, backfill, target, progress, daily)
+        return check
+    return decorator
+
+
+def rules_for(event_type: str) -> list[Rule]:
+    return [r for r in RULES.values() if event_type in r.events]
+
+
+def _base_context(event_type: str, obj) -> dict:
+    if event_type == 'transaction_created':
+        return {
+            'user': obj.sender_account.owner,
+            'transaction': obj,
+            'counters': record_transaction(obj),
+        }
+    return {'user': obj.owner, 'account': obj}
+
+
+def evaluate_event(event_type: str, obj) -> None:
+    """
+    Runs the rules subscribed to the event.
+
+    Rules whose achievement the user already holds are dropped before any data is
+    fetched, then every piece of data still needed is loaded exactly once. The
+    progress of the evaluated rules is upserted with a single statement.
+    """
+    context = _base_context(event_type, obj)
+    user = context['user']
+
+    pending = []
+    for r in rules_for(event_type):
+        achievement_id = catalogue.get_id(r.name, r.description)
+        if not awarded_cache.has(user.pk, achievement_id):
+            pending.append((r, achievement_id))
+
+    for need in {need for r, _ in pending for need in r.needs}:
+        if need not in context:
+            context[need] = PROVIDERS[need](context)
+
+    progress = []
+    for r, achievement_id in pending:
+        achieved = r.check(context)
+        if achieved:
+            award(user, r.name, r.description)
+
+        current = r.current_progress(context, achieved)
+        if current:
+            progress.append(UserAchievementProgress(
+                user=user,
+                achievement_id=achievement_id,
+                current=current,
+                target=r.target,
+            ))
+
+    save_progress(progress)
+
+
+def save_progress(progress: list[UserAchievementProgress]) -> None:
+    UserAchievementProgress.objects.bulk_create(
+        progress,
+        update_conflicts=True,
+        unique_fields=['user', 'achievement'],
+        update_fields=['current', 'target', 'updated_at'],
+    )
+
+
+def _senders(transactions=None):
+    transactions = Transaction.objects.all() if transactions is None else transactions
+    return transactions.values_list('sender_account__owner', flat=True).distinct()
+
+
+def _senders_with_at_least(count: int):
+    return (Transaction.objects
+            .values('sender_account__owner')
+            .annotate(sent=Count('transaction_id'))
+            .filter(sent__gte=count)
+            .values_list('sender_account__owner', flat=True))
+
+
+def _big_spenders():
+    return (Transaction.objects
+            .annotate(day=TruncDate('created_at'))
+            .values('sender_account__owner', 'day')
+            .annotate(total=Sum('amount'))
+            .filter(total__gte=Decimal('100000'))
+            .values_list('sender_account__owner', flat=True)
+            .distinct())
+
+
+def _reverse_transfer_senders():
+    reverse = Transaction.objects.filter(
+        sender_account__owner=OuterRef('receiver_account__owner'),
+        receiver_account__owner=OuterRef('sender_account__owner'),
+        created_at__gte=OuterRef('created_at') - timedelta(hours=24),
+        created_at__lte=OuterRef('created_at'),
+    )
+    return _senders(Transaction.objects.filter(Exists(reverse)))
+
+
+def _chain_reaction_senders():
+    incoming = Transaction.objects.filter(
+        receiver_account=OuterRef('sender_account'),
+        created_at__gte=OuterRef('created_at') - timedelta(minutes=5),
+        created_at__lte=OuterRef('created_at'),
+    )
+    return _senders(Transaction.objects.filter(Exists(incoming)))
+
+
+def _generous_senders():
+    """
+    Senders with five consecutive transfers to distinct receivers. Each transfer is annotated
+    with the receivers of the sender's four previous transfers by Lag window functions, and the
+    database keeps the transfers whose five receivers are pairwise different.
+    """
+    receivers = ['receiver'] + [f'previous_{offset}' for offset in range(1, 5)]
+    annotations = {
+        f'previous_{offset}': Window(
+            Lag('receiver_account__owner', offset),
+            partition_by=[F('sender_account__owner')],
+            order_by=[F('created_at').asc(), F('transaction_id').asc()],
+        )
+        for offset in range(1, 5)
+    }
+    distinct = Q(previous_4__isnull=False)
+    for first, second in combinations(receivers, 2):
+        distinct &= ~Q(**{first: F(second)})
+
+    return set(
+        Transaction.objects
+        .annotate(receiver=F('receiver_account__owner'), **annotations)
+        .filter(distinct)
+        .values_list('sender_account__owner', flat=True)
+    )
+
+
+def _distinct_tail(receivers: list[int]) -> int:
+    """Length of the longest run of distinct receivers ending with the latest transfer."""
+    seen = set()
+    for receiver_id in reversed(receivers):
+        if receiver_id in seen:
+            break
+        seen.add(receiver_id)
+    return len(seen)
+
+
+def _payment_explorers():
+    return (UserBankAccount.objects
+            .values('user')
+            .annotate(systems=Count('bank_account__payment_system', distinct=True))
+            .filter(systems__gte=3)
+            .values_list('user', flat=True))
+
+
+def _family_bank_owners():
+    return (BankAccount.objects
+            .annotate(members=Count('users', filter=~Q(users__user=F('owner'))))
+            .filter(members__gte=2)
+            .values_list('owner', flat=True)
+            .distinct())
+
+
+@rule("Первый перевод", "Совершить первый перевод денег",
+      events=('transaction_created',), needs=('counters',), backfill=_senders)
+def first_transaction(context) -> bool:
+    return context['counters'].sent_count >= 1
+
+
+@rule("Лояльный клиент", "Совершить 10 переводов",
+      events=('transaction_created',), needs=('counters',), backfill=lambda: _senders_with_at_least(10),
+      target=10, progress=lambda context: context['counters'].sent_count)
+def loyal_client(context) -> bool:
+    return context['counters'].sent_count >= 10
+
+
+@rule("Большой кошелёк", "Потратить больше 100000 за день",
+      events=('transaction_created',), needs=('counters',), backfill=_big_spenders,
+      target=100000, progress=lambda context: context['counters'].spent_today, daily=True)
+def big_wallet(context) -> bool:
+    return context['counters'].spent_today >= Decimal('100000')
+
+
+@rule("Валютный брокер", "Отправить перевод в другой валюте",
+      events=('transaction_created',), needs=('transaction',),
+      backfill=lambda: _senders(Transaction.objects.exclude(sender_account__currency=F('receiver_account__currency'))))
+def currency_broker(context) -> bool:
+    transaction = context['transaction']
+    return transaction.sender_account.currency != transaction.receiver_account.currency
+
+
+@rule("Обратная связь", "Получить деньги обратно от получателя в течение 24 часов",
+      events=('transaction_created',), needs=('reverse_transfer',), backfill=_reverse_transfer_senders)
+def reverse_transfer(context) -> bool:
+    return context['reverse_transfer']
+
+
+@rule("Щедрость", "Сделать 5 переводов подряд разным пользователям",
+      events=('transaction_created',), needs=('counters',), backfill=_generous_senders,
+      target=5, progress=lambda context: _distinct_tail(context['counters'].recent_receivers))
+def generosity(context) -> bool:
+    return _distinct_tail(context['counters'].recent_receivers) >= 5
+
+
+@rule("Цепная реакция", "Совершить перевод в течение 5 минут после получения денег",
+      events=('transaction_created',), needs=('transaction', 'counters'), backfill=_chain_reaction_senders)
+def chain_reaction(context) -> bool:
+    transaction = context['transaction']
+    last_incoming = context['counters'].last_incoming.get(str(transaction.sender_account_id))
+    if not last_incoming:
+        return False
+
+    last_incoming = datetime.fromisoformat(last_incoming)
+    return transaction.created_at - timedelta(minutes=5) <= last_incoming <= transaction.created_at
+
+
+@rule("Платёжный путешественник", "Совершить переводы с 3 и более разных платёжных систем",
+      events=('transaction_created',), needs=('payment_systems',), backfill=_payment_explorers,
+      target=3, progress=lambda context: len(context['payment_systems']))
+def payment_explorer(context) -> bool:
+    return len(context['payment_systems']) >= 3
+
+
+@rule("Первый счёт", "Открыть свой первый банковский счёт",
+      events=('account_created',),
+      backfill=lambda: BankAccount.objects.values_list('owner', flat=True).distinct())
+def first_account(context) -> bool:
+    return True
+
+
+@rule("Семейный банк", "Вы владелец счёта с двумя и более другими пользователями",
+      events=('co_owner_added',), needs=('max_co_owners',), backfill=_family_bank_owners,
+      target=2, progress=lambda context: context['max_co_owners'])
+def family_bank(context) -> bool:
+    return context['max_co_owners'] >= 2
@@ -9,3 +9,11 @@ class UserAchievementSerializer(serializers.ModelSerializer):
     class Meta:
         model = UserAchievement
         fields = ("created_at", "name", "condition")
+
+
+class AchievementProgressSerializer(serializers.Serializer):
+    name = serializers.CharField()
+    condition = serializers.CharField()
+    current = serializers.IntegerField()
+    target = serializers.IntegerField()
+    achieved = serializers.BooleanField()
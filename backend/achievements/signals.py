@@ -1,19 +1,11 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 
 from transactions.models import Transaction
-from .logic import (
-    award_first_transaction,
-    award_big_wallet,
-    award_loyal_client,
-    award_currency_broker,
-    award_family_bank,
-    award_reverse_transfer,
-    award_generosity,
-    award_first_account,
-    award_chain_reaction,
-    award_payment_explorer,
-)
+from transactions.signals import transactions_bulk_created
+from .cache import catalogue, awarded_cache
+from .events import enqueue_event, enqueue_events
+from .models import Achievement, UserAchievement, AchievementCacheVersion
 from bank_accounts.models import UserBankAccount
 
 from bank_accounts.models import BankAccount
@@ -22,30 +14,37 @@ from bank_accounts.models import BankAccount
 @receiver(post_save, sender=BankAccount)
 def on_account_created(sender, instance, created, **kwargs):
     if created:
-        award_first_account(instance.owner)
+        enqueue_event('account_created', instance.pk)
 
 
 @receiver(post_save, sender=UserBankAccount)
 def on_co_owner_added(sender, instance, created, **kwargs):
     if created:
-        owner = instance.bank_account.owner
-        award_family_bank(owner)
+        enqueue_event('co_owner_added', instance.bank_account_id)
 
 
 @receiver(post_save, sender=Transaction)
 def on_transaction_save(sender, instance, created, **kwargs):
+    if created:
+        enqueue_event('transaction_created', instance.pk)
+
+
+@receiver(transactions_bulk_created)
+def on_transactions_bulk_created(sender, transactions, **kwargs):
+    enqueue_events('transaction_created', [transaction.pk for transaction in transactions])
+
+
+@receiver(post_save, sender=Achievement)
+@receiver(post_delete, sender=Achievement)
+def on_achievement_changed(sender, instance, created=False, **kwargs):
+    if not created:
+        catalogue.clear()
+        AchievementCacheVersion.bump()
+
+
+@receiver(post_save, sender=UserAchievement)
+@receiver(post_delete, sender=UserAchievement)
+def on_user_achievement_changed(sender, instance, created=False, **kwargs):
     if not created:
-        return
-
-    user = instance.sender_account.owner
-    account_ids = user.bank_accounts.values_list('bank_account_id', flat=True)
-    txn_count = Transaction.objects.filter(sender_account_id__in=account_ids).count()
-
-    award_big_wallet(user, instance.created_at.date(), account_ids)
-    award_first_transaction(user, txn_count)
-    award_loyal_client(user, txn_count)
-    award_currency_broker(user, instance.sender_account.currency, instance.receiver_account.currency)
-    award_reverse_transfer(user, instance.receiver_account.owner)
-    award_generosity(user)
-    award_chain_reaction(user, instance.sender_account)
-    award_payment_explorer(user)
+        awarded_cache.evict(instance.user_id)
+        AchievementCacheVersion.bump()
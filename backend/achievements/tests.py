@@ -1,20 +1,23 @@
 import json
+from io import StringIO
 from pathlib import Path
 from unittest.mock import patch
 import pytest
+from datetime import timedelta
 from decimal import Decimal
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework.test import APIClient
+from django.test import TestCase
 from django.utils import timezone
 from django.db import transaction as db_transaction
 from bank_accounts.models import BankAccount, UserBankAccount
-from .models import UserAchievement
+from .cache import catalogue, awarded_cache
+from .models import Achievement, AchievementEvent, UserAchievement, UserActivityCounters
 from transactions.models import Transaction, TransactionType
 from users.models import User
-from achievements.logic import (
-    award_family_bank,
-    award_reverse_transfer,
-    award_generosity,
-    award_payment_explorer,
-)
+from achievements.logic import award
+from achievements.rules import evaluate_event, rule, rules_for
 
 
 @pytest.fixture(autouse=True)
@@ -33,6 +36,14 @@ def mock_currency_api():
         yield
 
 
+@pytest.fixture(autouse=True)
+def clear_achievement_caches():
+    """Every test starts from a rolled back database, so the process-level caches must be reset."""
+    catalogue.clear()
+    awarded_cache.clear()
+    yield
+
+
 def create_user(email: str, phone: str, first: str = "Foo", last: str = "Bar") -> User:
     return User.objects.create_user(
         email=email,
@@ -61,7 +72,7 @@ def create_transfer(sender: BankAccount, receiver: BankAccount, amount: Decimal)
     else:
         converted_amount = amount
 
-    with db_transaction.atomic():
+    with TestCase.captureOnCommitCallbacks(execute=True), db_transaction.atomic():
         Transaction.objects.create(
             type_id=t_type,
             status="completed",
@@ -79,6 +90,11 @@ def create_transfer(sender: BankAccount, receiver: BankAccount, amount: Decimal)
         receiver.save()
 
 
+def process_achievement_events() -> None:
+    with TestCase.captureOnCommitCallbacks(execute=True):
+        call_command("process_achievement_events", stdout=StringIO())
+
+
 @pytest.fixture
 def users() -> tuple[User]:
     sender = create_user("sender@example.com", "70000000000", "Send", "User")
@@ -100,6 +116,7 @@ def test_first_transaction_awarded(accounts):
     sender_acc, receiver_acc, _ = accounts
 
     create_transfer(sender_acc, receiver_acc, Decimal("1000.00"))
+    process_achievement_events()
 
     sender_user = sender_acc.users.first().user
     assert UserAchievement.objects.filter(
@@ -107,12 +124,103 @@ def test_first_transaction_awarded(accounts):
     ).exists(), "Достижение 'Первый перевод' не выдано"
 
 
+@pytest.mark.django_db
+def test_transfer_only_queues_event(accounts):
+    sender_acc, receiver_acc, _ = accounts
+
+    create_transfer(sender_acc, receiver_acc, Decimal("1000.00"))
+
+    assert AchievementEvent.objects.filter(event_type="transaction_created", status="pending").count() == 1
+    assert not UserAchievement.objects.filter(user=sender_acc.owner).exists()
+
+    process_achievement_events()
+
+    assert not AchievementEvent.objects.filter(status="pending").exists()
+    assert UserAchievement.objects.filter(user=sender_acc.owner).exists()
+
+
+@pytest.mark.django_db
+def test_awarded_cache_skips_known_achievements(accounts, django_assert_num_queries):
+    sender_acc, receiver_acc, _ = accounts
+    user = sender_acc.owner
+
+    create_transfer(sender_acc, receiver_acc, Decimal("1000.00"))
+    process_achievement_events()
+    assert awarded_cache.has(user.pk, catalogue.get_id("Первый перевод", ""))
+
+    with django_assert_num_queries(0):
+        award(user, "Первый перевод", "Совершить первый перевод денег")
+
+
+@pytest.mark.django_db
+def test_awarded_cache_invalidated_on_delete(accounts):
+    sender_acc, receiver_acc, _ = accounts
+    user = sender_acc.owner
+
+    create_transfer(sender_acc, receiver_acc, Decimal("1000.00"))
+    process_achievement_events()
+    UserAchievement.objects.filter(user=user, achievement__name="Первый перевод").delete()
+
+    award(user, "Первый перевод", "Совершить первый перевод денег")
+
+    assert UserAchievement.objects.filter(user=user, achievement__name="Первый перевод").exists()
+
+
+@pytest.mark.django_db
+def test_failed_events_can_be_retried(accounts):
+    sender_acc, receiver_acc, _ = accounts
+
+    create_transfer(sender_acc, receiver_acc, Decimal("1000.00"))
+    with patch("achievements.events.evaluate_event", side_effect=RuntimeError("rule crashed")):
+        process_achievement_events()
+    assert AchievementEvent.objects.get().status == "failed"
+
+    with TestCase.captureOnCommitCallbacks(execute=True):
+        call_command("process_achievement_events", retry_failed=True, stdout=StringIO())
+
+    assert AchievementEvent.objects.get().status == "processed"
+    assert UserAchievement.objects.filter(user=sender_acc.owner, achievement__name="Первый перевод").exists()
+
+
+@pytest.mark.django_db
+def test_scheduler_drains_achievement_events(accounts):
+    from scheduled_transfers.scheduler import Scheduler
+
+    sender_acc, receiver_acc, _ = accounts
+    create_transfer(sender_acc, receiver_acc, Decimal("1000.00"))
+
+    with TestCase.captureOnCommitCallbacks(execute=True):
+        Scheduler(poll_seconds=60, batch_size=10, lease_seconds=300).tick()
+
+    assert not AchievementEvent.objects.filter(status="pending").exists()
+    assert UserAchievement.objects.filter(user=sender_acc.owner, achievement__name="Первый перевод").exists()
+
+
+@pytest.mark.django_db
+def test_worker_caches_dropped_after_change_in_another_process(accounts):
+    sender_acc, receiver_acc, _ = accounts
+    user = sender_acc.owner
+
+    create_transfer(sender_acc, receiver_acc, Decimal("1000.00"))
+    process_achievement_events()
+
+    # Deleted from another process: only the shared version reaches this worker
+    with patch.object(awarded_cache, "evict"), patch.object(catalogue, "clear"):
+        Achievement.objects.filter(name="Первый перевод").delete()
+
+    create_transfer(sender_acc, receiver_acc, Decimal("1000.00"))
+    process_achievement_events()
+
+    assert UserAchievement.objects.filter(user=user, achievement__name="Первый перевод").exists()
+
+
 @pytest.mark.django_db
 def test_loyal_client_after_ten_transfers(accounts):
     sender_acc, receiver_acc, _ = accounts
 
     for _ in range(10):
         create_transfer(sender_acc, receiver_acc, Decimal("50.00"))
+    process_achievement_events()
 
     sender_user = sender_acc.users.first().user
     assert UserAchievement.objects.filter(
@@ -125,6 +233,7 @@ def test_currency_broker_different_currency(accounts):
     sender_acc, _, receiver_acc_usd = accounts
 
     create_transfer(sender_acc, receiver_acc_usd, Decimal("100.00"))
+    process_achievement_events()
 
     sender_user = sender_acc.users.first().user
     assert UserAchievement.objects.filter(
@@ -137,6 +246,7 @@ def test_big_wallet_over_100k_per_day(accounts):
     sender_acc, receiver_acc, _ = accounts
 
     create_transfer(sender_acc, receiver_acc, Decimal("150000.00"))
+    process_achievement_events()
 
     sender_user = sender_acc.users.first().user
     assert UserAchievement.objects.filter(
@@ -153,7 +263,7 @@ def test_family_bank_awarded(accounts):
     UserBankAccount.objects.create(user=other1, bank_account=sender_acc)
     UserBankAccount.objects.create(user=other2, bank_account=sender_acc)
 
-    award_family_bank(user)
+    evaluate_event("co_owner_added", sender_acc)
 
     assert UserAchievement.objects.filter(user=user, achievement__name="Семейный банк").exists()
 
@@ -162,10 +272,10 @@ def test_family_bank_awarded(accounts):
 def test_reverse_transfer_awarded(accounts):
     sender_acc, receiver_acc, _ = accounts
     sender_user = sender_acc.owner
-    receiver_user = receiver_acc.owner
 
+    t_type = TransactionType.objects.get_or_create(name="Test")[0]
     Transaction.objects.create(
-        type_id=TransactionType.objects.get_or_create(name="Test")[0],
+        type_id=t_type,
         status="completed",
         description="rev",
         amount=Decimal("100.00"),
@@ -174,8 +284,17 @@ def test_reverse_transfer_awarded(accounts):
         receiver_account=sender_acc,
         created_at=timezone.now()
     )
+    transaction = Transaction.objects.create(
+        type_id=t_type,
+        status="completed",
+        description="fwd",
+        amount=Decimal("50.00"),
+        converted_amount=Decimal("50.00"),
+        sender_account=sender_acc,
+        receiver_account=receiver_acc,
+    )
 
-    award_reverse_transfer(sender_user, receiver_user)
+    evaluate_event("transaction_created", transaction)
 
     assert UserAchievement.objects.filter(user=sender_user, achievement__name="Обратная связь").exists()
 
@@ -189,50 +308,237 @@ def test_generosity_awarded(accounts):
         rcv = User.objects.create_user(f"rcv{i}@e.com", "p", phone=f"7999999999{i}", first_name="X", last_name="Y")
         rcv_acc = BankAccount.objects.create(owner=rcv, currency="RUB")
         UserBankAccount.objects.create(user=rcv, bank_account=rcv_acc)
-        Transaction.objects.create(
-            type_id=TransactionType.objects.get_or_create(name="Test")[0],
-            status="completed",
-            description="",
-            amount=Decimal("10.00"),
-            converted_amount=Decimal("10.00"),
-            sender_account=sender_acc,
-            receiver_account=rcv_acc
-        )
+        create_transfer(sender_acc, rcv_acc, Decimal("10.00"))
+
+    process_achievement_events()
 
-    award_generosity(user)
     assert UserAchievement.objects.filter(user=user, achievement__name="Щедрость").exists()
 
 
+@pytest.mark.django_db
+def test_generosity_requires_distinct_receivers(accounts):
+    sender_acc, receiver_acc, _ = accounts
+
+    for _ in range(5):
+        create_transfer(sender_acc, receiver_acc, Decimal("10.00"))
+    process_achievement_events()
+
+    assert not UserAchievement.objects.filter(user=sender_acc.owner, achievement__name="Щедрость").exists()
+
+
 @pytest.mark.django_db
 def test_chain_reaction_awarded(accounts):
     sender_acc, receiver_acc, _ = accounts
     user = sender_acc.owner
 
-    Transaction.objects.create(
-        type_id=TransactionType.objects.get_or_create(name="Test")[0],
-        status="completed",
-        description="rev",
-        amount=Decimal("100.00"),
-        converted_amount=Decimal("100.00"),
-        sender_account=receiver_acc,
-        receiver_account=sender_acc,
-        created_at=timezone.now()
-    )
-
-    from achievements.logic import award_chain_reaction
-    award_chain_reaction(user, sender_acc)
+    create_transfer(receiver_acc, sender_acc, Decimal("100.00"))
+    create_transfer(sender_acc, receiver_acc, Decimal("50.00"))
+    process_achievement_events()
 
     assert UserAchievement.objects.filter(user=user, achievement__name="Цепная реакция").exists()
 
 
+@pytest.mark.django_db
+def test_activity_counters_updated(accounts):
+    sender_acc, receiver_acc, _ = accounts
+
+    create_transfer(sender_acc, receiver_acc, Decimal("100.00"))
+    create_transfer(sender_acc, receiver_acc, Decimal("250.00"))
+    process_achievement_events()
+
+    counters = UserActivityCounters.objects.get(user=sender_acc.owner)
+    assert counters.sent_count == 2
+    assert counters.spent_today == Decimal("350.00")
+    assert counters.recent_receivers == [receiver_acc.owner_id, receiver_acc.owner_id]
+
+    receiver_counters = UserActivityCounters.objects.get(user=receiver_acc.owner)
+    assert str(receiver_acc.pk) in receiver_counters.last_incoming
+
+
 @pytest.mark.django_db
 def test_payment_explorer_awarded(users):
     sender, _ = users
 
+    sender_accounts = []
     for ps in ["VISA", "MIR", "MC"]:
-        acc = BankAccount.objects.create(owner=sender, payment_system=ps)
-        UserBankAccount.objects.create(user=sender, bank_account=acc)
+        acc = create_account(sender)
+        acc.payment_system = ps
+        acc.save()
+        sender_accounts.append(acc)
 
-    award_payment_explorer(sender)
+    transaction = Transaction.objects.create(
+        type_id=TransactionType.objects.get_or_create(name="Test")[0],
+        status="completed",
+        amount=Decimal("10.00"),
+        converted_amount=Decimal("10.00"),
+        sender_account=sender_accounts[0],
+        receiver_account=sender_accounts[1],
+    )
+    evaluate_event("transaction_created", transaction)
 
     assert UserAchievement.objects.filter(user=sender, achievement__name="Платёжный путешественник").exists()
+
+
+@pytest.mark.django_db
+def test_rules_already_awarded_skip_data_fetch(accounts):
+    sender_acc, receiver_acc, _ = accounts
+    user = sender_acc.owner
+    with TestCase.captureOnCommitCallbacks(execute=True):
+        for r in rules_for("transaction_created"):
+            award(user, r.name, r.description)
+
+    transaction = Transaction.objects.create(
+        type_id=TransactionType.objects.get_or_create(name="Test")[0],
+        status="completed",
+        amount=Decimal("10.00"),
+        converted_amount=Decimal("10.00"),
+        sender_account=sender_acc,
+        receiver_account=receiver_acc,
+    )
+
+    with patch.dict("achievements.rules.PROVIDERS", {"reverse_transfer": None, "payment_systems": None}):
+        evaluate_event("transaction_created", transaction)
+
+
+def test_rule_with_unknown_data_rejected():
+    with pytest.raises(ValueError):
+        @rule("Test", "Test rule", events=("account_created",), needs=("counters",))
+        def check(context):
+            return True
+
+
+def create_raw_transfer(sender: BankAccount, receiver: BankAccount, amount: Decimal) -> Transaction:
+    """Creates a transaction without queuing achievement events, like historical data."""
+    return Transaction.objects.create(
+        type_id=TransactionType.objects.get_or_create(name="Test")[0],
+        status="completed",
+        amount=amount,
+        converted_amount=amount,
+        sender_account=sender,
+        receiver_account=receiver,
+    )
+
+
+@pytest.mark.django_db
+def test_recompute_achievements_backfills_all_rules(accounts):
+    sender_acc, receiver_acc, receiver_acc_usd = accounts
+    sender = sender_acc.owner
+
+    for _ in range(10):
+        create_raw_transfer(sender_acc, receiver_acc, Decimal("15000.00"))
+    create_raw_transfer(sender_acc, receiver_acc_usd, Decimal("1.00"))
+    create_raw_transfer(receiver_acc, sender_acc, Decimal("1.00"))
+    create_raw_transfer(sender_acc, receiver_acc, Decimal("1.00"))
+
+    call_command("recompute_achievements", "--chunk-size", "1", stdout=StringIO())
+
+    names = set(UserAchievement.objects.filter(user=sender).values_list("achievement__name", flat=True))
+    assert {
+        "Первый перевод",
+        "Лояльный клиент",
+        "Большой кошелёк",
+        "Валютный брокер",
+        "Обратная связь",
+        "Цепная реакция",
+        "Первый счёт",
+    } <= names
+    assert "Щедрость" not in names
+
+
+@pytest.mark.django_db
+def test_generosity_backfill_finds_five_distinct_receivers_in_a_row(users):
+    from achievements.rules import _generous_senders
+
+    receivers = [create_account(create_user(f"r{i}@e.com", f"7222222222{i}")) for i in range(6)]
+    generous = create_account(users[0])
+    almost = create_account(users[1])
+    for i in (0, 1, 0, 2, 3, 4, 5):
+        create_raw_transfer(generous, receivers[i], Decimal("1.00"))
+    for i in (0, 1, 2, 0, 3, 1):
+        create_raw_transfer(almost, receivers[i], Decimal("1.00"))
+
+    assert _generous_senders() == {users[0].pk}
+
+
+@pytest.mark.django_db
+def test_recompute_achievements_restricted_to_rules(accounts):
+    sender_acc, receiver_acc, _ = accounts
+    create_raw_transfer(sender_acc, receiver_acc, Decimal("10.00"))
+
+    call_command("recompute_achievements", "--rules", "first_transaction", stdout=StringIO())
+    call_command("recompute_achievements", "--rules", "first_transaction", stdout=StringIO())
+
+    assert list(UserAchievement.objects.values_list("achievement__name", flat=True)) == ["Первый перевод"]
+
+
+@pytest.mark.django_db
+def test_progress_endpoint_reads_materialized_progress(accounts, django_assert_num_queries):
+    sender_acc, receiver_acc, _ = accounts
+
+    for _ in range(7):
+        create_transfer(sender_acc, receiver_acc, Decimal("10.00"))
+    process_achievement_events()
+
+    client = APIClient()
+    client.force_authenticate(sender_acc.owner)
+    with django_assert_num_queries(2):
+        response = client.get(reverse("user-achievements-progress"))
+
+    assert response.status_code == 200
+    progress = {item["name"]: item for item in response.data}
+    assert progress["Лояльный клиент"]["current"] == 7
+    assert progress["Лояльный клиент"]["target"] == 10
+    assert not progress["Лояльный клиент"]["achieved"]
+    assert progress["Первый перевод"]["achieved"]
+    assert progress["Семейный банк"]["current"] == 0
+
+
+@pytest.mark.django_db
+def test_progress_endpoint_reports_awards_without_progress(accounts):
+    sender_acc, _, _ = accounts
+    user = sender_acc.owner
+    # Awarded before progress was tracked: no progress row exists
+    award(user, "Лояльный клиент", "Совершить 10 переводов")
+
+    client = APIClient()
+    client.force_authenticate(user)
+    response = client.get(reverse("user-achievements-progress"))
+
+    progress = {item["name"]: item for item in response.data}
+    assert progress["Лояльный клиент"]["achieved"]
+    assert progress["Лояльный клиент"]["current"] == 10
+
+
+@pytest.mark.django_db
+def test_progress_endpoint_sees_achievements_created_after_catalogue_load(accounts):
+    sender_acc, _, _ = accounts
+    user = sender_acc.owner
+    catalogue.get_id("Первый перевод", "Совершить первый перевод денег")
+    # Created by another process after this one loaded its catalogue
+    achievement = Achievement.objects.create(name="Лояльный клиент", condition="Совершить 10 переводов")
+    UserAchievement.objects.create(user=user, achievement=achievement)
+
+    client = APIClient()
+    client.force_authenticate(user)
+    response = client.get(reverse("user-achievements-progress"))
+
+    progress = {item["name"]: item for item in response.data}
+    assert progress["Лояльный клиент"]["achieved"]
+
+
+@pytest.mark.django_db
+def test_progress_endpoint_resets_daily_progress_on_a_new_day(accounts):
+    sender_acc, receiver_acc, _ = accounts
+    user = sender_acc.owner
+
+    create_transfer(sender_acc, receiver_acc, Decimal("50000.00"))
+    process_achievement_events()
+
+    client = APIClient()
+    client.force_authenticate(user)
+    progress = {item["name"]: item for item in client.get(reverse("user-achievements-progress")).data}
+    assert progress["Большой кошелёк"]["current"] == 50000
+
+    UserActivityCounters.objects.filter(user=user).update(spent_day=timezone.now().date() - timedelta(days=1))
+    progress = {item["name"]: item for item in client.get(reverse("user-achievements-progress")).data}
+    assert progress["Большой кошелёк"]["current"] == 0
@@ -1,6 +1,7 @@
 from django.urls import path
-from .views import UserAchievementsListView
+from .views import UserAchievementsListView, UserAchievementProgressView
 
 urlpatterns = [
     path("achievements/", UserAchievementsListView.as_view(), name="user-achievements"),
+    path("achievements/progress/", UserAchievementProgressView.as_view(), name="user-achievements-progress"),
 ]
@@ -1,6 +1,12 @@
+from django.db.models import F
+from django.utils import timezone
 from rest_framework import generics, permissions
-from .models import UserAchievement
-from .serializers import UserAchievementSerializer
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .models import UserAchievement, UserAchievementProgress
+from .rules import RULES
+from .serializers import UserAchievementSerializer, AchievementProgressSerializer
 
 
 class UserAchievementsListView(generics.ListAPIView):
@@ -12,3 +18,45 @@ class UserAchievementsListView(generics.ListAPIView):
                 .filter(user=self.request.user)
                 .select_related("achievement")
                 .order_by("-created_at"))
+
+
+class UserAchievementProgressView(APIView):
+    """
+    API view returning the authenticated user's progress towards every achievement.
+
+    Progress is materialized by the achievement worker, so the response is built from
+    one read of the user's progress rows and one of their awards, both keyed by
+    achievement name; achievements without a row have not been started yet. Awards are
+    authoritative for `achieved`: they include achievements earned before progress was
+    tracked, which have no progress row. Progress of daily rules is dropped once the
+    day the user last spent money is over.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        progress = {
+            p.achievement_name: p
+            for p in (UserAchievementProgress.objects
+                      .filter(user=request.user)
+                      .annotate(achievement_name=F('achievement__name'),
+                                spent_day=F('user__activity_counters__spent_day')))
+        }
+
+        awarded = set(UserAchievement.objects.filter(user=request.user).values_list('achievement__name', flat=True))
+
+        today = timezone.now().date()
+        data = []
+        for rule in RULES.values():
+            row = progress.get(rule.name)
+            if row is not None and rule.daily and row.spent_day != today:
+                row = None
+            achieved = rule.name in awarded or (row is not None and row.current >= rule.target)
+            data.append({
+                'name': rule.name,
+                'condition': rule.description,
+                'current': rule.target if achieved else (row.current if row else 0),
+                'target': rule.target,
+                'achieved': achieved,
+            })
+
+        return Response(AchievementProgressSerializer(data, many=True).data)
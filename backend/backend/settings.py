@@ -132,6 +132,21 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+# The in-process default is not shared between workers, so account memberships are not
+# cached with it and every access check reads them from the database (see
+# bank_accounts.membership). Deployments should point CACHE_BACKEND and CACHE_LOCATION
+# at Redis or Memcached to share it.
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
+    }
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
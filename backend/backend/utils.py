@@ -1,25 +1,17 @@
-from bank_accounts.models import BankAccount
-from savings_accounts.models import SavingsAccount
+from bank_accounts.models import UserAccountCounters
 
 
-def get_user_active_accounts_count(user):
+def get_user_active_accounts_count(user, lock=False):
     """
     Returns the number of active/frozen accounts of the user (including savings)
 
     Args:
         user: Django user object
+        lock: Keep the user's counters locked until the surrounding transaction ends,
+            so the limit can't be exceeded by concurrent creates. Requires an atomic block
 
     Returns:
         tuple[int]: Total number of active accounts (regular + savings), number of active savings accounts
     """
-    base_accounts_count = BankAccount.objects.filter(
-        users__user=user,
-        status__in=['active', 'frozen']
-    ).count()
-
-    savings_accounts_count = SavingsAccount.objects.filter(
-        bank_account__users__user=user,
-        bank_account__status__in=['active', 'frozen']
-    ).count()
-
-    return base_accounts_count, savings_accounts_count
+    counters = UserAccountCounters.get_for(user.pk, lock=lock)
+    return counters.accounts, counters.savings_accounts
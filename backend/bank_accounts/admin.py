@@ -1,4 +1,5 @@
 from django.contrib import admin
+from django.db import transaction as db_transaction
 from .models import BankAccount, UserBankAccount
 from admin_logs.mixins import LoggingMixin
 
@@ -31,18 +32,28 @@ class BankAccountAdmin(LoggingMixin, admin.ModelAdmin):
 
     @admin.action(description="Froze selected accounts")
     def freeze_accounts(self, request, queryset):
-        updated = queryset.update(status="frozen")
-        self.message_user(request, f"Frozen accounts: {updated}")
-        for acc in queryset:
+        accounts = self._set_status(queryset.filter(status="active"), "frozen")
+        self.message_user(request, f"Frozen accounts: {len(accounts)}")
+        for acc in accounts:
             self.log_action(request, acc, action="freeze", details={"account_id": acc.pk})
 
     @admin.action(description="Unfroze selected accounts")
     def unfreeze_accounts(self, request, queryset):
-        updated = queryset.filter(status="frozen").update(status="active")
-        self.message_user(request, f"Unfrozen accounts: {updated}")
-        for acc in queryset:
+        accounts = self._set_status(queryset.filter(status="frozen"), "active")
+        self.message_user(request, f"Unfrozen accounts: {len(accounts)}")
+        for acc in accounts:
             self.log_action(request, acc, action="unfreeze", details={"account_id": acc.pk})
 
+    @staticmethod
+    def _set_status(queryset, status):
+        # Saved one by one, so the signals keep memberships and counters in step
+        accounts = list(queryset)
+        with db_transaction.atomic():
+            for acc in accounts:
+                acc.status = status
+                acc.save(update_fields=["status"])
+        return accounts
+
     @admin.action(description="Close selected accounts")
     def close_accounts(self, request, queryset):
         updated, errors = 0, 0
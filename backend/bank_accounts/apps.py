@@ -5,3 +5,11 @@ class BankAccountsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'bank_accounts'
     verbose_name = 'Bank accounts'
+
+    def ready(self):
+        from django.urls import register_converter
+        from .validators import AccountNumberConverter
+
+        register_converter(AccountNumberConverter, 'account_number')
+
+        from . import signals
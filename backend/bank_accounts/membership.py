@@ -0,0 +1,86 @@
+from dataclasses import dataclass
+
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction as db_transaction
+
+from core.config import AppConfig
+from .models import UserBankAccount
+
+
+@dataclass(frozen=True)
+class Membership:
+    account_id: int
+    account_number: str
+    role: str  # 'owner' or 'member'
+    status: str
+
+
+class MembershipIndex:
+    """The accounts a user belongs to, by account number, with the user's role on each."""
+
+    def __init__(self, memberships: list[Membership]):
+        self._by_number = {m.account_number: m for m in memberships}
+        self.account_ids = frozenset(m.account_id for m in memberships)
+
+    def get(self, account_number: str) -> Membership | None:
+        return self._by_number.get(account_number)
+
+    def __contains__(self, account_number: str) -> bool:
+        return account_number in self._by_number
+
+    def __iter__(self):
+        return iter(self._by_number.values())
+
+
+def _cache_key(user_id: int) -> str:
+    return f"bank_accounts:membership:{user_id}"
+
+
+def cache_is_shared() -> bool:
+    """Whether every process uses the same cache, so an invalidation reaches all of them."""
+    return not isinstance(caches['default'], LocMemCache)
+
+
+def get_membership(user) -> MembershipIndex:
+    """
+    Membership index of the user, read from the cache or loaded with one query.
+
+    Entries are dropped by the bank_accounts signals whenever a membership is added or
+    removed or an account changes status. A cache that isn't shared between processes is
+    not used at all: a member removed through another worker would keep access here, and
+    the index backs the checks that let the user move money or read account data.
+    """
+    shared = cache_is_shared()
+    rows = cache.get(_cache_key(user.pk)) if shared else None
+    if rows is None:
+        rows = list(
+            UserBankAccount.objects
+            .filter(user_id=user.pk)
+            .values_list('bank_account_id', 'bank_account__account_number', 'bank_account__owner_id',
+                         'bank_account__status')
+        )
+        if shared:
+            cache.set(_cache_key(user.pk), rows, AppConfig.MEMBERSHIP_CACHE_SECONDS)
+
+    return MembershipIndex([
+        Membership(account_id, account_number, 'owner' if owner_id == user.pk else 'member', status)
+        for account_id, account_number, owner_id, status in rows
+    ])
+
+
+def invalidate(user_ids) -> None:
+    """
+    Drops the cached indexes of `user_ids`, now and again once the surrounding transaction
+    commits, so a request that read the old rows meanwhile cannot keep them cached.
+    """
+    keys = [_cache_key(user_id) for user_id in set(user_ids)]
+    if not keys:
+        return
+    cache.delete_many(keys)
+    db_transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def invalidate_accounts(account_ids) -> None:
+    """Drops the cached indexes of every member of `account_ids`."""
+    invalidate(UserBankAccount.objects.filter(bank_account_id__in=account_ids).values_list('user_id', flat=True))
@@ -0,0 +1,41 @@
+# Generated by Django 5.1.7 on 2026-10-19 16:45
+
+from django.db import migrations, models
+
+PREFIXES = {'VISA': '4', 'MC': '5', 'MIR': '2', 'UPI': '6', 'JCB': '3528'}
+
+
+def seed_legacy_last_numbers(apps, schema_editor):
+    """
+    Records the highest counter of the existing numbers per payment system: they keep
+    their number and stay valid without a check digit, new numbers are allocated above them.
+    """
+    BankAccount = apps.get_model('bank_accounts', 'BankAccount')
+    PaymentSystemCounter = apps.get_model('bank_accounts', 'PaymentSystemCounter')
+
+    legacy_last = {}
+    for payment_system, number in BankAccount.objects.values_list('payment_system', 'account_number').iterator():
+        prefix = PREFIXES[payment_system]
+        legacy_last[payment_system] = max(legacy_last.get(payment_system, 0), int(number[len(prefix):]))
+
+    for payment_system, last_number in legacy_last.items():
+        counter, _ = PaymentSystemCounter.objects.get_or_create(payment_system=payment_system)
+        counter.legacy_last_number = last_number
+        counter.last_number = max(counter.last_number, last_number)
+        counter.save(update_fields=['legacy_last_number', 'last_number'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bank_accounts', '0017_alter_bankaccount_payment_system_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='paymentsystemcounter',
+            name='legacy_last_number',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(seed_legacy_last_numbers, migrations.RunPython.noop),
+    ]
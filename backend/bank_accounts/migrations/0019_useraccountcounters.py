@@ -0,0 +1,45 @@
+# Generated by Django 5.1.7 on 2026-10-19 16:52
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def seed_account_counters(apps, schema_editor):
+    UserBankAccount = apps.get_model('bank_accounts', 'UserBankAccount')
+    UserAccountCounters = apps.get_model('bank_accounts', 'UserAccountCounters')
+
+    counts = (UserBankAccount.objects
+              .filter(bank_account__status__in=['active', 'frozen'])
+              .values('user')
+              .annotate(accounts=Count('pk'), savings_accounts=Count('bank_account__saving_account')))
+    UserAccountCounters.objects.bulk_create(
+        [UserAccountCounters(user_id=row['user'], accounts=row['accounts'], savings_accounts=row['savings_accounts'])
+         for row in counts],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bank_accounts', '0018_paymentsystemcounter_legacy_last_number'),
+        ('users', '0004_alter_user_options_alter_user_table'),
+        ('savings_accounts', '0008_savingsaccount_goal_progress'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserAccountCounters',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='account_counters', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('accounts', models.PositiveIntegerField(default=0)),
+                ('savings_accounts', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'user_account_counters',
+            },
+        ),
+        migrations.RunPython(seed_account_counters, migrations.RunPython.noop),
+    ]
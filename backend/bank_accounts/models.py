@@ -1,7 +1,11 @@
-from django.db import models
-from django.db.models import CheckConstraint, Q
+from django.db import models, connection
+from django.db import transaction as db_transaction
+from django.db.models import CheckConstraint, Q, F
 
+from core.config import AppConfig
 from users.models import User
+from .numbering import AccountNumberAllocator
+from .validators import ACCOUNT_NUMBER_LENGTH, luhn_check_digit
 
 
 class BankAccount(models.Model):
@@ -82,16 +86,18 @@ class BankAccount(models.Model):
         if self.balance != 0:
             raise ValueError("Cannot close account with non-zero balance")
 
-        self.status = 'closed'
-        self.save()
+        # The members' counters follow in bank_accounts.signals, in the same transaction
+        with db_transaction.atomic():
+            self.status = 'closed'
+            self.save()
 
     def save(self, *args, **kwargs):
         if not self.account_number:
             prefix = self.PREFIXES[self.payment_system]
-            last_number = PaymentSystemCounter.get_next_number(self.payment_system)
+            last_number = account_numbers.next_number(self.payment_system)
 
-            number_length = 16 - len(prefix)
-            self.account_number = f"{prefix}{str(last_number).zfill(number_length)}"
+            payload = f"{prefix}{str(last_number).zfill(ACCOUNT_NUMBER_LENGTH - 1 - len(prefix))}"
+            self.account_number = payload + luhn_check_digit(payload)
 
         super().save(*args, **kwargs)
 
@@ -99,19 +105,35 @@ class BankAccount(models.Model):
 class PaymentSystemCounter(models.Model):
     payment_system = models.CharField(max_length=4, choices=BankAccount.PAYMENT_SYSTEMS, unique=True)
     last_number = models.PositiveIntegerField(default=0)
+    # Highest number issued before check digits were introduced, see validators.is_valid_account_number
+    legacy_last_number = models.PositiveIntegerField(default=0)
 
     class Meta:
         db_table = 'payment_system_counter'
 
     @classmethod
-    def get_next_number(cls, payment_system):
-        counter, _ = cls.objects.get_or_create(
-            payment_system=payment_system,
-            defaults={'last_number': 0}
-        )
-        counter.last_number += 1
-        counter.save()
-        return counter.last_number
+    def reserve_block(cls, payment_system, size):
+        """
+        Moves the counter of the payment system forward by `size` with a single
+        UPDATE ... RETURNING and returns the reserved numbers. Concurrent callers
+        are serialized by the row lock, so their blocks never overlap.
+        """
+        table = connection.ops.quote_name(cls._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"UPDATE {table} SET last_number = last_number + %s WHERE payment_system = %s RETURNING last_number",
+                [size, payment_system]
+            )
+            row = cursor.fetchone()
+
+        if row is None:
+            cls.objects.get_or_create(payment_system=payment_system, defaults={'last_number': 0})
+            return cls.reserve_block(payment_system, size)
+
+        return range(row[0] - size + 1, row[0] + 1)
+
+
+account_numbers = AccountNumberAllocator(PaymentSystemCounter.reserve_block, AppConfig.ACCOUNT_NUMBER_BLOCK_SIZE)
 
 
 class UserBankAccount(models.Model):
@@ -134,6 +156,49 @@ class UserBankAccount(models.Model):
         return f"UserBankAccount: {self.user} - {self.bank_account}"
 
 
+class UserAccountCounters(models.Model):
+    """
+    Number of active or frozen accounts a user is a member of, kept up to date on
+    membership and status changes instead of being counted on every limit check.
+    """
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='account_counters'
+    )
+    # Savings accounts included
+    accounts = models.PositiveIntegerField(default=0)
+    savings_accounts = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        db_table = 'user_account_counters'
+
+    def __str__(self):
+        return f"Accounts of user {self.user_id}: {self.accounts} (savings: {self.savings_accounts})"
+
+    @classmethod
+    def get_for(cls, user_id, lock=False):
+        """
+        Counters of the user. With `lock` the row stays locked until the surrounding
+        transaction ends, so a limit check followed by a create cannot race another create.
+        """
+        queryset = cls.objects.select_for_update() if lock else cls.objects
+        return queryset.get_or_create(user_id=user_id)[0]
+
+    @classmethod
+    def add(cls, user_ids, accounts=0, savings_accounts=0):
+        """Moves the counters of every user in `user_ids` by the given amounts with F-expressions."""
+        user_ids = list(user_ids)
+        if not user_ids:
+            return
+        cls.objects.bulk_create([cls(user_id=user_id) for user_id in user_ids], ignore_conflicts=True)
+        cls.objects.filter(user_id__in=user_ids).update(
+            accounts=F('accounts') + accounts,
+            savings_accounts=F('savings_accounts') + savings_accounts
+        )
+
+
 class BankAccountInvitation(models.Model):
     account = models.ForeignKey(
         BankAccount,
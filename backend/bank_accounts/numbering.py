@@ -0,0 +1,56 @@
+import os
+import threading
+from typing import Callable
+
+from django.db import transaction as db_transaction
+
+
+class AccountNumberAllocator:
+    """
+    Hi/lo allocator of account number counters.
+
+    Each process reserves a block of counter values per payment system with one
+    atomic UPDATE and hands them out from memory, so creating an account does not
+    touch the counter row until the block runs out. Values left in a block when the
+    process exits are never reused, which leaves gaps in the numbering but never
+    duplicates.
+
+    A reservation made inside a transaction only feeds the pool once that transaction
+    commits: if it rolls back, the counter is rolled back too and the block may be
+    handed out again, so it must not be kept here.
+    """
+
+    def __init__(self, reserve: Callable[[str, int], range], block_size: int):
+        self.reserve = reserve
+        self.block_size = block_size
+        self._blocks: dict[str, list[int]] = {}
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+
+    def next_number(self, payment_system: str) -> int:
+        with self._lock:
+            self._forget_if_forked()
+            block = self._blocks.get(payment_system)
+            if block:
+                return block.pop()
+
+        numbers = list(reversed(self.reserve(payment_system, self.block_size)))
+        number = numbers.pop()
+        db_transaction.on_commit(lambda: self._add(payment_system, numbers))
+        return number
+
+    def clear(self) -> None:
+        with self._lock:
+            self._blocks.clear()
+
+    def _add(self, payment_system: str, numbers: list[int]) -> None:
+        with self._lock:
+            self._forget_if_forked()
+            # Keep the pool ordered: the lowest value is handed out first
+            self._blocks[payment_system] = sorted(self._blocks.get(payment_system, []) + numbers, reverse=True)
+
+    def _forget_if_forked(self) -> None:
+        # A forked worker inherits the parent's blocks, which the parent keeps using
+        if self._pid != os.getpid():
+            self._blocks.clear()
+            self._pid = os.getpid()
@@ -1,6 +1,7 @@
 from rest_framework import serializers, status
 from rest_framework.exceptions import ValidationError
 from django.db import IntegrityError
+from django.db.models import Prefetch
 from django.db import transaction as db_transaction
 
 from backend.utils import get_user_active_accounts_count
@@ -9,6 +10,7 @@ from .models import (
     BankAccountInvitation,
     UserBankAccount
 )
+from .validators import validate_account_number
 from users.models import User
 from users.serializers import UserSerializer
 from core.config import AppConfig
@@ -32,6 +34,17 @@ class BankAccountSerializer(serializers.ModelSerializer):
 
         read_only_fields = ['account_number', 'balance', 'status', 'users']
 
+    @staticmethod
+    def prefetch(queryset, prefix=''):
+        """
+        Loads the owner and the members of the accounts in `queryset` up front, so serializing
+        any number of accounts takes two queries. `prefix` is the path to the account when
+        the queryset is over a related model, e.g. 'bank_account__'.
+        """
+        return queryset.select_related(f'{prefix}owner').prefetch_related(
+            Prefetch(f'{prefix}users', queryset=UserBankAccount.objects.select_related('user'))
+        )
+
     def get_users(self, obj):
         """Returns a list of users associated with an account."""
         return UserSerializer([ua.user for ua in obj.users.all()], many=True).data
@@ -50,7 +63,7 @@ class PublicBankAccountSerializer(serializers.ModelSerializer):
 
 
 class ChangeAccountUsersSerializer(serializers.Serializer):
-    account_number = serializers.CharField()
+    account_number = serializers.CharField(validators=[validate_account_number])
     phone = serializers.CharField()
 
     def validate(self, attrs):
@@ -90,7 +103,7 @@ class UserInvitationSerializer(serializers.ModelSerializer):
 
 
 class BankAccountInvitationSerializer(serializers.Serializer):
-    account_number = serializers.CharField(max_length=16, write_only=True)
+    account_number = serializers.CharField(max_length=16, write_only=True, validators=[validate_account_number])
     action = serializers.ChoiceField(choices=['accept', 'reject'])
 
     def validate(self, data):
@@ -127,6 +140,14 @@ class BankAccountInvitationSerializer(serializers.Serializer):
         if action == 'accept':
             try:
                 with db_transaction.atomic():
+                    # Checked again under the lock: validation ran outside this transaction
+                    active_accounts_count, _ = get_user_active_accounts_count(user, lock=True)
+                    if active_accounts_count >= AppConfig.MAX_ACCOUNTS_PER_USER:
+                        raise ValidationError(
+                            {"error": f"You cannot have more than {AppConfig.MAX_ACCOUNTS_PER_USER} active or frozen bank accounts"}, # noqa
+                            code=status.HTTP_400_BAD_REQUEST
+                        )
+
                     UserBankAccount.objects.create(
                         user=user,
                         bank_account=account
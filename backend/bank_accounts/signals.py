@@ -0,0 +1,64 @@
+from django.db.models.signals import post_save, post_delete, pre_save
+from django.dispatch import receiver
+
+from .membership import invalidate, invalidate_accounts
+from .models import BankAccount, UserBankAccount, UserAccountCounters
+
+
+# Statuses an account is counted in UserAccountCounters with
+COUNTED_STATUSES = ('active', 'frozen')
+
+
+def _count_membership(membership: UserBankAccount, delta: int) -> None:
+    account = membership.bank_account
+    if account.status in COUNTED_STATUSES:
+        UserAccountCounters.add(
+            [membership.user_id],
+            accounts=delta,
+            savings_accounts=delta if hasattr(account, 'saving_account') else 0
+        )
+
+
+@receiver(post_save, sender=UserBankAccount)
+def on_member_added(sender, instance, created, **kwargs):
+    invalidate([instance.user_id])
+    if created:
+        _count_membership(instance, 1)
+
+
+@receiver(post_delete, sender=UserBankAccount)
+def on_member_removed(sender, instance, **kwargs):
+    invalidate([instance.user_id])
+    _count_membership(instance, -1)
+
+
+@receiver(pre_save, sender=BankAccount)
+def on_account_saving(sender, instance, update_fields=None, **kwargs):
+    # Status stored before this save, compared by on_account_saved
+    instance._stored_status = None
+    if instance.pk is not None and (update_fields is None or 'status' in update_fields):
+        instance._stored_status = (
+            BankAccount.objects.filter(pk=instance.pk).values_list('status', flat=True).first()
+        )
+
+
+@receiver(post_save, sender=BankAccount)
+def on_account_saved(sender, instance, created, update_fields=None, **kwargs):
+    """
+    Every status change goes through here: the members' cached indexes are dropped and
+    their counters move when the account starts or stops being counted (e.g. closed).
+    """
+    # New accounts have no members yet; balance-only saves don't change the index
+    if created or (update_fields is not None and 'status' not in update_fields):
+        return
+    invalidate_accounts([instance.pk])
+
+    counted = instance.status in COUNTED_STATUSES
+    if instance._stored_status is None or counted == (instance._stored_status in COUNTED_STATUSES):
+        return
+    delta = 1 if counted else -1
+    UserAccountCounters.add(
+        instance.users.values_list('user_id', flat=True),
+        accounts=delta,
+        savings_accounts=delta if hasattr(instance, 'saving_account') else 0
+    )
@@ -0,0 +1,227 @@
+import pytest
+from django.core.cache import cache
+from django.db import transaction as db_transaction
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from core.config import AppConfig
+from users.models import User
+from .membership import get_membership
+from .models import BankAccount, PaymentSystemCounter, UserBankAccount, UserAccountCounters, account_numbers
+from .validators import is_valid_account_number, legacy_last_numbers
+
+
+@pytest.fixture
+def user(db):
+    account_numbers.clear()
+    cache.clear()
+    legacy_last_numbers.cache_clear()
+    yield User.objects.create_user(
+        email="owner@example.com",
+        password="testpass123",
+        phone="+70000000020",
+        first_name="Foo",
+        last_name="Bar",
+    )
+    account_numbers.clear()
+
+
+def test_account_numbers_come_from_a_reserved_block(user, monkeypatch, django_assert_num_queries):
+    monkeypatch.setattr(account_numbers, "block_size", 3)
+
+    with TestCase.captureOnCommitCallbacks(execute=True):
+        first = BankAccount.objects.create(owner=user, payment_system="VISA")
+    # The rest of the block is served from memory: only the account itself is inserted
+    with django_assert_num_queries(1):
+        second = BankAccount.objects.create(owner=user, payment_system="VISA")
+    third = BankAccount.objects.create(owner=user, payment_system="VISA")
+    fourth = BankAccount.objects.create(owner=user, payment_system="VISA")
+
+    assert [a.account_number for a in (first, second, third, fourth)] == [
+        "4000000000000010", "4000000000000028", "4000000000000036", "4000000000000044",
+    ]
+    assert PaymentSystemCounter.objects.get(payment_system="VISA").last_number == 6
+
+
+def test_block_reserved_in_a_rolled_back_transaction_is_not_kept(user):
+    with pytest.raises(RuntimeError), db_transaction.atomic():
+        BankAccount.objects.create(owner=user, payment_system="MC")
+        raise RuntimeError
+
+    account = BankAccount.objects.create(owner=user, payment_system="MC")
+    assert account.account_number == "5000000000000017"
+
+
+def test_malformed_account_numbers_are_rejected_without_queries(user, django_assert_num_queries):
+    account = BankAccount.objects.create(owner=user, payment_system="MIR")
+    typo = account.account_number[:-1] + str((int(account.account_number[-1]) + 1) % 10)
+    client = APIClient()
+    client.force_authenticate(user)
+
+    assert is_valid_account_number(account.account_number)
+    legacy_last_numbers()
+    with django_assert_num_queries(0):
+        assert client.get(reverse("account-detail", args=[typo])).status_code == 404
+        response = client.post(reverse("money-transactions-preview"), {
+            "sender_account": typo,
+            "receiver_account": typo,
+            "amount": "10.00",
+        })
+    assert response.status_code == 400
+    assert set(response.data) == {"sender_account", "receiver_account"}
+
+
+def test_accounts_opened_before_check_digits_keep_their_numbers(user):
+    PaymentSystemCounter.objects.create(payment_system="VISA", last_number=12, legacy_last_number=12)
+    legacy = BankAccount(owner=user, payment_system="VISA", account_number="4000000000000012", balance=500)
+    legacy.save()
+    UserBankAccount.objects.create(user=user, bank_account=legacy)
+    account = BankAccount.objects.create(owner=user, payment_system="VISA")
+    UserBankAccount.objects.create(user=user, bank_account=account)
+    client = APIClient()
+    client.force_authenticate(user)
+
+    assert account.account_number == "4000000000000135"
+    assert not is_valid_account_number("4000000000000013")
+    assert client.get(reverse("account-detail", args=[legacy.account_number])).status_code == 200
+    response = client.post(reverse("scheduled-transfer-create"), {
+        "sender_account": legacy.account_number,
+        "receiver_account": account.account_number,
+        "amount": "10.00",
+        "frequency": "once",
+        "start_date": timezone.localdate().isoformat(),
+    })
+    assert response.status_code == 201, response.data
+
+
+def test_account_list_and_detail_take_a_fixed_number_of_queries(user, django_assert_num_queries):
+    co_owners = [
+        User.objects.create_user(email=f"co{i}@example.com", password="testpass123", phone=f"+7000000003{i}",
+                                 first_name="Co", last_name="Owner")
+        for i in range(3)
+    ]
+    for _ in range(AppConfig.MAX_ACCOUNTS_PER_USER):
+        account = BankAccount.objects.create(owner=user)
+        UserBankAccount.objects.bulk_create([
+            UserBankAccount(user=member, bank_account=account) for member in [user, *co_owners]
+        ])
+    client = APIClient()
+    client.force_authenticate(user)
+
+    # Accounts with their owners, then every membership with its user
+    with django_assert_num_queries(2):
+        response = client.get(reverse("account-list"))
+    assert len(response.data) == AppConfig.MAX_ACCOUNTS_PER_USER
+    assert all(len(item["users"]) == 4 for item in response.data)
+
+    with django_assert_num_queries(2):
+        response = client.get(reverse("account-detail", args=[account.account_number]))
+    assert len(response.data["users"]) == 4
+
+
+def test_membership_index_is_cached_and_invalidated(user, django_assert_num_queries, monkeypatch):
+    # The in-process test cache stands in for a shared one
+    monkeypatch.setattr("bank_accounts.membership.cache_is_shared", lambda: True)
+    co_owner = User.objects.create_user(email="co@example.com", password="testpass123", phone="+70000000040",
+                                        first_name="Co", last_name="Owner")
+    account = BankAccount.objects.create(owner=user)
+    UserBankAccount.objects.create(user=user, bank_account=account)
+    membership = UserBankAccount.objects.create(user=co_owner, bank_account=account)
+
+    assert get_membership(co_owner).get(account.account_number).role == "member"
+    with django_assert_num_queries(0):
+        assert get_membership(co_owner).get(account.account_number).status == "active"
+
+    account.close_account()
+    assert get_membership(co_owner).get(account.account_number).status == "closed"
+
+    membership.delete()
+    assert account.account_number not in get_membership(co_owner)
+    assert get_membership(user).get(account.account_number).role == "owner"
+
+
+def test_access_checks_skip_a_cache_other_workers_cannot_invalidate(user):
+    co_owner = User.objects.create_user(email="co@example.com", password="testpass123", phone="+70000000041",
+                                        first_name="Co", last_name="Owner")
+    account = BankAccount.objects.create(owner=user)
+    UserBankAccount.objects.create(user=user, bank_account=account)
+    membership = UserBankAccount.objects.create(user=co_owner, bank_account=account)
+    assert account.account_number in get_membership(co_owner)
+    cache_key = f"bank_accounts:membership:{co_owner.pk}"
+    assert cache.get(cache_key) is None
+
+    # Removed through another worker, whose invalidation never reaches this process
+    membership.delete()
+    cache.set(cache_key, [(account.pk, account.account_number, user.pk, account.status)])
+
+    assert account.account_number not in get_membership(co_owner)
+
+    client = APIClient()
+    client.force_authenticate(co_owner)
+    response = client.get(reverse("account-number-scheduled-transfers", args=[account.account_number]))
+    assert response.status_code == 404
+    response = client.post(reverse("scheduled-transfer-create"), {
+        "sender_account": account.account_number,
+        "receiver_account": BankAccount.objects.create(owner=user).account_number,
+        "amount": "10.00",
+        "frequency": "once",
+        "start_date": timezone.localdate().isoformat(),
+    })
+    assert set(response.data) == {"sender_account"}
+
+
+def test_account_counters_follow_memberships_and_enforce_the_limit(user, monkeypatch):
+    monkeypatch.setattr("core.config.AppConfig.MAX_ACCOUNTS_PER_USER", 3)
+    co_owner = User.objects.create_user(email="co@example.com", password="testpass123", phone="+70000000050",
+                                        first_name="Co", last_name="Owner")
+    client = APIClient()
+    client.force_authenticate(user)
+
+    assert client.post(reverse("account-create"), {"currency": "RUB"}).status_code == 201
+    response = client.post(reverse("savings-account-create"), {
+        "currency": "RUB", "goal_name": "Car", "goal_amount": "1000", "interest_period": "monthly",
+    })
+    assert response.status_code == 201
+    shared = BankAccount.objects.create(owner=user)
+    UserBankAccount.objects.create(user=user, bank_account=shared)
+    UserBankAccount.objects.create(user=co_owner, bank_account=shared)
+
+    counters = UserAccountCounters.objects.get(user=user)
+    assert (counters.accounts, counters.savings_accounts) == (3, 1)
+    assert client.post(reverse("account-create"), {"currency": "RUB"}).status_code == 400
+
+    shared.close_account()
+    UserBankAccount.objects.filter(user=co_owner).delete()
+    counters.refresh_from_db()
+    assert (counters.accounts, counters.savings_accounts) == (2, 1)
+    assert UserAccountCounters.objects.get(user=co_owner).accounts == 0
+
+
+def test_account_counters_follow_every_status_change(user, client):
+    admin = User.objects.create_superuser(email="admin@example.com", password="testpass123", phone="+70000000060",
+                                          first_name="Ad", last_name="Min")
+    open_account, closed_account = BankAccount.objects.create(owner=user), BankAccount.objects.create(owner=user)
+    for account in (open_account, closed_account):
+        UserBankAccount.objects.create(user=user, bank_account=account)
+    closed_account.close_account()
+    counters = UserAccountCounters.objects.get(user=user)
+    assert counters.accounts == 1
+
+    client.force_login(admin)
+    client.post(reverse("admin:bank_accounts_bankaccount_changelist"), {
+        "action": "freeze_accounts",
+        "_selected_action": [open_account.pk, closed_account.pk],
+    })
+    closed_account.refresh_from_db()
+    assert closed_account.status == "closed"
+    assert BankAccount.objects.get(pk=open_account.pk).status == "frozen"
+    counters.refresh_from_db()
+    assert counters.accounts == 1
+
+    # A status saved outside close_account is counted too
+    closed_account.status = "active"
+    closed_account.save()
+    counters.refresh_from_db()
+    assert counters.accounts == 2
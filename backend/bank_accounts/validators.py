@@ -0,0 +1,81 @@
+from functools import cache
+
+from rest_framework import serializers
+
+ACCOUNT_NUMBER_LENGTH = 16
+
+
+def luhn_check_digit(payload: str) -> str:
+    """Check digit that makes `payload` followed by it pass the Luhn checksum."""
+    total = 0
+    for position, digit in enumerate(reversed(payload)):
+        value = int(digit)
+        if position % 2 == 0:
+            value *= 2
+            if value > 9:
+                value -= 9
+        total += value
+    return str(-total % 10)
+
+
+@cache
+def legacy_last_numbers() -> dict[str, int]:
+    """
+    Highest number issued without a check digit, per payment system prefix. Fixed since
+    check digits were introduced, so it is read once per process.
+    """
+    from .models import BankAccount, PaymentSystemCounter
+
+    return {
+        BankAccount.PREFIXES[payment_system]: last_number
+        for payment_system, last_number in PaymentSystemCounter.objects
+        .filter(legacy_last_number__gt=0)
+        .values_list('payment_system', 'legacy_last_number')
+    }
+
+
+def is_valid_account_number(value) -> bool:
+    """
+    Whether `value` is well-formed: 16 digits, a known payment system prefix and a valid
+    Luhn check digit. Needs no database access, so typos are rejected before any lookup.
+
+    Accounts opened before check digits were introduced keep their `prefix + zero-padded
+    counter` number. Their counters are at most the prefix's legacy last number, while new
+    numbers carry a counter above it followed by the check digit, so the two ranges never
+    overlap and a number without a valid check digit is accepted only within the legacy range.
+    """
+    from .models import BankAccount
+
+    if not (
+        isinstance(value, str)
+        and len(value) == ACCOUNT_NUMBER_LENGTH
+        and value.isascii()
+        and value.isdigit()
+    ):
+        return False
+
+    prefix = next((p for p in BankAccount.PREFIXES.values() if value.startswith(p)), None)
+    if prefix is None:
+        return False
+    if luhn_check_digit(value[:-1]) == value[-1]:
+        return True
+    return int(value[len(prefix):]) <= legacy_last_numbers().get(prefix, 0)
+
+
+def validate_account_number(value):
+    if not is_valid_account_number(value):
+        raise serializers.ValidationError("Invalid account number.")
+    return value
+
+
+class AccountNumberConverter:
+    """Path converter matching only well-formed account numbers, anything else is a 404."""
+    regex = f"[0-9]{{{ACCOUNT_NUMBER_LENGTH}}}"
+
+    def to_python(self, value):
+        if not is_valid_account_number(value):
+            raise ValueError("Invalid account number")
+        return value
+
+    def to_url(self, value):
+        return value
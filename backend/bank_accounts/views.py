@@ -4,6 +4,7 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.exceptions import ValidationError, NotFound
 from django.db import IntegrityError
+from django.db import transaction as db_transaction
 
 from backend.utils import get_user_active_accounts_count
 from core.config import AppConfig
@@ -37,18 +38,19 @@ class BankAccountCreateView(generics.CreateAPIView):
     def perform_create(self, serializer):
         user = self.request.user
 
-        active_accounts_count, _ = get_user_active_accounts_count(user)
-        if active_accounts_count >= AppConfig.MAX_ACCOUNTS_PER_USER:
-            raise ValidationError(
-                {"error": f"You cannot have more than {AppConfig.MAX_ACCOUNTS_PER_USER} active or frozen bank accounts"}, # noqa
-                code=status.HTTP_400_BAD_REQUEST
-            )
+        with db_transaction.atomic():
+            active_accounts_count, _ = get_user_active_accounts_count(user, lock=True)
+            if active_accounts_count >= AppConfig.MAX_ACCOUNTS_PER_USER:
+                raise ValidationError(
+                    {"error": f"You cannot have more than {AppConfig.MAX_ACCOUNTS_PER_USER} active or frozen bank accounts"}, # noqa
+                    code=status.HTTP_400_BAD_REQUEST
+                )
 
-        bank_account = serializer.save(owner=user)
-        UserBankAccount.objects.create(
-            user=user,
-            bank_account=bank_account
-        )
+            bank_account = serializer.save(owner=user)
+            UserBankAccount.objects.create(
+                user=user,
+                bank_account=bank_account
+            )
 
 
 class UserBankAccountsListView(generics.ListAPIView):
@@ -60,11 +62,11 @@ class UserBankAccountsListView(generics.ListAPIView):
     serializer_class = BankAccountSerializer
 
     def get_queryset(self):
-        return BankAccount.objects.filter(
+        return BankAccountSerializer.prefetch(BankAccount.objects.filter(
             users__user=self.request.user,
             status__in=['active', 'frozen'],
             saving_account__isnull=True
-        )
+        ))
 
 
 class BankAccountDetailView(generics.RetrieveAPIView):
@@ -81,14 +83,11 @@ class BankAccountDetailView(generics.RetrieveAPIView):
 
     def get(self, request, account_number):
         try:
-            requested_account = BankAccount.objects.get(account_number=account_number)
+            requested_account = BankAccountSerializer.prefetch(BankAccount.objects).get(account_number=account_number)
         except BankAccount.DoesNotExist:
             raise NotFound({"detail": "Bank account not found."})
 
-        is_user_member = BankAccount.objects.filter(
-            pk=requested_account.pk,
-            users__user=request.user
-        ).exists()
+        is_user_member = any(member.user_id == request.user.pk for member in requested_account.users.all())
 
         if is_user_member:
             serializer = BankAccountSerializer(requested_account)
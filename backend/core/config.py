@@ -12,10 +12,29 @@ class AppConfig:
 
     # Bank Account
     MAX_ACCOUNTS_PER_USER = int(os.getenv('MAX_ACCOUNTS_PER_USER', 5))
+    # Account numbers reserved per payment system at once by each process
+    ACCOUNT_NUMBER_BLOCK_SIZE = int(os.getenv('ACCOUNT_NUMBER_BLOCK_SIZE', 100))
+    MEMBERSHIP_CACHE_SECONDS = int(os.getenv('MEMBERSHIP_CACHE_SECONDS', 300))
 
     # Transaction
     CURRENCY_API_URL = os.getenv("CURRENCY_API")
 
+    # Achievements
+    ACHIEVEMENT_EVENTS_BATCH_SIZE = int(os.getenv("ACHIEVEMENT_EVENTS_BATCH_SIZE", 500))
+    ACHIEVEMENT_AWARDED_CACHE_SIZE = int(os.getenv("ACHIEVEMENT_AWARDED_CACHE_SIZE", 10000))
+
+    # Scheduled transfers
+    SCHEDULED_TRANSFERS_BATCH_SIZE = int(os.getenv("SCHEDULED_TRANSFERS_BATCH_SIZE", 100))
+    SCHEDULED_TRANSFERS_LEASE_SECONDS = int(os.getenv("SCHEDULED_TRANSFERS_LEASE_SECONDS", 300))
+    SCHEDULER_POLL_SECONDS = int(os.getenv("SCHEDULER_POLL_SECONDS", 60))
+    # What to do with occurrences missed while the processor was down: all, latest or skip
+    SCHEDULED_TRANSFERS_CATCH_UP = os.getenv("SCHEDULED_TRANSFERS_CATCH_UP", "all")
+    # Failed occurrences are retried with exponential backoff: base, 2 * base, 4 * base...
+    SCHEDULED_TRANSFERS_RETRY_BASE_SECONDS = int(os.getenv("SCHEDULED_TRANSFERS_RETRY_BASE_SECONDS", 3600))
+    SCHEDULED_TRANSFERS_RETRY_MAX_ATTEMPTS = int(os.getenv("SCHEDULED_TRANSFERS_RETRY_MAX_ATTEMPTS", 5))
+    BALANCE_FORECAST_MAX_DAYS = int(os.getenv("BALANCE_FORECAST_MAX_DAYS", 365))
+    UPCOMING_OCCURRENCES_DAYS = int(os.getenv("UPCOMING_OCCURRENCES_DAYS", 90))
+
     # Savings Account
     MAX_SAVINGS_ACCOUNTS_PER_USER = int(os.getenv("MAX_SAVINGS_ACCOUNTS_PER_USER"))
     MAXIMUM_ACCRUAL_BALANCE = Decimal(os.getenv("MAXIMUM_ACCRUAL_BALANCE"))
@@ -23,3 +42,7 @@ class AppConfig:
         'monthly': Decimal(os.getenv("INTEREST_RATES_MONTHLY")),
         'yearly': Decimal(os.getenv("INTEREST_RATES_YEARLY")),
     }
+    INTEREST_ACCRUAL_CHUNK_SIZE = int(os.getenv("INTEREST_ACCRUAL_CHUNK_SIZE", 500))
+    # Balance interest is paid on: "min" or "average" of the daily closing balances
+    SAVINGS_INTEREST_BASE = os.getenv("SAVINGS_INTEREST_BASE", "min")
+    SAVINGS_SIMULATION_MAX_MONTHS = int(os.getenv("SAVINGS_SIMULATION_MAX_MONTHS", 360))
@@ -0,0 +1,201 @@
+import logging
+from datetime import date
+from decimal import Decimal
+
+from django.db import models
+from django.db import transaction as db_transaction
+from django.db.models import Avg, Case, F, OuterRef, Subquery, Value, When
+from django.db.models.functions import Coalesce, Least
+from django.utils import timezone
+
+from bank_accounts.models import BankAccount
+from core.config import AppConfig
+from .models import SavingsAccount, InterestAccrual, InterestAccrualRun, SavingsBalanceSnapshot, period_interest
+
+logger = logging.getLogger(__name__)
+
+
+def due_accounts(today: date):
+    """Savings accounts due by `today`, overdue ones included."""
+    return SavingsAccount.objects.filter(
+        next_interest_date__lte=today,
+        bank_account__status__in=['active', 'frozen']
+    )
+
+
+def _with_interest_base(accounts):
+    """
+    Annotates the balance interest is paid on: the running minimum kept by the daily
+    snapshot job, or with SAVINGS_INTEREST_BASE = 'average' the average closing balance
+    of the snapshots since the previous accrual (the minimum when there are none).
+
+    The running minimum is folded in at snapshot time only, so the current balance is part
+    of it too: money withdrawn since the last snapshot earns nothing.
+    """
+    if AppConfig.SAVINGS_INTEREST_BASE != 'average':
+        maximum = Value(AppConfig.MAXIMUM_ACCRUAL_BALANCE, output_field=models.DecimalField())
+        return accounts.annotate(base=Least(F('min_balance'), F('bank_account__balance'), maximum))
+
+    last_accrual = (InterestAccrual.objects
+                    .filter(savings_account=OuterRef('pk'))
+                    .order_by('-accrual_date')
+                    .values('accrual_date')[:1])
+    average = (SavingsBalanceSnapshot.objects
+               .filter(savings_account=OuterRef('pk'),
+                       date__gte=Coalesce(OuterRef('last_accrual'), Value(date.min)),
+                       date__lt=OuterRef('next_interest_date'))
+               .values('savings_account')
+               .annotate(average=Avg('closing_balance'))
+               .values('average'))
+
+    return (accounts
+            .annotate(last_accrual=Subquery(last_accrual))
+            .annotate(base=Coalesce(Subquery(average, output_field=models.DecimalField()), F('min_balance'),
+                                    output_field=models.DecimalField())))
+
+
+def _accrue_round(today: date, ids: list[int]) -> tuple[int, int, Decimal]:
+    """
+    Accrues one period for the accounts of `ids` that are still due.
+
+    The interest base of every locked row is read in one query (see `_with_interest_base`)
+    and paid through `period_interest`; balances are then raised with one UPDATE, ledger
+    rows are inserted with one bulk_create and the savings accounts are moved to their
+    next accrual date with one bulk_update. An account still waiting for its first deposit
+    opened the period empty: it only gets its minimal balance fixed and starts earning
+    from the next period once it holds money (as with take_snapshots).
+
+    Returns:
+        tuple[int, int, Decimal]: Number of accounts moved, accruals paid, total interest paid
+    """
+    accounts = list(
+        _with_interest_base(due_accounts(today).filter(pk__in=ids))
+        .select_related('bank_account')
+        .select_for_update(of=('self', 'bank_account'))
+    )
+    if not accounts:
+        return 0, 0, Decimal('0')
+
+    accruals = []
+    for account in accounts:
+        bank_account = account.bank_account
+        if account.is_first_deposit:
+            account.min_balance = min(bank_account.balance, AppConfig.MAXIMUM_ACCRUAL_BALANCE)
+            account.is_first_deposit = bank_account.balance <= 0
+        else:
+            interest = period_interest(account.base, account.interest_rate)
+            accruals.append(InterestAccrual(
+                savings_account=account,
+                accrual_date=account.next_interest_date,
+                base_amount=min(account.base, AppConfig.MAXIMUM_ACCRUAL_BALANCE).quantize(Decimal('0.01')),
+                interest_rate=account.interest_rate,
+                amount=interest,
+            ))
+            bank_account.balance += interest
+            account.min_balance = min(bank_account.balance, AppConfig.MAXIMUM_ACCRUAL_BALANCE)
+        account.next_interest_date = account.calculate_next_interest_date(from_date=account.next_interest_date)
+
+    if accruals:
+        BankAccount.objects.filter(pk__in=[a.savings_account_id for a in accruals]).update(
+            balance=Case(
+                *[When(pk=a.savings_account_id, then=F('balance') + a.amount) for a in accruals],
+                output_field=models.DecimalField()
+            )
+        )
+        InterestAccrual.objects.bulk_create(accruals)
+        SavingsAccount.refresh_goal_progress([a.savings_account_id for a in accruals])
+    SavingsAccount.objects.bulk_update(accounts, ['min_balance', 'is_first_deposit', 'next_interest_date'])
+
+    return len(accounts), len(accruals), sum((a.amount for a in accruals), Decimal('0'))
+
+
+def accrue_chunk(today: date, ids: list[int]) -> tuple[int, Decimal]:
+    """
+    Accrues interest for one chunk of savings accounts.
+
+    An overdue account is caught up one missed period per round, each period paying
+    interest on the minimal balance left by the previous one, until none of the chunk
+    is due any more. Must be called inside an atomic block.
+
+    Returns:
+        tuple[int, Decimal]: Number of accruals paid, total interest paid
+    """
+    paid, total = 0, Decimal('0')
+    while True:
+        moved, accruals, interest = _accrue_round(today, ids)
+        if not moved:
+            return paid, total
+        paid += accruals
+        total += interest
+
+
+def accrue_each(today: date, ids: list[int]) -> tuple[int, Decimal, int]:
+    """
+    Accrues interest for the accounts of `ids` one by one, each in its own savepoint,
+    so an account that fails is rolled back, logged and skipped without holding up
+    the others. Must be called inside an atomic block.
+
+    Returns:
+        tuple[int, Decimal, int]: Number of accruals paid, total interest paid, accounts skipped
+    """
+    paid, total, failed = 0, Decimal('0'), 0
+    for pk in ids:
+        try:
+            with db_transaction.atomic():
+                accruals, interest = accrue_chunk(today, [pk])
+        except Exception:
+            logger.exception("Savings account %s: interest accrual failed, skipped", pk)
+            failed += 1
+            continue
+        paid += accruals
+        total += interest
+    return paid, total, failed
+
+
+def accrue_interest(today: date, chunk_size: int) -> InterestAccrualRun:
+    """
+    Accrues interest for every savings account due by today, `chunk_size` accounts
+    per committed transaction, so locks are held only for the duration of a chunk.
+
+    A chunk is accrued in one savepoint; if it fails, its accounts are accrued again
+    one by one (see accrue_each) and the ones that still fail are skipped until the
+    next run. The run of the day is checkpointed after every chunk, past the skipped
+    accounts; calling this again after a crash resumes after the last committed chunk.
+    """
+    run, _ = InterestAccrualRun.objects.get_or_create(run_date=today)
+    if run.status == 'completed':
+        return run
+
+    while True:
+        ids = list(
+            due_accounts(today)
+            .filter(pk__gt=run.last_account_id)
+            .order_by('pk')
+            .values_list('pk', flat=True)[:chunk_size]
+        )
+        if not ids:
+            break
+
+        with db_transaction.atomic():
+            try:
+                with db_transaction.atomic():
+                    paid, interest = accrue_chunk(today, ids)
+                failed = 0
+            except Exception:
+                paid, interest, failed = accrue_each(today, ids)
+            run.last_account_id = ids[-1]
+            run.accruals_paid += paid
+            run.total_interest += interest
+            run.accounts_failed += failed
+            run.save(update_fields=[
+                'last_account_id',
+                'accruals_paid',
+                'total_interest',
+                'accounts_failed',
+                'updated_at',
+            ])
+
+    run.status = 'completed'
+    run.finished_at = timezone.now()
+    run.save(update_fields=['status', 'finished_at', 'updated_at'])
+    return run
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class SavingsAccountsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'savings_accounts'
+
+    def ready(self):
+        from . import signals
@@ -0,0 +1,33 @@
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from savings_accounts.snapshots import take_snapshots
+
+
+class Command(BaseCommand):
+    help = "Records the end-of-day balances of savings accounts, by default for yesterday"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--date',
+            type=date.fromisoformat,
+            default=None,
+            help="Day the balances close, YYYY-MM-DD",
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help="Number of snapshots inserted per statement",
+        )
+
+    def handle(self, *args, **options):
+        day = options['date'] or timezone.localdate() - timedelta(days=1)
+        self.stdout.write(self.style.SUCCESS(f"[{timezone.now()}] Taking savings balance snapshots for {day}..."))
+
+        count = take_snapshots(day, options['chunk_size'])
+
+        self.stdout.write(f"Snapshotted {count} savings accounts.")
+        self.stdout.write(self.style.SUCCESS(f"[{timezone.now()}] Savings balance snapshots completed."))
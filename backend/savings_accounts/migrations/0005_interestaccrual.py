@@ -0,0 +1,30 @@
+# Generated by Django 5.1.7 on 2026-10-19 16:32
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('savings_accounts', '0004_alter_savingsaccount_interest_period'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InterestAccrual',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('accrual_date', models.DateField()),
+                ('base_amount', models.DecimalField(decimal_places=2, max_digits=15)),
+                ('interest_rate', models.DecimalField(decimal_places=3, max_digits=5)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=15)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('savings_account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='accruals', to='savings_accounts.savingsaccount')),
+            ],
+            options={
+                'db_table': 'savings_interest_accruals',
+                'ordering': ['-accrual_date'],
+            },
+        ),
+    ]
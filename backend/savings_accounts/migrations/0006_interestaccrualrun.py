@@ -0,0 +1,35 @@
+# Generated by Django 5.1.7 on 2026-10-19 16:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('savings_accounts', '0005_interestaccrual'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InterestAccrualRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('run_date', models.DateField(unique=True)),
+                ('status', models.CharField(choices=[('running', 'Running'), ('completed', 'Completed')], default='running', max_length=10)),
+                ('last_account_id', models.PositiveIntegerField(default=0)),
+                ('accruals_paid', models.PositiveIntegerField(default=0)),
+                ('total_interest', models.DecimalField(decimal_places=2, default=0, max_digits=15)),
+                ('started_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'savings_interest_accrual_runs',
+                'ordering': ['-run_date'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='interestaccrual',
+            constraint=models.UniqueConstraint(fields=('savings_account', 'accrual_date'), name='unique_interest_accrual'),
+        ),
+    ]
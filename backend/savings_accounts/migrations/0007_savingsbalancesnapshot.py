@@ -0,0 +1,28 @@
+# Generated by Django 5.1.7 on 2026-10-19 16:36
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('savings_accounts', '0006_interestaccrualrun'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SavingsBalanceSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('closing_balance', models.DecimalField(decimal_places=2, max_digits=15)),
+                ('savings_account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='balance_snapshots', to='savings_accounts.savingsaccount')),
+            ],
+            options={
+                'db_table': 'savings_balance_snapshots',
+                'ordering': ['-date'],
+                'constraints': [models.UniqueConstraint(fields=('savings_account', 'date'), name='unique_savings_balance_snapshot')],
+            },
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.1.7 on 2026-10-19 16:40
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import F, Case, When, Value, OuterRef, Subquery
+from django.db.models.functions import Least, Greatest
+
+
+def seed_goal_progress(apps, schema_editor):
+    BankAccount = apps.get_model('bank_accounts', 'BankAccount')
+    SavingsAccount = apps.get_model('savings_accounts', 'SavingsAccount')
+
+    balance = BankAccount.objects.filter(pk=OuterRef('pk')).values('balance')[:1]
+    SavingsAccount.objects.update(goal_progress=Case(
+        When(goal_amount__gt=0, then=Least(
+            Greatest(Subquery(balance) / F('goal_amount'), Value(Decimal('0'))),
+            Value(Decimal('1')),
+        )),
+        default=Value(Decimal('1')),
+        output_field=models.DecimalField(max_digits=5, decimal_places=4),
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('savings_accounts', '0007_savingsbalancesnapshot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='savingsaccount',
+            name='goal_progress',
+            field=models.DecimalField(db_index=True, decimal_places=4, default=0, max_digits=5),
+        ),
+        migrations.RunPython(seed_goal_progress, migrations.RunPython.noop),
+    ]
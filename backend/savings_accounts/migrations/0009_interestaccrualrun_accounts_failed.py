@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-19 17:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('savings_accounts', '0008_savingsaccount_goal_progress'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='interestaccrualrun',
+            name='accounts_failed',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
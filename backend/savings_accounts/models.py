@@ -4,12 +4,56 @@ from decimal import Decimal
 from datetime import date
 
 from django.db import models
-from django.db import transaction as db_transaction
+from django.db.models import F, Case, When, Value, OuterRef, Subquery
+from django.db.models.functions import Least, Greatest
 
 from bank_accounts.models import BankAccount
 from core.config import AppConfig
 
 
+def next_interest_date(creation_date, interest_period, from_date):
+    """
+    Accrual date following `from_date`: a month (or a year) later, on the day of month
+    the account was opened, clamped to the length of the month.
+    """
+    creation_day = creation_date.day
+
+    if interest_period == 'monthly':
+        year = from_date.year
+        month = from_date.month + 1
+        if month > 12:
+            month = 1
+            year += 1
+
+        last_day_of_month = calendar.monthrange(year, month)[1]
+        day = min(creation_day, last_day_of_month)
+        return date(year, month, day)
+    else:
+        year = from_date.year + 1
+        month = creation_date.month
+
+        last_day_of_month = calendar.monthrange(year, month)[1]
+        day = min(creation_day, last_day_of_month)
+        return date(year, month, day)
+
+
+def goal_progress(balance, goal_amount) -> Decimal:
+    """Share of `goal_amount` covered by `balance`, between 0 and 1."""
+    balance, goal_amount = Decimal(balance), Decimal(goal_amount)
+    if goal_amount <= 0:
+        return Decimal('1')
+    return min(max(balance / goal_amount, Decimal('0')), Decimal('1')).quantize(Decimal('0.0001'))
+
+
+def period_interest(min_balance, interest_rate) -> Decimal:
+    """
+    Interest of one accrual period: its minimal balance, capped by MAXIMUM_ACCRUAL_BALANCE,
+    times the rate. A period that opened with an empty account has a minimum of 0 and pays
+    nothing, money deposited during it earns from the next period.
+    """
+    return (min(Decimal(min_balance), AppConfig.MAXIMUM_ACCRUAL_BALANCE) * interest_rate).quantize(Decimal('0.01'))
+
+
 class SavingsAccount(models.Model):
     INTEREST_PERIOD_CHOICES = [
         ('monthly', 'Ежемесячно'),
@@ -46,6 +90,13 @@ class SavingsAccount(models.Model):
         blank=True,
     )
     is_first_deposit = models.BooleanField(default=True)
+    # Share of goal_amount already saved, capped at 1; kept in sync by refresh_goal_progress
+    goal_progress = models.DecimalField(
+        max_digits=5,
+        decimal_places=4,
+        default=0,
+        db_index=True,
+    )
 
     class Meta:
         db_table = 'savings_accounts'
@@ -62,49 +113,106 @@ class SavingsAccount(models.Model):
 
     def save(self, *args, **kwargs):
         self.interest_rate = AppConfig.INTEREST_RATES[self.interest_period]
+        self.goal_progress = goal_progress(self.bank_account.balance, self.goal_amount)
 
         if not self.pk:
             self.next_interest_date = self.calculate_next_interest_date(from_date=date.today())
 
         super().save(*args, **kwargs)
 
+    @classmethod
+    def refresh_goal_progress(cls, bank_account_ids) -> int:
+        """
+        Recomputes goal_progress of the savings accounts among `bank_account_ids`
+        from their current balance, with one UPDATE. Ids of regular accounts are ignored.
+        """
+        balance = BankAccount.objects.filter(pk=OuterRef('pk')).values('balance')[:1]
+        return cls.objects.filter(pk__in=bank_account_ids).update(goal_progress=Case(
+            When(goal_amount__gt=0, then=Least(
+                Greatest(Subquery(balance) / F('goal_amount'), Value(Decimal('0'))),
+                Value(Decimal('1')),
+            )),
+            default=Value(Decimal('1')),
+            output_field=models.DecimalField(max_digits=5, decimal_places=4),
+        ))
+
     def calculate_next_interest_date(self, from_date):
-        creation_date = self.bank_account.created_at.date()
-        creation_day = creation_date.day
-
-        if self.interest_period == 'monthly':
-            year = from_date.year
-            month = from_date.month + 1
-            if month > 12:
-                month = 1
-                year += 1
-
-            last_day_of_month = calendar.monthrange(year, month)[1]
-            day = min(creation_day, last_day_of_month)
-            return date(year, month, day)
-        else:
-            year = from_date.year + 1
-            month = creation_date.month
-
-            last_day_of_month = calendar.monthrange(year, month)[1]
-            day = min(creation_day, last_day_of_month)
-            return date(year, month, day)
-
-    def calculate_interest(self):
-        with db_transaction.atomic():
-            if self.is_first_deposit:
-                self.next_interest_date = self.calculate_next_interest_date(from_date=date.today())
-                self.min_balance = self.bank_account.balance
-                self.save()
-
-                return Decimal('0')
-
-            interest = min(self.min_balance, AppConfig.MAXIMUM_ACCRUAL_BALANCE) * self.interest_rate
-            self.bank_account.balance += interest
-            self.bank_account.save()
-
-            self.min_balance = min(self.bank_account.balance, AppConfig.MAXIMUM_ACCRUAL_BALANCE)
-            self.next_interest_date = self.calculate_next_interest_date(from_date=date.today())
-            self.save()
+        return next_interest_date(self.bank_account.created_at.date(), self.interest_period, from_date)
+
+
+class InterestAccrual(models.Model):
+    """Ledger row of interest paid to a savings account on one accrual date."""
+    savings_account = models.ForeignKey(
+        SavingsAccount,
+        on_delete=models.CASCADE,
+        related_name='accruals'
+    )
+    accrual_date = models.DateField()
+    base_amount = models.DecimalField(max_digits=15, decimal_places=2)
+    interest_rate = models.DecimalField(max_digits=5, decimal_places=3)
+    amount = models.DecimalField(max_digits=15, decimal_places=2)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'savings_interest_accruals'
+        ordering = ['-accrual_date']
+        constraints = [
+            # Hard guard against paying the same accrual date twice
+            models.UniqueConstraint(fields=['savings_account', 'accrual_date'], name='unique_interest_accrual'),
+        ]
+
+    def __str__(self):
+        return f"Interest {self.amount} on {self.accrual_date} for savings account {self.savings_account_id}"
+
+
+class InterestAccrualRun(models.Model):
+    """
+    Progress of the daily interest accrual.
+
+    Accounts are accrued in ascending id order and `last_account_id` is moved in the
+    same transaction as each chunk, so a run that stopped halfway resumes after the
+    last committed chunk instead of starting over. Accounts whose accrual failed are
+    skipped and counted in `accounts_failed`; they stay due for the next run.
+    """
+    STATUS_CHOICES = [
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+    ]
+
+    run_date = models.DateField(unique=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='running')
+    last_account_id = models.PositiveIntegerField(default=0)
+    accruals_paid = models.PositiveIntegerField(default=0)
+    total_interest = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+    accounts_failed = models.PositiveIntegerField(default=0)
+    started_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'savings_interest_accrual_runs'
+        ordering = ['-run_date']
 
-        return interest
+    def __str__(self):
+        return f"Interest accrual run {self.run_date}: {self.status}"
+
+
+class SavingsBalanceSnapshot(models.Model):
+    """Closing balance of a savings account at the end of a day."""
+    savings_account = models.ForeignKey(
+        SavingsAccount,
+        on_delete=models.CASCADE,
+        related_name='balance_snapshots'
+    )
+    date = models.DateField()
+    closing_balance = models.DecimalField(max_digits=15, decimal_places=2)
+
+    class Meta:
+        db_table = 'savings_balance_snapshots'
+        ordering = ['-date']
+        constraints = [
+            models.UniqueConstraint(fields=['savings_account', 'date'], name='unique_savings_balance_snapshot'),
+        ]
+
+    def __str__(self):
+        return f"Savings account {self.savings_account_id} closed {self.date} with {self.closing_balance}"
@@ -1,7 +1,11 @@
+from decimal import Decimal
+
 from rest_framework import serializers
 
 from .models import SavingsAccount
 from bank_accounts.serializers import BankAccountSerializer
+from bank_accounts.validators import validate_account_number
+from core.config import AppConfig
 
 
 class SavingsAccountSerializer(serializers.ModelSerializer):
@@ -17,5 +21,72 @@ class SavingsAccountSerializer(serializers.ModelSerializer):
             'interest_rate',
             'interest_period',
             'next_interest_date',
+            'goal_progress',
         ]
-        read_only_fields = ['interest_rate', 'next_interest_date', 'min_balance']
+        read_only_fields = ['interest_rate', 'next_interest_date', 'min_balance', 'goal_progress']
+
+
+class SavingsListQuerySerializer(serializers.Serializer):
+    ordering = serializers.ChoiceField(choices=['goal_progress', '-goal_progress'], required=False)
+    min_progress = serializers.DecimalField(max_digits=5, decimal_places=4, min_value=Decimal('0'),
+                                            max_value=Decimal('1'), required=False)
+    max_progress = serializers.DecimalField(max_digits=5, decimal_places=4, min_value=Decimal('0'),
+                                            max_value=Decimal('1'), required=False)
+
+
+class GoalProgressSummarySerializer(serializers.Serializer):
+    accounts = serializers.IntegerField()
+    goals_reached = serializers.IntegerField()
+    average_progress = serializers.DecimalField(max_digits=5, decimal_places=4)
+
+
+class PlannedDepositSerializer(serializers.Serializer):
+    date = serializers.DateField()
+    amount = serializers.DecimalField(max_digits=15, decimal_places=2, min_value=Decimal('0.01'))
+
+
+class SavingsSimulationSerializer(serializers.Serializer):
+    """
+    Input of the savings simulator: either an existing account to start from or an
+    initial balance, the horizon and the planned deposits.
+    """
+    account_number = serializers.CharField(required=False, validators=[validate_account_number])
+    initial_balance = serializers.DecimalField(max_digits=15, decimal_places=2, min_value=Decimal('0'),
+                                               required=False)
+    horizon_months = serializers.IntegerField(min_value=1)
+    monthly_deposit = serializers.DecimalField(max_digits=15, decimal_places=2, min_value=Decimal('0'),
+                                               default=Decimal('0'))
+    deposit_day = serializers.IntegerField(min_value=1, max_value=31, required=False)
+    deposits = PlannedDepositSerializer(many=True, default=list)
+    interest_periods = serializers.ListField(
+        child=serializers.ChoiceField(choices=SavingsAccount.INTEREST_PERIOD_CHOICES),
+        allow_empty=False,
+        required=False,
+    )
+
+    def validate_horizon_months(self, value):
+        if value > AppConfig.SAVINGS_SIMULATION_MAX_MONTHS:
+            raise serializers.ValidationError(
+                f"The horizon cannot exceed {AppConfig.SAVINGS_SIMULATION_MAX_MONTHS} months"
+            )
+        return value
+
+    def validate(self, data):
+        if ('account_number' in data) == ('initial_balance' in data):
+            raise serializers.ValidationError("Specify either account_number or initial_balance")
+        return data
+
+
+class SimulatedAccrualSerializer(serializers.Serializer):
+    date = serializers.DateField()
+    balance = serializers.DecimalField(max_digits=15, decimal_places=2)
+    interest = serializers.DecimalField(max_digits=15, decimal_places=2)
+
+
+class SavingsScenarioSerializer(serializers.Serializer):
+    interest_period = serializers.CharField()
+    interest_rate = serializers.DecimalField(max_digits=5, decimal_places=3)
+    final_balance = serializers.DecimalField(max_digits=15, decimal_places=2)
+    total_interest = serializers.DecimalField(max_digits=15, decimal_places=2)
+    total_deposits = serializers.DecimalField(max_digits=15, decimal_places=2)
+    accruals = SimulatedAccrualSerializer(many=True)
@@ -0,0 +1,18 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from bank_accounts.models import UserAccountCounters
+from transactions.signals import balances_changed
+from .models import SavingsAccount
+
+
+@receiver(balances_changed)
+def on_balances_changed(sender, account_ids, **kwargs):
+    SavingsAccount.refresh_goal_progress(account_ids)
+
+
+@receiver(post_save, sender=SavingsAccount)
+def on_savings_account_created(sender, instance, created, **kwargs):
+    account = instance.bank_account
+    if created and account.status in ('active', 'frozen'):
+        UserAccountCounters.add(account.users.values_list('user_id', flat=True), savings_accounts=1)
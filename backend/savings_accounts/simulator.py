@@ -0,0 +1,109 @@
+import calendar
+from bisect import bisect_right
+from datetime import date
+from decimal import Decimal
+from itertools import accumulate
+
+from core.config import AppConfig
+from .models import next_interest_date, period_interest
+
+
+def add_months(day: date, months: int) -> date:
+    month_index = day.month - 1 + months
+    year, month = day.year + month_index // 12, month_index % 12 + 1
+    return date(year, month, min(day.day, calendar.monthrange(year, month)[1]))
+
+
+def planned_deposits(today: date, until: date, monthly_deposit: Decimal, deposit_day: int,
+                     deposits: list[tuple[date, Decimal]]) -> list[tuple[date, Decimal]]:
+    """Every planned deposit after today up to `until`, in date order."""
+    planned = [(day, amount) for day, amount in deposits if today < day <= until]
+
+    if monthly_deposit:
+        months = 0
+        while True:
+            anchor = add_months(today, months)
+            day = date(anchor.year, anchor.month, min(deposit_day, calendar.monthrange(anchor.year, anchor.month)[1]))
+            if day > until:
+                break
+            if day > today:
+                planned.append((day, monthly_deposit))
+            months += 1
+
+    return sorted(planned)
+
+
+def simulate(interest_period: str, today: date, until: date, balance: Decimal, min_balance: Decimal,
+             creation_date: date, first_accrual: date | None, deposits: list[tuple[date, Decimal]]) -> dict:
+    """
+    Projects a savings account under one interest period without touching the database.
+
+    Accrual dates come from the same date logic as SavingsAccount.calculate_next_interest_date
+    and interest follows accrual._accrue_round through `period_interest`: `min_balance` is
+    the minimum of the current period, 0 when it opened with an empty account. Deposits
+    only raise the balance, so every later period's minimum is the balance it started
+    with; deposits are summed per period from prefix sums, which keeps the cost at one
+    step per accrual date.
+    """
+    rate = AppConfig.INTEREST_RATES[interest_period]
+    cap = AppConfig.MAXIMUM_ACCRUAL_BALANCE
+    dates = [day for day, _ in deposits]
+    totals = list(accumulate((amount for _, amount in deposits), initial=Decimal('0')))
+
+    accrual = first_accrual or next_interest_date(creation_date, interest_period, today)
+    applied = 0
+    total_interest = Decimal('0')
+    points = []
+
+    while accrual <= until:
+        upto = bisect_right(dates, accrual)
+        balance += totals[upto] - totals[applied]
+        applied = upto
+
+        interest = period_interest(min_balance, rate)
+        balance += interest
+        total_interest += interest
+        min_balance = min(balance, cap)
+
+        points.append({'date': accrual, 'balance': balance, 'interest': interest})
+        accrual = next_interest_date(creation_date, interest_period, accrual)
+
+    balance += totals[-1] - totals[applied]
+
+    return {
+        'interest_period': interest_period,
+        'interest_rate': rate,
+        'final_balance': balance,
+        'total_interest': total_interest,
+        'total_deposits': totals[-1],
+        'accruals': points,
+    }
+
+
+def simulate_scenarios(today: date, horizon_months: int, monthly_deposit: Decimal, deposit_day: int | None,
+                       deposits: list[tuple[date, Decimal]], interest_periods: list[str],
+                       savings=None, initial_balance: Decimal = Decimal('0')) -> list[dict]:
+    """
+    Runs the simulation once per interest period, starting from the current state of
+    `savings` or from a new account opened today with `initial_balance`.
+    """
+    until = add_months(today, horizon_months)
+    planned = planned_deposits(today, until, monthly_deposit, deposit_day or today.day, deposits)
+
+    scenarios = []
+    for interest_period in interest_periods:
+        if savings is None:
+            scenarios.append(simulate(
+                interest_period, today, until, initial_balance, initial_balance,
+                creation_date=today, first_accrual=None, deposits=planned,
+            ))
+        else:
+            same_period = interest_period == savings.interest_period
+            scenarios.append(simulate(
+                interest_period, today, until, savings.bank_account.balance,
+                Decimal('0') if savings.is_first_deposit else savings.min_balance,
+                creation_date=savings.bank_account.created_at.date(),
+                first_accrual=savings.next_interest_date if same_period else None,
+                deposits=planned,
+            ))
+    return scenarios
@@ -0,0 +1,50 @@
+from datetime import date
+
+from django.db import models
+from django.db import transaction as db_transaction
+from django.db.models import F, OuterRef, Subquery, Value
+from django.db.models.functions import Least
+
+from bank_accounts.models import BankAccount
+from core.config import AppConfig
+from .models import SavingsAccount, SavingsBalanceSnapshot
+
+
+def take_snapshots(day: date, chunk_size: int) -> int:
+    """
+    Records the closing balance of every open savings account for `day`.
+
+    Snapshots are inserted in bulk, `chunk_size` rows per statement; running the job
+    twice for a day keeps the first snapshot. The running minimal balance the interest
+    is based on is then folded with two set-based UPDATEs: an account that got its
+    first deposit starts its minimum at the current balance (capped by
+    MAXIMUM_ACCRUAL_BALANCE), the others keep the lower of the two.
+
+    Returns:
+        int: Number of savings accounts snapshotted
+    """
+    accounts = SavingsAccount.objects.filter(bank_account__status__in=['active', 'frozen'])
+    rows = accounts.order_by('pk').values_list('pk', 'bank_account__balance').iterator(chunk_size=chunk_size)
+
+    count = 0
+    batch = []
+    for pk, balance in rows:
+        batch.append(SavingsBalanceSnapshot(savings_account_id=pk, date=day, closing_balance=balance))
+        if len(batch) >= chunk_size:
+            SavingsBalanceSnapshot.objects.bulk_create(batch, ignore_conflicts=True)
+            count += len(batch)
+            batch = []
+    SavingsBalanceSnapshot.objects.bulk_create(batch, ignore_conflicts=True)
+    count += len(batch)
+
+    balance = Subquery(BankAccount.objects.filter(pk=OuterRef('pk')).values('balance')[:1])
+    maximum = Value(AppConfig.MAXIMUM_ACCRUAL_BALANCE, output_field=models.DecimalField())
+
+    with db_transaction.atomic():
+        accounts.filter(is_first_deposit=False).update(min_balance=Least(F('min_balance'), balance))
+        accounts.filter(is_first_deposit=True, bank_account__balance__gt=0).update(
+            min_balance=Least(balance, maximum),
+            is_first_deposit=False
+        )
+
+    return count
@@ -1,3 +1,317 @@
-from django.test import TestCase
+from datetime import date, timedelta
+from decimal import Decimal
+from io import StringIO
 
-# Create your tests here.
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from bank_accounts.models import BankAccount, UserBankAccount
+from transactions.models import Transaction
+from users.models import User
+from . import accrual
+from .accrual import accrue_interest
+from .models import SavingsAccount, InterestAccrual, InterestAccrualRun, SavingsBalanceSnapshot
+from .simulator import simulate_scenarios
+
+
+@pytest.fixture
+def user(db):
+    return User.objects.create_user(
+        email="saver@example.com",
+        password="testpass123",
+        phone="+70000000010",
+        first_name="Foo",
+        last_name="Bar",
+    )
+
+
+def create_savings(user: User, balance: str, min_balance: str, first_deposit: bool = False,
+                   next_interest_date=None) -> SavingsAccount:
+    account = BankAccount.objects.create(owner=user, currency="RUB", balance=Decimal(balance))
+    UserBankAccount.objects.create(user=user, bank_account=account)
+    savings = SavingsAccount.create(
+        bank_account=account,
+        goal_name="Goal",
+        goal_amount=Decimal("100000"),
+        interest_period="monthly",
+    )
+    SavingsAccount.objects.filter(pk=savings.pk).update(
+        next_interest_date=next_interest_date or timezone.localdate(),
+        min_balance=Decimal(min_balance),
+        is_first_deposit=first_deposit,
+    )
+    savings.refresh_from_db()
+    return savings
+
+
+def test_interest_is_accrued_for_all_due_accounts(user):
+    today = timezone.localdate()
+    regular = create_savings(user, "5000.00", "1000.00")
+    capped = create_savings(user, "2000000.00", "2000000.00")
+    first = create_savings(user, "300.00", "0", first_deposit=True)
+
+    out = StringIO()
+    call_command("process_savings_interest", chunk_size=2, stdout=out)
+    assert "Interest accrued 2 times, 10010.00 in total." in out.getvalue()
+
+    for savings in (regular, capped, first):
+        savings.refresh_from_db()
+        savings.bank_account.refresh_from_db()
+        assert savings.next_interest_date == savings.calculate_next_interest_date(from_date=today)
+
+    assert regular.bank_account.balance == Decimal("5010.00")
+    assert regular.min_balance == Decimal("5010.00")
+    assert capped.bank_account.balance == Decimal("2010000.00")
+    assert capped.min_balance == Decimal("1000000.00")
+    assert first.bank_account.balance == Decimal("300.00")
+    assert first.min_balance == Decimal("300.00")
+
+    assert sorted(InterestAccrual.objects.values_list("amount", flat=True)) == [Decimal("10.00"), Decimal("10000.00")]
+
+    call_command("process_savings_interest", stdout=StringIO())
+    assert InterestAccrual.objects.count() == 2
+
+
+def test_accrual_chunk_runs_a_fixed_number_of_queries(user, django_assert_num_queries):
+    for _ in range(5):
+        create_savings(user, "5000.00", "1000.00")
+
+    with django_assert_num_queries(18):
+        run = accrue_interest(timezone.localdate(), 100)
+    assert (run.accruals_paid, run.total_interest) == (5, Decimal("50.00"))
+
+
+def test_interrupted_run_resumes_after_last_chunk(user, monkeypatch):
+    today = timezone.localdate()
+    accounts = [create_savings(user, "5000.00", "1000.00") for _ in range(4)]
+
+    accrue_chunk = accrual.accrue_chunk
+    calls = []
+
+    def crash_on_second_chunk(*args):
+        calls.append(args)
+        if len(calls) == 2:
+            raise SystemExit("worker died")
+        return accrue_chunk(*args)
+
+    monkeypatch.setattr(accrual, "accrue_chunk", crash_on_second_chunk)
+    with pytest.raises(SystemExit):
+        accrue_interest(today, 2)
+    monkeypatch.setattr(accrual, "accrue_chunk", accrue_chunk)
+
+    run = InterestAccrualRun.objects.get(run_date=today)
+    assert (run.status, run.last_account_id, run.accruals_paid) == ("running", accounts[1].pk, 2)
+
+    out = StringIO()
+    call_command("process_savings_interest", chunk_size=2, stdout=out)
+    assert f"Resuming the interrupted run after account {accounts[1].pk}." in out.getvalue()
+
+    run.refresh_from_db()
+    assert (run.status, run.accruals_paid, run.total_interest) == ("completed", 4, Decimal("40.00"))
+    assert InterestAccrual.objects.count() == 4
+    for account in accounts:
+        account.bank_account.refresh_from_db()
+        assert account.bank_account.balance == Decimal("5010.00")
+
+
+def test_money_withdrawn_after_the_last_snapshot_earns_nothing(user):
+    today = timezone.localdate()
+    savings = create_savings(user, "5000.00", "1000.00")
+    call_command("snapshot_savings_balances", stdout=StringIO())
+    BankAccount.objects.filter(pk=savings.pk).update(balance=Decimal("200.00"))
+
+    run = accrue_interest(today, 100)
+
+    assert (run.accruals_paid, run.total_interest) == (1, Decimal("2.00"))
+    accrual = InterestAccrual.objects.get(savings_account=savings)
+    assert accrual.base_amount == Decimal("200.00")
+
+
+def test_first_deposit_earns_from_the_next_period_without_snapshots(user):
+    today = timezone.localdate()
+    savings = create_savings(user, "5000.00", "0.00", first_deposit=True)
+    empty = create_savings(user, "0.00", "0.00", first_deposit=True)
+
+    assert accrue_interest(today, 100).accruals_paid == 0
+    savings.refresh_from_db()
+    empty.refresh_from_db()
+    assert (savings.min_balance, savings.is_first_deposit) == (Decimal("5000.00"), False)
+    assert empty.is_first_deposit is True
+
+    run = accrue_interest(savings.next_interest_date, 100)
+    assert (run.accruals_paid, run.total_interest) == (1, Decimal("50.00"))
+
+
+def test_failing_account_is_skipped_and_checkpointed(user, monkeypatch):
+    today = timezone.localdate()
+    accounts = [create_savings(user, "5000.00", "1000.00") for _ in range(3)]
+    broken = accounts[1]
+
+    accrue_round = accrual._accrue_round
+
+    def fail_after_accruing_broken(*args):
+        result = accrue_round(*args)
+        if broken.pk in args[1]:
+            raise RuntimeError("corrupt row")
+        return result
+
+    monkeypatch.setattr(accrual, "_accrue_round", fail_after_accruing_broken)
+    run = accrue_interest(today, 10)
+
+    assert (run.status, run.last_account_id) == ("completed", accounts[2].pk)
+    assert (run.accruals_paid, run.total_interest, run.accounts_failed) == (2, Decimal("20.00"), 1)
+    assert not InterestAccrual.objects.filter(savings_account=broken).exists()
+    broken.bank_account.refresh_from_db()
+    assert broken.bank_account.balance == Decimal("5000.00")
+    for account in (accounts[0], accounts[2]):
+        account.bank_account.refresh_from_db()
+        assert account.bank_account.balance == Decimal("5010.00")
+
+
+def test_overdue_account_is_caught_up_once_per_missed_period(user):
+    today = timezone.localdate()
+    overdue = create_savings(user, "5000.00", "1000.00", next_interest_date=today - timedelta(days=40))
+
+    accrue_interest(today, 100)
+
+    overdue.refresh_from_db()
+    dates = list(InterestAccrual.objects.order_by("accrual_date").values_list("accrual_date", flat=True))
+    assert dates[0] == today - timedelta(days=40)
+    assert len(dates) == len(set(dates)) >= 2
+    assert dates[-1] <= today < overdue.next_interest_date
+
+
+def test_snapshots_fold_the_daily_minimum(user):
+    yesterday = timezone.localdate() - timedelta(days=1)
+    regular = create_savings(user, "800.00", "1000.00")
+    first = create_savings(user, "300.00", "0", first_deposit=True)
+    empty = create_savings(user, "0", "0", first_deposit=True)
+
+    call_command("snapshot_savings_balances", stdout=StringIO())
+    BankAccount.objects.filter(pk=regular.pk).update(balance=Decimal("500.00"))
+    call_command("snapshot_savings_balances", stdout=StringIO())
+
+    snapshots = SavingsBalanceSnapshot.objects.filter(date=yesterday)
+    assert dict(snapshots.values_list("savings_account", "closing_balance")) == {
+        regular.pk: Decimal("800.00"),
+        first.pk: Decimal("300.00"),
+        empty.pk: Decimal("0.00"),
+    }
+
+    for savings in (regular, first, empty):
+        savings.refresh_from_db()
+    assert (regular.min_balance, regular.is_first_deposit) == (Decimal("500.00"), False)
+    assert (first.min_balance, first.is_first_deposit) == (Decimal("300.00"), False)
+    assert empty.is_first_deposit is True
+
+
+def test_interest_on_average_daily_balance(user, monkeypatch):
+    monkeypatch.setattr("core.config.AppConfig.SAVINGS_INTEREST_BASE", "average")
+    today = timezone.localdate()
+    savings = create_savings(user, "5000.00", "1000.00")
+    SavingsBalanceSnapshot.objects.bulk_create([
+        SavingsBalanceSnapshot(savings_account=savings, date=today - timedelta(days=days), closing_balance=balance)
+        for days, balance in ((2, Decimal("1000")), (1, Decimal("3000")))
+    ])
+
+    accrue_interest(today, 100)
+
+    accrual = InterestAccrual.objects.get()
+    assert (accrual.base_amount, accrual.amount) == (Decimal("2000.00"), Decimal("20.00"))
+
+
+def test_simulation_follows_accrual_dates_and_deposits():
+    monthly, yearly = simulate_scenarios(
+        today=date(2026, 1, 31),
+        horizon_months=3,
+        monthly_deposit=Decimal("100"),
+        deposit_day=31,
+        deposits=[],
+        interest_periods=["monthly", "yearly"],
+        initial_balance=Decimal("1000"),
+    )
+
+    # The initial balance earns from the first period, 1% of each period's minimum
+    assert [(p["date"], p["balance"], p["interest"]) for p in monthly["accruals"]] == [
+        (date(2026, 2, 28), Decimal("1110.00"), Decimal("10.00")),
+        (date(2026, 3, 31), Decimal("1221.10"), Decimal("11.10")),
+        (date(2026, 4, 30), Decimal("1333.31"), Decimal("12.21")),
+    ]
+    assert (monthly["total_interest"], monthly["total_deposits"]) == (Decimal("33.31"), Decimal("300"))
+    assert (yearly["final_balance"], yearly["accruals"]) == (Decimal("1300"), [])
+
+    # An account opened empty earns nothing on the deposits of its first period
+    [empty] = simulate_scenarios(
+        today=date(2026, 1, 31),
+        horizon_months=2,
+        monthly_deposit=Decimal("100"),
+        deposit_day=15,
+        deposits=[],
+        interest_periods=["monthly"],
+    )
+    assert [p["interest"] for p in empty["accruals"]] == [Decimal("0.00"), Decimal("1.00")]
+
+
+def test_simulation_endpoint_starts_from_the_users_account(user):
+    savings = create_savings(user, "5000.00", "5000.00", next_interest_date=timezone.localdate() + timedelta(days=1))
+    client = APIClient()
+    client.force_authenticate(user)
+
+    response = client.post(reverse("savings-simulate"), {
+        "account_number": savings.bank_account.account_number,
+        "horizon_months": 1,
+        "interest_periods": ["monthly"],
+    }, format="json")
+
+    assert response.status_code == 200
+    [scenario] = response.data
+    assert scenario["accruals"][0]["interest"] == "50.00"
+    assert Decimal(scenario["final_balance"]) >= Decimal("5050.00")
+
+    response = client.post(reverse("savings-simulate"), {"horizon_months": 12}, format="json")
+    assert response.status_code == 400
+
+
+def test_goal_progress_follows_the_balance(user):
+    savings = create_savings(user, "25000.00", "0")
+    assert savings.goal_progress == Decimal("0.2500")
+
+    other = BankAccount.objects.create(owner=user, currency="RUB", balance=Decimal("200000"))
+    Transaction.create_transaction(other, savings.bank_account, Decimal("50000"))
+    Transaction.create_transactions(other, [(savings.bank_account, Decimal("50000"), "")])
+
+    savings.refresh_from_db()
+    assert savings.goal_progress == Decimal("1.0000")
+
+
+def test_regular_transfers_leave_savings_accounts_alone(user):
+    create_savings(user, "25000.00", "0")
+    sender = BankAccount.objects.create(owner=user, currency="RUB", balance=Decimal("1000"))
+    receiver = BankAccount.objects.create(owner=user, currency="RUB")
+
+    with CaptureQueriesContext(connection) as queries:
+        Transaction.create_transaction(sender, receiver, Decimal("100"))
+        Transaction.create_transactions(sender, [(receiver, Decimal("100"), "")])
+
+    assert not [q for q in queries.captured_queries if "savings_accounts" in q["sql"] and "UPDATE" in q["sql"]]
+
+
+def test_savings_list_is_sorted_and_filtered_by_goal_progress(user):
+    low = create_savings(user, "10000.00", "0")
+    high = create_savings(user, "90000.00", "0")
+    create_savings(user, "0.00", "0")
+    client = APIClient()
+    client.force_authenticate(user)
+
+    response = client.get(reverse("savings-account-list"), {"ordering": "-goal_progress", "min_progress": "0.05"})
+    assert [item["bank_account"]["account_number"] for item in response.data] == [
+        high.bank_account.account_number, low.bank_account.account_number,
+    ]
+
+    response = client.get(reverse("savings-goal-progress"))
+    assert response.data == {"accounts": 3, "goals_reached": 0, "average_progress": "0.3333"}
@@ -3,12 +3,18 @@ from .views import (
     UserSavingsAccountsListView,
     SavingsAccountCreateView,
     SavingsAccountCloseView,
-    SavingsAccountDetailView
+    SavingsAccountDetailView,
+    SavingsSimulationView,
+    SavingsGoalProgressView
 )
 
 urlpatterns = [
     path('savings/', UserSavingsAccountsListView.as_view(), name='savings-account-list'),
     path('savings/create/', SavingsAccountCreateView.as_view(), name='savings-account-create'),
-    path('savings/<str:account_number>/', SavingsAccountDetailView.as_view(), name='savings-account-detail'),
-    path('savings/<str:account_number>/close', SavingsAccountCloseView.as_view(), name='savings-account-close'),
+    path('savings/goal-progress/', SavingsGoalProgressView.as_view(), name='savings-goal-progress'),
+    path('savings/simulate/', SavingsSimulationView.as_view(), name='savings-simulate'),
+    path('savings/<account_number:account_number>/', SavingsAccountDetailView.as_view(), name='savings-account-detail'),
+    path('savings/<account_number:account_number>/close',
+         SavingsAccountCloseView.as_view(),
+         name='savings-account-close'),
 ]
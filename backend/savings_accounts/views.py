@@ -1,15 +1,26 @@
 from datetime import date
+from decimal import Decimal
 
 from rest_framework import generics, status, permissions
 from rest_framework.response import Response
-from rest_framework.exceptions import ValidationError
+from rest_framework.exceptions import ValidationError, NotFound
+from rest_framework.views import APIView
 from django.db import transaction as db_transaction
-from django.db.models import Prefetch
+from django.db.models import Count, Avg, Q, Value, DecimalField
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 
 from backend.utils import get_user_active_accounts_count
 from core.config import AppConfig
 from .models import SavingsAccount
-from .serializers import SavingsAccountSerializer
+from .serializers import (
+    SavingsAccountSerializer,
+    SavingsListQuerySerializer,
+    GoalProgressSummarySerializer,
+    SavingsSimulationSerializer,
+    SavingsScenarioSerializer,
+)
+from .simulator import simulate_scenarios
 from bank_accounts.models import UserBankAccount
 from bank_accounts.serializers import BankAccountSerializer
 
@@ -25,7 +36,9 @@ class SavingsAccountCreateView(generics.CreateAPIView):
     def create(self, request, *args, **kwargs):
         try:
             with db_transaction.atomic():
-                active_accounts_count, active_savings_accounts_counts = get_user_active_accounts_count(request.user)
+                active_accounts_count, active_savings_accounts_counts = get_user_active_accounts_count(
+                    request.user, lock=True
+                )
                 if active_accounts_count >= AppConfig.MAX_ACCOUNTS_PER_USER:
                     raise ValidationError(
                         {"detail": f"You cannot have more than {AppConfig.MAX_ACCOUNTS_PER_USER} active or frozen bank accounts"}, # noqa
@@ -132,9 +145,77 @@ class UserSavingsAccountsListView(generics.ListAPIView):
     serializer_class = SavingsAccountSerializer
 
     def get_queryset(self):
-        return SavingsAccount.objects.filter(
+        query = SavingsListQuerySerializer(data=self.request.query_params)
+        query.is_valid(raise_exception=True)
+        params = query.validated_data
+
+        queryset = SavingsAccount.objects.filter(
             bank_account__owner=self.request.user,
             bank_account__status__in=['active', 'frozen']
-        ).select_related('bank_account').prefetch_related(
-            Prefetch('bank_account__users', queryset=UserBankAccount.objects.select_related('user'))
+        ).select_related('bank_account')
+        queryset = BankAccountSerializer.prefetch(queryset, prefix='bank_account__')
+
+        if 'min_progress' in params:
+            queryset = queryset.filter(goal_progress__gte=params['min_progress'])
+        if 'max_progress' in params:
+            queryset = queryset.filter(goal_progress__lte=params['max_progress'])
+        if 'ordering' in params:
+            queryset = queryset.order_by(params['ordering'], 'pk')
+        return queryset
+
+
+class SavingsGoalProgressView(APIView):
+    """
+    API view summarizing the progress of the user's active and frozen savings accounts
+    towards their goals, aggregated over the stored goal_progress.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        summary = SavingsAccount.objects.filter(
+            bank_account__owner=request.user,
+            bank_account__status__in=['active', 'frozen']
+        ).aggregate(
+            accounts=Count('pk'),
+            goals_reached=Count('pk', filter=Q(goal_progress__gte=1)),
+            average_progress=Coalesce(Avg('goal_progress'), Value(Decimal('0')),
+                                      output_field=DecimalField(max_digits=5, decimal_places=4)),
+        )
+        return Response(GoalProgressSummarySerializer(summary).data)
+
+
+class SavingsSimulationView(APIView):
+    """
+    API view projecting a savings account over ?horizon_months with planned deposits,
+    once per interest period, so the outcome of monthly and yearly accrual can be compared.
+    Starts from one of the user's savings accounts or from a new account with initial_balance.
+    Nothing is written to the database.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        serializer = SavingsSimulationSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        savings = None
+        if 'account_number' in data:
+            try:
+                savings = SavingsAccount.objects.select_related('bank_account').get(
+                    bank_account__owner=request.user,
+                    bank_account__account_number=data['account_number']
+                )
+            except SavingsAccount.DoesNotExist:
+                raise NotFound({"detail": "Savings account not found."})
+
+        scenarios = simulate_scenarios(
+            today=timezone.localdate(),
+            horizon_months=data['horizon_months'],
+            monthly_deposit=data['monthly_deposit'],
+            deposit_day=data.get('deposit_day'),
+            deposits=[(deposit['date'], deposit['amount']) for deposit in data['deposits']],
+            interest_periods=data.get('interest_periods') or dict(SavingsAccount.INTEREST_PERIOD_CHOICES),
+            savings=savings,
+            initial_balance=data.get('initial_balance', Decimal('0')),
         )
+        return Response(SavingsScenarioSerializer(scenarios, many=True).data)
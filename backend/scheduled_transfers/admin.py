@@ -1,6 +1,7 @@
 from datetime import date
 from django.contrib import admin
-from .models import ScheduledTransfers
+from django.utils import timezone
+from .models import ScheduledTransfers, ScheduledTransferRun, ScheduledTransferRetry, UpcomingOccurrence
 from admin_logs.mixins import LoggingMixin
 
 
@@ -12,11 +13,12 @@ class ScheduledTransfersAdmin(LoggingMixin, admin.ModelAdmin):
         "receiver_account",
         "amount",
         "frequency",
+        "status",
         "next_occurrence_date",
         "start_date",
         "end_date",
     )
-    list_filter = ("frequency", "sender_account__currency")
+    list_filter = ("frequency", "status", "sender_account__currency")
     search_fields = (
         "sender_account__account_number",
         "sender_account__owner__first_name",
@@ -29,18 +31,41 @@ class ScheduledTransfersAdmin(LoggingMixin, admin.ModelAdmin):
         "description",
     )
     autocomplete_fields = ("sender_account", "receiver_account")
-    actions = ["run_today"]
+    actions = ["run_today", "pause", "resume"]
 
     def has_add_permission(self, request):
         return False
 
     @admin.action(description="Complete selected translations today")
     def run_today(self, request, queryset):
-        updated = queryset.update(next_occurrence_date=date.today())
+        # update() neither bumps auto_now nor sends post_save: the scheduler signature
+        # and the calendar have to follow by hand
+        updated = queryset.update(next_occurrence_date=date.today(), updated_at=timezone.now())
+        UpcomingOccurrence.regenerate(list(queryset))
         self.message_user(request, f"Updated {updated} schedules.")
         for obj in queryset:
             self.log_action(request, obj, action="run_today", details={"schedule_id": obj.pk})
 
+    @admin.action(description="Pause selected translations")
+    def pause(self, request, queryset):
+        self._set_status(request, queryset.filter(status='active'), 'paused')
+
+    @admin.action(description="Resume selected translations")
+    def resume(self, request, queryset):
+        self._set_status(request, queryset.filter(status='paused'), 'active')
+
+    def _set_status(self, request, queryset, status):
+        schedules = list(queryset)
+        updated = queryset.update(status=status, updated_at=timezone.now())
+        for obj in schedules:
+            obj.status = status
+        UpcomingOccurrence.regenerate(schedules)
+        if status != 'active':
+            ScheduledTransferRetry.cancel_pending([obj.pk for obj in schedules])
+        self.message_user(request, f"Updated {updated} schedules.")
+        for obj in schedules:
+            self.log_action(request, obj, action="update", details={"status": status})
+
     def save_model(self, request, obj, form, change):
         super().save_model(request, obj, form, change)
         action = 'update' if change else 'create'
@@ -49,3 +74,65 @@ class ScheduledTransfersAdmin(LoggingMixin, admin.ModelAdmin):
     def delete_model(self, request, obj):
         super().delete_model(request, obj)
         self.log_action(request, obj, 'delete')
+
+
+@admin.register(ScheduledTransferRun)
+class ScheduledTransferRunAdmin(admin.ModelAdmin):
+    list_display = (
+        "scheduled_transfer_id",
+        "sender_account",
+        "occurrence_date",
+        "run_date",
+        "amount",
+        "status",
+        "duration_ms",
+    )
+    list_filter = ("status", "run_date")
+    search_fields = ("scheduled_transfer_id", "sender_account__account_number", "error")
+    readonly_fields = (
+        "scheduled_transfer_id",
+        "sender_account",
+        "transaction",
+        "run_date",
+        "occurrence_date",
+        "amount",
+        "status",
+        "error",
+        "duration_ms",
+        "created_at",
+    )
+
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(ScheduledTransferRetry)
+class ScheduledTransferRetryAdmin(admin.ModelAdmin):
+    list_display = (
+        "scheduled_transfer_id",
+        "sender_account",
+        "receiver_account",
+        "amount",
+        "occurrence_date",
+        "attempts",
+        "next_attempt_at",
+        "status",
+    )
+    list_filter = ("status",)
+    search_fields = ("scheduled_transfer_id", "sender_account__account_number", "receiver_account__account_number")
+    readonly_fields = (
+        "scheduled_transfer_id",
+        "sender_account",
+        "receiver_account",
+        "amount",
+        "description",
+        "occurrence_date",
+        "attempts",
+        "status",
+        "last_error",
+        "created_at",
+        "updated_at",
+    )
+
+    def has_add_permission(self, request):
+        return False
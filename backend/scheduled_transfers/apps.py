@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class ScheduledTransfersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'scheduled_transfers'
+
+    def ready(self):
+        from . import signals
@@ -0,0 +1,124 @@
+from datetime import timedelta
+from decimal import Decimal
+from itertools import accumulate
+
+from django.db.models import Q
+
+from bank_accounts.models import BankAccount
+from core.config import AppConfig
+from transactions.models import Transaction
+from savings_accounts.models import period_interest
+from .models import ScheduledTransfers
+
+
+class _Rates:
+    """Conversion rates fetched at most once per currency pair; None when unavailable."""
+
+    def __init__(self):
+        self._rates = {}
+
+    def get(self, currency_from: str, currency_to: str) -> Decimal | None:
+        if currency_from == currency_to:
+            return Decimal('1')
+
+        pair = (currency_from, currency_to)
+        if pair not in self._rates:
+            try:
+                self._rates[pair] = Transaction.convert_to(currency_from, currency_to, Decimal('1'))
+            except ValueError:
+                self._rates[pair] = None
+        return self._rates[pair]
+
+
+def _apply_interest(curve: list[Decimal], saving_account, today, days: int) -> None:
+    """
+    Adds the projected interest accruals of a savings account to its balance curve.
+
+    Every accrual pays `period_interest` on the minimal balance of its period. An account
+    still waiting for its first deposit opened the current period empty, so its first
+    projected accrual pays nothing; every later period starts from the projected balance.
+    """
+    accrual_date = saving_account.next_interest_date
+    min_balance = Decimal('0') if saving_account.is_first_deposit else saving_account.min_balance
+    period_start = 0
+
+    while accrual_date is not None and (accrual_date - today).days <= days:
+        index = max(0, (accrual_date - today).days)
+        period_min = min([min_balance] + curve[period_start:index + 1])
+
+        interest = period_interest(period_min, saving_account.interest_rate)
+        for i in range(index, len(curve)):
+            curve[i] += interest
+
+        min_balance = min(curve[index], AppConfig.MAXIMUM_ACCRUAL_BALANCE)
+        period_start = index + 1
+        accrual_date = saving_account.calculate_next_interest_date(from_date=accrual_date)
+
+
+def forecast_balances(user, today, days: int) -> list[dict]:
+    """
+    Projects the daily balance of every open account of the user over the next `days` days.
+
+    Scheduled transfers (incoming and outgoing) are expanded into per-day deltas,
+    which are turned into a balance curve with a running sum; interest accruals of
+    savings accounts are then added on top. Nothing is written to the database.
+    """
+    until = today + timedelta(days=days)
+    accounts = {
+        account.pk: account
+        for account in BankAccount.objects
+        .filter(users__user=user)
+        .exclude(status='closed')
+        .select_related('saving_account')
+    }
+
+    scheduled_transfers = (
+        ScheduledTransfers.objects
+        .filter(Q(sender_account__in=accounts) | Q(receiver_account__in=accounts))
+        .filter(Q(end_date__isnull=True) | Q(end_date__gte=today), status='active', next_occurrence_date__lte=until)
+        .select_related('sender_account', 'receiver_account')
+    )
+
+    deltas = {pk: [Decimal('0')] * (days + 1) for pk in accounts}
+    unconverted = set()
+    rates = _Rates()
+
+    for scheduled_transfer in scheduled_transfers:
+        occurrences = scheduled_transfer.occurrences_between(today, until)
+        sender = scheduled_transfer.sender_account
+        receiver = scheduled_transfer.receiver_account
+
+        incoming = None
+        if receiver.pk in accounts:
+            rate = rates.get(sender.currency, receiver.currency)
+            if rate is None:
+                unconverted.add(receiver.pk)
+            else:
+                incoming = scheduled_transfer.amount * rate
+
+        for occurrence in occurrences:
+            index = (occurrence - today).days
+            if sender.pk in accounts:
+                deltas[sender.pk][index] -= scheduled_transfer.amount
+            if incoming is not None:
+                deltas[receiver.pk][index] += incoming
+
+    forecast = []
+    for pk, account in accounts.items():
+        curve = list(accumulate(deltas[pk], initial=account.balance))[1:]
+
+        if hasattr(account, 'saving_account') and account.status in ('active', 'frozen'):
+            _apply_interest(curve, account.saving_account, today, days)
+
+        forecast.append({
+            'account_number': account.account_number,
+            'currency': account.currency,
+            'balance': account.balance,
+            'complete': pk not in unconverted,
+            'days': [
+                {'date': today + timedelta(days=i), 'balance': balance.quantize(Decimal('0.01'))}
+                for i, balance in enumerate(curve)
+            ],
+        })
+
+    return forecast
@@ -1,51 +1,64 @@
 from django.core.management.base import BaseCommand
 from django.utils import timezone
-from django.db import transaction as db_transaction
-from django.db.models import Q
 
-from scheduled_transfers.models import ScheduledTransfers
+from core.config import AppConfig
+from scheduled_transfers.processing import due_transfers, due_retries, run_worker, run_workers
 
 
 class Command(BaseCommand):
-    help = 'Checks and completes scheduled bank transfers that are due. Deletes completed ones.'
+    help = 'Checks and completes scheduled bank transfers and retries that are due. Marks completed series as finished.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help="Number of worker processes sharing the due transfers",
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=AppConfig.SCHEDULED_TRANSFERS_BATCH_SIZE,
+            help="Number of transfers a worker claims at once",
+        )
+        parser.add_argument(
+            '--lease-seconds',
+            type=int,
+            default=AppConfig.SCHEDULED_TRANSFERS_LEASE_SECONDS,
+            help="How long a claimed batch stays reserved for its worker",
+        )
+        parser.add_argument(
+            '--catch-up',
+            choices=['all', 'latest', 'skip'],
+            default=AppConfig.SCHEDULED_TRANSFERS_CATCH_UP,
+            help="Which missed occurrences to execute: every one, only the latest, or none",
+        )
 
     def handle(self, *args, **options):
         self.stdout.write(self.style.SUCCESS(f"[{timezone.now()}] Starting scheduled transfers processing..."))
 
         today = timezone.localdate()
 
-        due_transfers = ScheduledTransfers.objects.filter(
-            Q(end_date__isnull=True) | Q(end_date__gte=today),
-            next_occurrence_date__lte=today,
-            start_date__lte=today
-        ).select_for_update()
-
-        if not due_transfers.exists():
+        if not due_transfers(today).exists() and not due_retries().exists():
             self.stdout.write("No scheduled transfers to process today.")
             self.stdout.write(self.style.SUCCESS(f"[{timezone.now()}] Finished processing scheduled transfers."))
             return
 
-        self.stdout.write(f"Found {due_transfers.count()} scheduled transfers due for processing.")
-
-        for scheduled_transfer in list(due_transfers):
-            pk = scheduled_transfer.pk
-            self.stdout.write(f"Attempting to process scheduled transfer ID: {pk}...")
-
-            try:
-                with db_transaction.atomic():
-                    success = scheduled_transfer.process_and_reschedule()
-
-                    if success:
-                        self.stdout.write(self.style.SUCCESS(
-                            f"Scheduled transfer ID: {pk} processed successfully."
-                        ))
-                    else:
-                        self.stdout.write(self.style.ERROR(
-                            f"Failed to process scheduled transfer ID: {pk}."
-                        ))
-            except ScheduledTransfers.DoesNotExist:
-                self.stdout.write(self.style.WARNING(
-                    f"Scheduled transfer ID: {pk} was already deleted in current operation."
-                ))
+        if options['workers'] > 1:
+            stats = run_workers(
+                today,
+                options['workers'],
+                options['batch_size'],
+                options['lease_seconds'],
+                options['catch_up']
+            )
+        else:
+            stats = run_worker(
+                today,
+                options['batch_size'],
+                options['lease_seconds'],
+                options['catch_up']
+            )
 
+        self.stdout.write(stats.summary())
         self.stdout.write(self.style.SUCCESS(f"[{timezone.now()}] Finished processing scheduled transfers."))
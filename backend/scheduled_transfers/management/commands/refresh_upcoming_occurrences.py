@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from scheduled_transfers.models import UpcomingOccurrence
+
+
+class Command(BaseCommand):
+    help = 'Moves the materialized upcoming payments calendar forward to start today.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help="Number of schedules extended per batch",
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS(f"[{timezone.now()}] Refreshing upcoming occurrences..."))
+
+        refreshed = UpcomingOccurrence.refresh_all(timezone.localdate(), options['chunk_size'])
+
+        self.stdout.write(f"Refreshed {refreshed} scheduled transfers.")
+        self.stdout.write(self.style.SUCCESS(f"[{timezone.now()}] Finished refreshing upcoming occurrences."))
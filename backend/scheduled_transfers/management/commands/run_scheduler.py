@@ -0,0 +1,56 @@
+import signal
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.config import AppConfig
+from scheduled_transfers.scheduler import Scheduler
+
+
+class Command(BaseCommand):
+    help = ('Runs scheduled transfers, savings interest accrual and achievement events as a long-running process, '
+            'as soon as they are due.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--poll-seconds',
+            type=int,
+            default=AppConfig.SCHEDULER_POLL_SECONDS,
+            help="How often schedules are checked for changes",
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=AppConfig.SCHEDULED_TRANSFERS_BATCH_SIZE,
+            help="Number of transfers claimed at once",
+        )
+        parser.add_argument(
+            '--lease-seconds',
+            type=int,
+            default=AppConfig.SCHEDULED_TRANSFERS_LEASE_SECONDS,
+            help="How long a claimed batch stays reserved",
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help="Run the jobs due now and exit",
+        )
+
+    def handle(self, *args, **options):
+        scheduler = Scheduler(
+            poll_seconds=options['poll_seconds'],
+            batch_size=options['batch_size'],
+            lease_seconds=options['lease_seconds'],
+            stdout=self.stdout
+        )
+
+        if options['once']:
+            scheduler.tick()
+            return
+
+        signal.signal(signal.SIGTERM, lambda *_: scheduler.stop())
+        signal.signal(signal.SIGINT, lambda *_: scheduler.stop())
+
+        self.stdout.write(self.style.SUCCESS(f"[{timezone.now()}] Scheduler started."))
+        scheduler.run_forever()
+        self.stdout.write(self.style.SUCCESS(f"[{timezone.now()}] Scheduler stopped."))
@@ -0,0 +1,28 @@
+# Generated by Django 5.1.7 on 2026-10-19 16:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scheduled_transfers', '0003_alter_scheduledtransfers_frequency'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scheduledtransfers',
+            name='claimed_by',
+            field=models.CharField(blank=True, default='', max_length=100),
+        ),
+        migrations.AddField(
+            model_name='scheduledtransfers',
+            name='claimed_until',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='scheduledtransfers',
+            name='last_processed_on',
+            field=models.DateField(blank=True, null=True),
+        ),
+    ]
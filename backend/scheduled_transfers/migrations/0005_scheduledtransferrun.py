@@ -0,0 +1,37 @@
+# Generated by Django 5.1.7 on 2026-10-19 16:18
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bank_accounts', '0017_alter_bankaccount_payment_system_and_more'),
+        ('scheduled_transfers', '0004_scheduledtransfers_lease'),
+        ('transactions', '0011_alter_transaction_converted_amount'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScheduledTransferRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scheduled_transfer_id', models.PositiveBigIntegerField()),
+                ('run_date', models.DateField()),
+                ('occurrence_date', models.DateField()),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=15)),
+                ('status', models.CharField(choices=[('success', 'Success'), ('failed', 'Failed')], max_length=10)),
+                ('error', models.TextField(blank=True, default='')),
+                ('duration_ms', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('sender_account', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='scheduled_transfer_runs', to='bank_accounts.bankaccount')),
+                ('transaction', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='transactions.transaction')),
+            ],
+            options={
+                'db_table': 'scheduled_transfer_runs',
+                'ordering': ['-created_at', '-id'],
+                'indexes': [models.Index(fields=['scheduled_transfer_id', 'run_date'], name='scheduled_run_transfer_idx'), models.Index(fields=['run_date', 'status'], name='scheduled_run_date_idx')],
+            },
+        ),
+    ]
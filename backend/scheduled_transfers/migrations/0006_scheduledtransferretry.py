@@ -0,0 +1,44 @@
+# Generated by Django 5.1.7 on 2026-10-19 16:24
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bank_accounts', '0017_alter_bankaccount_payment_system_and_more'),
+        ('scheduled_transfers', '0005_scheduledtransferrun'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scheduledtransferrun',
+            name='attempt',
+            field=models.PositiveSmallIntegerField(default=1),
+        ),
+        migrations.CreateModel(
+            name='ScheduledTransferRetry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=15)),
+                ('description', models.TextField(blank=True)),
+                ('occurrence_date', models.DateField()),
+                ('attempts', models.PositiveSmallIntegerField(default=1)),
+                ('next_attempt_at', models.DateTimeField()),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('succeeded', 'Succeeded'), ('exhausted', 'Exhausted'), ('cancelled', 'Cancelled')], default='pending', max_length=10)),
+                ('last_error', models.TextField(blank=True, default='')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('claimed_by', models.CharField(blank=True, default='', max_length=100)),
+                ('claimed_until', models.DateTimeField(blank=True, null=True)),
+                ('receiver_account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='bank_accounts.bankaccount')),
+                ('scheduled_transfer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='retries', to='scheduled_transfers.scheduledtransfers')),
+                ('sender_account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='scheduled_transfer_retries', to='bank_accounts.bankaccount')),
+            ],
+            options={
+                'db_table': 'scheduled_transfer_retries',
+                'indexes': [models.Index(fields=['status', 'next_attempt_at'], name='scheduled_retry_due_idx')],
+            },
+        ),
+    ]
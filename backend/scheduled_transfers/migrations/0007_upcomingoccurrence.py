@@ -0,0 +1,31 @@
+# Generated by Django 5.1.7 on 2026-10-19 16:27
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bank_accounts', '0017_alter_bankaccount_payment_system_and_more'),
+        ('scheduled_transfers', '0006_scheduledtransferretry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UpcomingOccurrence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=15)),
+                ('receiver_account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='bank_accounts.bankaccount')),
+                ('scheduled_transfer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='upcoming_occurrences', to='scheduled_transfers.scheduledtransfers')),
+                ('sender_account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='bank_accounts.bankaccount')),
+            ],
+            options={
+                'db_table': 'upcoming_occurrences',
+                'ordering': ['date', 'id'],
+                'indexes': [models.Index(fields=['sender_account', 'date'], name='upcoming_sender_date_idx'), models.Index(fields=['receiver_account', 'date'], name='upcoming_receiver_date_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.7 on 2026-10-19 16:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bank_accounts', '0017_alter_bankaccount_payment_system_and_more'),
+        ('scheduled_transfers', '0007_upcomingoccurrence'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scheduledtransfers',
+            name='status',
+            field=models.CharField(choices=[('active', 'Active'), ('paused', 'Paused'), ('finished', 'Finished')], default='active', max_length=10),
+        ),
+        migrations.AddIndex(
+            model_name='scheduledtransfers',
+            index=models.Index(condition=models.Q(('status', 'active')), fields=['next_occurrence_date'], name='scheduled_transfer_due_idx'),
+        ),
+    ]
@@ -1,13 +1,20 @@
 import calendar
+import logging
+import time
+from collections import defaultdict
 
 from django.db import models
+from django.db.models import Max
 from django.db import transaction as db_transaction
 from rest_framework.exceptions import ValidationError
 from django.utils import timezone
-from datetime import timedelta
+from datetime import date, timedelta
 
 from transactions.models import Transaction
 from bank_accounts.models import BankAccount
+from core.config import AppConfig
+
+logger = logging.getLogger(__name__)
 
 
 class ScheduledTransfers(models.Model):
@@ -20,6 +27,12 @@ class ScheduledTransfers(models.Model):
         ('annually', 'Annually'),
     ]
 
+    STATUS_CHOICES = [
+        ('active', 'Active'),
+        ('paused', 'Paused'),
+        ('finished', 'Finished'),
+    ]
+
     sender_account = models.ForeignKey(
         BankAccount,
         on_delete=models.PROTECT,
@@ -40,13 +53,27 @@ class ScheduledTransfers(models.Model):
     next_occurrence_date = models.DateField(null=True, blank=True)
     start_date = models.DateField()
     end_date = models.DateField(null=True)
+    # Only active series are scanned by the processor; finished ones are kept for history
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='active')
 
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # Lease taken by a processing worker, see scheduled_transfers.processing
+    claimed_by = models.CharField(max_length=100, blank=True, default='')
+    claimed_until = models.DateTimeField(null=True, blank=True)
+    last_processed_on = models.DateField(null=True, blank=True)
+
     class Meta:
         db_table = 'scheduled_transfers'
         ordering = ['next_occurrence_date', 'start_date']
+        indexes = [
+            models.Index(
+                fields=['next_occurrence_date'],
+                condition=models.Q(status='active'),
+                name='scheduled_transfer_due_idx'
+            ),
+        ]
 
     def __str__(self):
         return (f"Запланированный перевод с {self.sender_account.account_number} на "
@@ -59,20 +86,12 @@ class ScheduledTransfers(models.Model):
 
         super().save(*args, **kwargs)
 
-    def calculate_next_occurrence_date_for_scheduling(self):
-        """
-        Рассчитывает следующую запланированную дату выполнения на основе частоты.
-        Возвращает новую дату или None, если серия должна завершиться.
-        Использует start_date.day как базовый день для ежемесячных/ежегодных расчетов.
-        """
-        current_date_to_calculate_from = self.next_occurrence_date or self.start_date
-        if not current_date_to_calculate_from:
-            return None
-
+    def next_occurrence_after(self, current_date):
+        """Occurrence following `current_date`, or None if the series ends before it."""
         if self.frequency == 'once':
             return None
 
-        next_date = current_date_to_calculate_from
+        next_date = current_date
         target_day_of_month = self.start_date.day
 
         if self.frequency == 'daily':
@@ -106,51 +125,517 @@ class ScheduledTransfers(models.Model):
 
         return next_date
 
-    def process_and_reschedule(self):
+    def due_occurrences(self, today):
         """
-        Attempts to execute the transfer.
-        If successful, it reschedules the next occurrence or deletes if the series is complete.
-        If the transfer fails due to insufficient funds or a similar *recoverable* error,
-        it reschedules for the next occurrence without deleting the schedule.
-        For *critical* errors, the scheduled transfer is deleted.
-        Returns True if the operation (execution/reschedule/deletion) is handled, False otherwise.
+        Every occurrence from `next_occurrence_date` up to `today`, computed in one pass.
+
+        Returns:
+            tuple[list, date | None]: Due occurrence dates, the first occurrence after
+            them (None if the series is complete)
         """
-        scheduled_transfer_id = self.pk
-        log_prefix = f"Scheduled Transfer ID {scheduled_transfer_id}:"
+        occurrence = self.next_occurrence_date or self.start_date
+        if self.end_date and occurrence > self.end_date:
+            # The end date was moved before the pending occurrence
+            return [], None
 
-        next_calculated_date = None
+        occurrences = []
+        while occurrence is not None and occurrence <= today:
+            occurrences.append(occurrence)
+            occurrence = self.next_occurrence_after(occurrence)
 
-        try:
-            with db_transaction.atomic():
-                next_calculated_date = self.calculate_next_occurrence_date_for_scheduling()
+        return occurrences, occurrence
 
-                Transaction.create_transaction(
-                    sender_account=self.sender_account,
-                    receiver_account=self.receiver_account,
-                    amount=self.amount,
-                    description=self.description
-                )
-                print(f"DEBUG: {log_prefix} Transaction successfully created.")
+    def occurrences_between(self, today, until):
+        """
+        Occurrence dates of the series between today and `until`.
+        An overdue occurrence is expected to run today, the processor catches up on it.
+        Paused and finished series have none, nor do series only waiting for their retries.
+        """
+        if self.status != 'active' or self.next_occurrence_date is None:
+            return []
+
+        dates = []
+        occurrence = self.next_occurrence_date
+        while occurrence is not None and occurrence <= until:
+            dates.append(max(occurrence, today))
+            occurrence = self.next_occurrence_after(occurrence)
+        return dates
+
+    @staticmethod
+    def occurrences_to_execute(occurrences, today, catch_up):
+        """
+        Applies the catch-up policy to the due occurrences.
+
+        'all' executes every missed occurrence, 'latest' executes once for the whole
+        backlog and 'skip' drops missed occurrences, executing only today's one.
+        """
+        if catch_up == 'all':
+            return occurrences
+        if catch_up == 'latest':
+            return occurrences[-1:]
+        if catch_up == 'skip':
+            return [occurrence for occurrence in occurrences if occurrence == today]
+        raise ValueError(f"Unknown catch-up policy: {catch_up}")
+
+    def _reschedule(self, next_date, processed_on, awaiting_retries=False):
+        """
+        Moves the series to `next_date`, or marks it finished when there is none and
+        no retry of its occurrences is pending, and releases the worker lease in the
+        same statement.
+        """
+        self.next_occurrence_date = next_date
+        self.last_processed_on = processed_on
+        if next_date is None and not awaiting_retries:
+            self.status = 'finished'
+        self.claimed_by = ''
+        self.claimed_until = None
+        self.save(update_fields=[
+            'next_occurrence_date',
+            'last_processed_on',
+            'status',
+            'claimed_by',
+            'claimed_until',
+            'updated_at',
+        ])
+
+    @classmethod
+    def execute_due(cls, scheduled_transfers, today, catch_up=None, runs=None):
+        """
+        Executes every occurrence due by `today` according to the catch-up policy
+        (AppConfig.SCHEDULED_TRANSFERS_CATCH_UP by default).
+
+        Occurrences are netted per sender account: each sender's transfers are checked
+        against its balance in schedule order and applied with Transaction.create_transactions,
+        so a sender with many schedules costs a handful of statements. A failed occurrence
+        (insufficient funds or a similar *recoverable* error) does not stop the series: it is
+        queued in ScheduledTransferRetry, and every schedule is moved past today, or marked
+        finished if the series is complete and none of its retries is pending (the last
+        settled retry finishes it then, see ScheduledTransferRetry.execute).
+        An unsaved ScheduledTransferRun is appended to `runs` for every executed occurrence,
+        with the sender group's duration spread evenly over its occurrences.
+        Returns True if every executed occurrence succeeded, False otherwise.
+        """
+        catch_up = catch_up or AppConfig.SCHEDULED_TRANSFERS_CATCH_UP
+        runs = [] if runs is None else runs
+
+        reschedules = []
+        by_sender = defaultdict(list)
+        for scheduled_transfer in scheduled_transfers:
+            occurrences, next_calculated_date = scheduled_transfer.due_occurrences(today)
+            if not occurrences and next_calculated_date is not None:
+                continue
+
+            to_execute = cls.occurrences_to_execute(occurrences, today, catch_up)
+            if len(occurrences) > 1:
+                logger.debug("Scheduled transfer %s: %s occurrences due, executing %s",
+                             scheduled_transfer.pk, len(occurrences), len(to_execute))
+
+            reschedules.append((scheduled_transfer, next_calculated_date))
+            for occurrence in to_execute:
+                by_sender[scheduled_transfer.sender_account_id].append((occurrence, scheduled_transfer))
+
+        success = True
+        retries = []
+        for items in by_sender.values():
+            items.sort(key=lambda item: (item[0], item[1].pk))
+            results, duration_ms = execute_netted(
+                items[0][1].sender_account,
+                [(s.receiver_account, s.amount, s.description) for _, s in items]
+            )
 
-                if self.frequency == 'once' or next_calculated_date is None:
-                    self.delete()
-                    print(f"DEBUG: {log_prefix} Deleted as series completed or was 'once'.")
+            for (occurrence, scheduled_transfer), result in zip(items, results):
+                run = ScheduledTransferRun(
+                    scheduled_transfer_id=scheduled_transfer.pk,
+                    sender_account_id=scheduled_transfer.sender_account_id,
+                    run_date=today,
+                    occurrence_date=occurrence,
+                    amount=scheduled_transfer.amount,
+                    duration_ms=duration_ms,
+                )
+                if isinstance(result, Exception):
+                    success = False
+                    run.status = 'failed'
+                    run.error = error_message(result)
+                    retries.append(ScheduledTransferRetry.first_retry(scheduled_transfer, occurrence, run.error))
+                    logger.warning("Scheduled transfer %s: occurrence %s failed: %s",
+                                   scheduled_transfer.pk, occurrence, run.error)
                 else:
-                    self.next_occurrence_date = next_calculated_date
-                    self.save(update_fields=['next_occurrence_date', 'updated_at'])
-                    print(f"DEBUG: {log_prefix} Rescheduled to {self.next_occurrence_date}.")
+                    run.status = 'success'
+                    run.transaction = result
+                runs.append(run)
+
+        ScheduledTransferRetry.objects.bulk_create(retries)
+
+        completed = [s.pk for s, next_calculated_date in reschedules if next_calculated_date is None]
+        awaiting_retries = set(
+            ScheduledTransferRetry.objects
+            .filter(scheduled_transfer__in=completed, status='pending')
+            .values_list('scheduled_transfer_id', flat=True)
+        ) if completed else set()
+
+        rescheduled = []
+        for scheduled_transfer, next_calculated_date in reschedules:
+            scheduled_transfer._reschedule(
+                next_calculated_date, today, scheduled_transfer.pk in awaiting_retries
+            )
+            rescheduled.append(scheduled_transfer)
+            logger.debug("Scheduled transfer %s: rescheduled to %s (%s)", scheduled_transfer.pk,
+                         scheduled_transfer.next_occurrence_date, scheduled_transfer.status)
+
+        UpcomingOccurrence.regenerate(rescheduled, today)
+
+        return success
+
+    @classmethod
+    def finish_settled(cls, scheduled_transfer_ids):
+        """Marks finished the given series that have no occurrence left and no pending retry."""
+        cls.objects.filter(
+            pk__in=scheduled_transfer_ids,
+            next_occurrence_date__isnull=True
+        ).exclude(
+            status='finished'
+        ).exclude(
+            retries__status='pending'
+        ).update(status='finished', updated_at=timezone.now())
+
+
+def error_message(error: Exception) -> str:
+    """Readable text of a transfer failure, without the ErrorDetail wrappers of a ValidationError."""
+    if not isinstance(error, ValidationError):
+        return str(error)
+
+    detail = error.detail
+    if isinstance(detail, dict):
+        detail = [message for messages in detail.values() for message in messages]
+    return '; '.join(str(message) for message in detail)
+
+
+def execute_netted(sender_account, transfers):
+    """
+    Runs Transaction.create_transactions in a savepoint, turning an unexpected error
+    into a failure of every transfer of the group.
+
+    Returns:
+        tuple[list, int]: Per-transfer results, duration per transfer in milliseconds
+    """
+    started = time.perf_counter()
+    try:
+        with db_transaction.atomic():
+            results = Transaction.create_transactions(sender_account, transfers)
+    except Exception as e:
+        results = [e] * len(transfers)
+    return results, round((time.perf_counter() - started) * 1000 / len(transfers))
+
+
+class ScheduledTransferRun(models.Model):
+    """Outcome of one executed occurrence of a scheduled transfer."""
+    STATUS_CHOICES = [
+        ('success', 'Success'),
+        ('failed', 'Failed'),
+    ]
+
+    # Not a foreign key: the history outlives schedules deleted by their owner (finished ones are kept)
+    scheduled_transfer_id = models.PositiveBigIntegerField()
+    sender_account = models.ForeignKey(
+        BankAccount,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='scheduled_transfer_runs'
+    )
+    transaction = models.ForeignKey(
+        Transaction,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+'
+    )
+    run_date = models.DateField()
+    occurrence_date = models.DateField()
+    amount = models.DecimalField(max_digits=15, decimal_places=2)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES)
+    error = models.TextField(blank=True, default='')
+    attempt = models.PositiveSmallIntegerField(default=1)
+    duration_ms = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'scheduled_transfer_runs'
+        ordering = ['-created_at', '-id']
+        indexes = [
+            models.Index(fields=['scheduled_transfer_id', 'run_date'], name='scheduled_run_transfer_idx'),
+            models.Index(fields=['run_date', 'status'], name='scheduled_run_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"Scheduled transfer {self.scheduled_transfer_id} on {self.occurrence_date}: {self.status}"
 
-                return True
 
-        except Exception as e:
-            print(f"WARNING: {log_prefix} Failed due to recoverable error (e.g., insufficient funds): {e}")
+class ScheduledTransferRetry(models.Model):
+    """
+    Failed occurrence of a scheduled transfer waiting for another attempt.
 
-            if self.frequency == 'once' or next_calculated_date is None:
-                self.delete()
-                print(f"DEBUG: {log_prefix} Deleted after single attempt failure (was 'once' or series ended).")
+    Attempts are spaced with exponential backoff, SCHEDULED_TRANSFERS_RETRY_BASE_SECONDS
+    doubled after every failure, up to SCHEDULED_TRANSFERS_RETRY_MAX_ATTEMPTS attempts in
+    total (the original one included). Retries belong to their schedule: they are deleted
+    with it, cancelled when it is paused, and a series whose last occurrence failed stays
+    active until its retries are settled.
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('succeeded', 'Succeeded'),
+        ('exhausted', 'Exhausted'),
+        ('cancelled', 'Cancelled'),
+    ]
+
+    scheduled_transfer = models.ForeignKey(
+        ScheduledTransfers,
+        on_delete=models.CASCADE,
+        related_name='retries'
+    )
+    sender_account = models.ForeignKey(
+        BankAccount,
+        on_delete=models.CASCADE,
+        related_name='scheduled_transfer_retries'
+    )
+    receiver_account = models.ForeignKey(
+        BankAccount,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    amount = models.DecimalField(max_digits=15, decimal_places=2)
+    description = models.TextField(blank=True)
+    occurrence_date = models.DateField()
+    attempts = models.PositiveSmallIntegerField(default=1)
+    next_attempt_at = models.DateTimeField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    last_error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    # Lease taken by a processing worker, see scheduled_transfers.processing
+    claimed_by = models.CharField(max_length=100, blank=True, default='')
+    claimed_until = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'scheduled_transfer_retries'
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='scheduled_retry_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"Retry of scheduled transfer {self.scheduled_transfer_id} on {self.occurrence_date}: {self.status}"
+
+    @staticmethod
+    def backoff(attempts: int) -> timedelta:
+        return timedelta(seconds=AppConfig.SCHEDULED_TRANSFERS_RETRY_BASE_SECONDS * 2 ** (attempts - 1))
+
+    @classmethod
+    def first_retry(cls, scheduled_transfer, occurrence, error):
+        """Unsaved retry of an occurrence whose first attempt just failed."""
+        exhausted = AppConfig.SCHEDULED_TRANSFERS_RETRY_MAX_ATTEMPTS <= 1
+        return cls(
+            scheduled_transfer_id=scheduled_transfer.pk,
+            sender_account_id=scheduled_transfer.sender_account_id,
+            receiver_account_id=scheduled_transfer.receiver_account_id,
+            amount=scheduled_transfer.amount,
+            description=scheduled_transfer.description,
+            occurrence_date=occurrence,
+            next_attempt_at=timezone.now() + cls.backoff(1),
+            status='exhausted' if exhausted else 'pending',
+            last_error=error,
+        )
+
+    @classmethod
+    def execute(cls, retries, runs=None):
+        """
+        Attempts the given retries again, netted per sender like regular occurrences.
+        Succeeded and exhausted retries leave the queue, the others are pushed back;
+        either way the worker's lease is released. Retries of a schedule that is no longer
+        active are cancelled without an attempt.
+        Appends an unsaved ScheduledTransferRun per attempt to `runs`.
+        """
+        runs = [] if runs is None else runs
+        now = timezone.now()
+        today = timezone.localdate()
+
+        active = set(
+            ScheduledTransfers.objects
+            .filter(pk__in={retry.scheduled_transfer_id for retry in retries}, status='active')
+            .values_list('pk', flat=True)
+        )
+
+        by_sender = defaultdict(list)
+        for retry in retries:
+            if retry.scheduled_transfer_id in active:
+                by_sender[retry.sender_account_id].append(retry)
             else:
-                self.next_occurrence_date = next_calculated_date
-                self.save(update_fields=['next_occurrence_date', 'updated_at'])
-                print(f"DEBUG: {log_prefix} Rescheduled to {self.next_occurrence_date} after recoverable failure.")
+                retry.status = 'cancelled'
+                retry.updated_at = now
+                retry.claimed_by = ''
+                retry.claimed_until = None
+
+        for items in by_sender.values():
+            items.sort(key=lambda retry: (retry.occurrence_date, retry.pk))
+            results, duration_ms = execute_netted(
+                items[0].sender_account,
+                [(r.receiver_account, r.amount, r.description) for r in items]
+            )
+
+            for retry, result in zip(items, results):
+                retry.attempts += 1
+                run = ScheduledTransferRun(
+                    scheduled_transfer_id=retry.scheduled_transfer_id,
+                    sender_account_id=retry.sender_account_id,
+                    run_date=today,
+                    occurrence_date=retry.occurrence_date,
+                    amount=retry.amount,
+                    attempt=retry.attempts,
+                    duration_ms=duration_ms,
+                )
+                if isinstance(result, Exception):
+                    run.status = 'failed'
+                    run.error = retry.last_error = error_message(result)
+                    if retry.attempts >= AppConfig.SCHEDULED_TRANSFERS_RETRY_MAX_ATTEMPTS:
+                        retry.status = 'exhausted'
+                    else:
+                        retry.next_attempt_at = now + cls.backoff(retry.attempts)
+                else:
+                    run.status = 'success'
+                    run.transaction = result
+                    retry.status = 'succeeded'
+                retry.updated_at = now
+                retry.claimed_by = ''
+                retry.claimed_until = None
+                runs.append(run)
+
+        cls.objects.bulk_update(retries, [
+            'attempts',
+            'status',
+            'last_error',
+            'next_attempt_at',
+            'updated_at',
+            'claimed_by',
+            'claimed_until',
+        ])
+        ScheduledTransfers.finish_settled({retry.scheduled_transfer_id for retry in retries})
+        return runs
+
+    @classmethod
+    def cancel_pending(cls, scheduled_transfer_ids):
+        """Cancels the pending retries of series that were paused or finished by hand."""
+        cls.objects.filter(scheduled_transfer__in=scheduled_transfer_ids, status='pending').update(
+            status='cancelled',
+            claimed_by='',
+            claimed_until=None,
+            updated_at=timezone.now()
+        )
+        ScheduledTransfers.finish_settled(scheduled_transfer_ids)
+
+
+class UpcomingOccurrence(models.Model):
+    """
+    Materialized occurrence of a scheduled transfer within the next
+    UPCOMING_OCCURRENCES_DAYS days, read by the payments calendar.
+
+    Rows of a schedule are regenerated when it is created, changed or executed,
+    deleted together with it, and the window is moved forward once a day
+    (see refresh_all, the refresh_upcoming_occurrences command and the scheduler).
+    """
+    scheduled_transfer = models.ForeignKey(
+        ScheduledTransfers,
+        on_delete=models.CASCADE,
+        related_name='upcoming_occurrences'
+    )
+    sender_account = models.ForeignKey(
+        BankAccount,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    receiver_account = models.ForeignKey(
+        BankAccount,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    date = models.DateField()
+    amount = models.DecimalField(max_digits=15, decimal_places=2)
 
-            return False
+    class Meta:
+        db_table = 'upcoming_occurrences'
+        ordering = ['date', 'id']
+        indexes = [
+            models.Index(fields=['sender_account', 'date'], name='upcoming_sender_date_idx'),
+            models.Index(fields=['receiver_account', 'date'], name='upcoming_receiver_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"Scheduled transfer {self.scheduled_transfer_id} on {self.date}"
+
+    @classmethod
+    def regenerate(cls, scheduled_transfers, today=None):
+        """Replaces the materialized occurrences of the given schedules with two statements."""
+        if not scheduled_transfers:
+            return
+
+        today = today or timezone.localdate()
+        until = today + timedelta(days=AppConfig.UPCOMING_OCCURRENCES_DAYS)
+
+        cls.objects.filter(scheduled_transfer__in=[s.pk for s in scheduled_transfers]).delete()
+        cls.objects.bulk_create([
+            cls(
+                scheduled_transfer_id=scheduled_transfer.pk,
+                sender_account_id=scheduled_transfer.sender_account_id,
+                receiver_account_id=scheduled_transfer.receiver_account_id,
+                date=occurrence,
+                amount=scheduled_transfer.amount,
+            )
+            for scheduled_transfer in scheduled_transfers
+            for occurrence in scheduled_transfer.occurrences_between(today, until)
+        ])
+
+    @classmethod
+    def refresh_all(cls, today=None, chunk_size: int = 1000) -> int:
+        """
+        Moves the window of every active schedule to start at `today`, `chunk_size`
+        schedules at a time.
+
+        Rows already follow every change of their schedule, so nothing is rebuilt:
+        occurrences left before today are overdue and moved to today, and each schedule
+        only gets the occurrences that entered the window after its last row. Paused and
+        finished schedules have no rows and are skipped.
+        """
+        today = today or timezone.localdate()
+        until = today + timedelta(days=AppConfig.UPCOMING_OCCURRENCES_DAYS)
+        cls.objects.filter(date__lt=today).update(date=today)
+
+        refreshed = 0
+        last_pk = 0
+        while True:
+            chunk = list(
+                ScheduledTransfers.objects
+                .filter(status='active', pk__gt=last_pk)
+                .order_by('pk')[:chunk_size]
+            )
+            if not chunk:
+                return refreshed
+
+            last_dates = dict(
+                cls.objects
+                .filter(scheduled_transfer__in=[s.pk for s in chunk])
+                .values('scheduled_transfer')
+                .annotate(last=Max('date'))
+                .values_list('scheduled_transfer', 'last')
+            )
+            cls.objects.bulk_create([
+                cls(
+                    scheduled_transfer_id=scheduled_transfer.pk,
+                    sender_account_id=scheduled_transfer.sender_account_id,
+                    receiver_account_id=scheduled_transfer.receiver_account_id,
+                    date=occurrence,
+                    amount=scheduled_transfer.amount,
+                )
+                for scheduled_transfer in chunk
+                for occurrence in scheduled_transfer.occurrences_between(today, until)
+                if occurrence > last_dates.get(scheduled_transfer.pk, date.min)
+            ])
+            refreshed += len(chunk)
+            last_pk = chunk[-1].pk
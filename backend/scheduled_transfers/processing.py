@@ -0,0 +1,223 @@
+import math
+import os
+import socket
+from datetime import timedelta
+
+from django.db import connections
+from django.db import transaction as db_transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import ScheduledTransfers, ScheduledTransferRun, ScheduledTransferRetry
+
+
+class RunStats:
+    """Counters and per-occurrence latencies of one processing run."""
+
+    def __init__(self, succeeded: int = 0, failed: int = 0, durations: list[int] | None = None):
+        self.succeeded = succeeded
+        self.failed = failed
+        self.durations = durations or []
+
+    def add(self, runs: list[ScheduledTransferRun]) -> None:
+        for run in runs:
+            if run.status == 'success':
+                self.succeeded += 1
+            else:
+                self.failed += 1
+            self.durations.append(run.duration_ms)
+
+    def merge(self, other: 'RunStats') -> None:
+        self.succeeded += other.succeeded
+        self.failed += other.failed
+        self.durations += other.durations
+
+    def percentile(self, q: float) -> int:
+        """Nearest-rank percentile of the latencies in milliseconds."""
+        if not self.durations:
+            return 0
+        ordered = sorted(self.durations)
+        return ordered[max(0, math.ceil(q * len(ordered)) - 1)]
+
+    def summary(self) -> str:
+        return (f"Processed: {self.succeeded} succeeded, {self.failed} failed, "
+                f"p50 {self.percentile(0.5)} ms, p95 {self.percentile(0.95)} ms.")
+
+
+def worker_name() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def due_transfers(today):
+    """
+    Active scheduled transfers that should run on `today` and were not processed yet today.
+    Served by the partial index on next_occurrence_date of active series.
+    A series whose end date passed while it was not processed is still due: its remaining
+    occurrences are caught up and it is finished, see ScheduledTransfers.due_occurrences.
+    """
+    return ScheduledTransfers.objects.filter(
+        Q(last_processed_on__isnull=True) | Q(last_processed_on__lt=today),
+        status='active',
+        next_occurrence_date__lte=today,
+        start_date__lte=today
+    )
+
+
+def claim_batch(today, worker: str, batch_size: int, lease_seconds: int) -> list[ScheduledTransfers]:
+    """
+    Leases up to `batch_size` due transfers to `worker`.
+
+    Candidate rows are selected with SKIP LOCKED where the database supports it, so
+    concurrent workers never wait on each other. The lease itself is taken with a
+    conditional UPDATE, which keeps claiming safe on SQLite too: a row whose lease is
+    held by someone else is never updated, and only rows carrying our name are returned.
+    An expired lease (crashed worker) makes the row claimable again.
+    """
+    now = timezone.now()
+    lease_free = Q(claimed_until__isnull=True) | Q(claimed_until__lt=now)
+
+    with db_transaction.atomic():
+        ids = list(
+            due_transfers(today)
+            .filter(lease_free)
+            .order_by('next_occurrence_date', 'pk')
+            .select_for_update(skip_locked=True)
+            .values_list('pk', flat=True)[:batch_size]
+        )
+        if not ids:
+            return []
+
+        ScheduledTransfers.objects.filter(lease_free, pk__in=ids).update(
+            claimed_by=worker,
+            claimed_until=now + timedelta(seconds=lease_seconds)
+        )
+
+    return list(
+        ScheduledTransfers.objects
+        .filter(pk__in=ids, claimed_by=worker)
+        .select_related('sender_account', 'receiver_account')
+    )
+
+
+def hold_leases(claimed, worker: str, lease_seconds: int) -> set[int]:
+    """
+    Renews `worker`'s lease on the rows of `claimed` and returns the pks it still holds.
+
+    Must run inside the transaction that executes the rows: the conditional UPDATE locks
+    them until commit, so a row whose lease expired and was taken over by another worker
+    is left out, and nobody can take over the ones returned before their outcome is saved.
+    """
+    claimed = claimed.filter(claimed_by=worker)
+    claimed.update(claimed_until=timezone.now() + timedelta(seconds=lease_seconds))
+    return set(claimed.values_list('pk', flat=True))
+
+
+def due_retries():
+    return ScheduledTransferRetry.objects.filter(status='pending', next_attempt_at__lte=timezone.now())
+
+
+def claim_retries(worker: str, batch_size: int, lease_seconds: int) -> list[ScheduledTransferRetry]:
+    """
+    Leases up to `batch_size` retries whose next attempt is due to `worker`, using the
+    (status, next_attempt_at) index. Same lease mechanism as claim_batch.
+    """
+    now = timezone.now()
+    lease_free = Q(claimed_until__isnull=True) | Q(claimed_until__lt=now)
+
+    with db_transaction.atomic():
+        ids = list(
+            due_retries()
+            .filter(lease_free)
+            .order_by('next_attempt_at', 'pk')
+            .select_for_update(skip_locked=True)
+            .values_list('pk', flat=True)[:batch_size]
+        )
+        if not ids:
+            return []
+
+        ScheduledTransferRetry.objects.filter(lease_free, pk__in=ids).update(
+            claimed_by=worker,
+            claimed_until=now + timedelta(seconds=lease_seconds)
+        )
+
+    return list(
+        ScheduledTransferRetry.objects
+        .filter(pk__in=ids, claimed_by=worker)
+        .select_related('sender_account', 'receiver_account')
+    )
+
+
+def run_retries(batch_size: int, lease_seconds: int) -> RunStats:
+    """Claims and attempts due retries in batches until none are left."""
+    worker = worker_name()
+    stats = RunStats()
+
+    while True:
+        retries = claim_retries(worker, batch_size, lease_seconds)
+        if not retries:
+            return stats
+
+        runs = []
+        with db_transaction.atomic():
+            held = hold_leases(
+                ScheduledTransferRetry.objects.filter(pk__in=[r.pk for r in retries]), worker, lease_seconds
+            )
+            ScheduledTransferRetry.execute([r for r in retries if r.pk in held], runs)
+
+        ScheduledTransferRun.objects.bulk_create(runs)
+        stats.add(runs)
+
+
+def run_worker(today, batch_size: int, lease_seconds: int, catch_up=None) -> RunStats:
+    """
+    Claims and executes batches of due transfers until none are left, then works
+    through the due retries. Each batch is executed netted per sender, see ScheduledTransfers.execute_due,
+    skipping transfers whose lease was lost in the meantime (see hold_leases).
+    The outcome of every executed occurrence is stored with one insert per batch.
+
+    Args:
+        catch_up: Policy for missed occurrences, see ScheduledTransfers.occurrences_to_execute
+    """
+    worker = worker_name()
+    stats = RunStats()
+
+    while True:
+        batch = claim_batch(today, worker, batch_size, lease_seconds)
+        if not batch:
+            stats.merge(run_retries(batch_size, lease_seconds))
+            return stats
+
+        runs = []
+        with db_transaction.atomic():
+            held = hold_leases(
+                ScheduledTransfers.objects.filter(pk__in=[s.pk for s in batch]), worker, lease_seconds
+            )
+            ScheduledTransfers.execute_due([s for s in batch if s.pk in held], today, catch_up, runs)
+
+        ScheduledTransferRun.objects.bulk_create(runs)
+        stats.add(runs)
+
+
+def _run_worker_process(args) -> RunStats:
+    import django
+    django.setup()
+    try:
+        return run_worker(*args)
+    finally:
+        connections.close_all()
+
+
+def run_workers(today, workers: int, batch_size: int, lease_seconds: int, catch_up=None) -> RunStats:
+    """Runs `workers` worker processes sharing the backlog and sums their results."""
+    import multiprocessing
+
+    # Forked children must not reuse the parent's database connection
+    connections.close_all()
+
+    with multiprocessing.Pool(processes=workers) as pool:
+        results = pool.map(_run_worker_process, [(today, batch_size, lease_seconds, catch_up)] * workers)
+
+    stats = RunStats()
+    for result in results:
+        stats.merge(result)
+    return stats
@@ -0,0 +1,161 @@
+import heapq
+import threading
+from datetime import datetime, time, timedelta
+
+from django.core.management import call_command
+from django.db import close_old_connections
+from django.db.models import Count, Max, Min
+from django.utils import timezone
+
+from achievements.events import process_events
+from core.config import AppConfig
+from savings_accounts.models import SavingsAccount
+from .models import ScheduledTransfers, UpcomingOccurrence
+from .processing import run_retries, run_worker
+
+
+class Scheduler:
+    """
+    Long-running replacement of the daily cron run.
+
+    Keeps a heap of (due date, job kind, id) for every scheduled transfer and
+    savings account, sleeps until the earliest entry is due and runs only the
+    jobs that are due. The heap is rebuilt when a cheap aggregate over the
+    source tables changes, so new or edited schedules are picked up without
+    restarting the process. Entries already run today that are still due
+    (e.g. a series leased by another worker) are parked until tomorrow, so they
+    don't make the loop spin. Scheduled transfer retries and queued achievement
+    events are drained on every tick.
+    """
+
+    def __init__(self, poll_seconds: int, batch_size: int, lease_seconds: int, stdout=None):
+        self.poll_seconds = poll_seconds
+        self.batch_size = batch_size
+        self.lease_seconds = lease_seconds
+        self.stdout = stdout
+        self.heap: list[tuple] = []
+        self._signature = None
+        self._attempted_on = None
+        self._attempted: set[tuple[str, int]] = set()
+        self._maintained_on = None
+        self._stop = threading.Event()
+        self.jobs = {
+            'transfer': self._run_transfers,
+            'interest': self._run_interest,
+        }
+
+    def signature(self) -> tuple:
+        """Changes whenever a schedule is added, removed or moved."""
+        transfers = ScheduledTransfers.objects.aggregate(count=Count('pk'), changed=Max('updated_at'))
+        savings = SavingsAccount.objects.aggregate(
+            count=Count('pk'),
+            first=Min('next_interest_date'),
+            last=Max('next_interest_date')
+        )
+        return tuple(transfers.values()) + tuple(savings.values())
+
+    def refresh(self, force: bool = False) -> bool:
+        signature = self.signature()
+        if not force and signature == self._signature:
+            return False
+
+        heap = [
+            (due, 'transfer', pk)
+            for pk, due in ScheduledTransfers.objects
+            .filter(status='active', next_occurrence_date__isnull=False)
+            .values_list('pk', 'next_occurrence_date')
+        ]
+        heap += [
+            (due, 'interest', pk)
+            for pk, due in SavingsAccount.objects
+            .filter(next_interest_date__isnull=False, bank_account__status__in=['active', 'frozen'])
+            .values_list('pk', 'next_interest_date')
+        ]
+        heap = [self._park(entry) for entry in heap]
+        heapq.heapify(heap)
+
+        self.heap = heap
+        self._signature = signature
+        return True
+
+    def _park(self, entry: tuple) -> tuple:
+        due, kind, pk = entry
+        if self._attempted_on and due <= self._attempted_on and (kind, pk) in self._attempted:
+            return self._attempted_on + timedelta(days=1), kind, pk
+        return entry
+
+    def next_due(self):
+        return self.heap[0][0] if self.heap else None
+
+    def seconds_until_due(self) -> float:
+        """Time to sleep before the next check, never longer than the polling interval."""
+        due = self.next_due()
+        if due is None:
+            return self.poll_seconds
+
+        wake_at = timezone.make_aware(datetime.combine(due, time.min))
+        return max(0.0, min((wake_at - timezone.now()).total_seconds(), self.poll_seconds))
+
+    def run_due(self, today) -> set[str]:
+        """Pops every entry due by `today` and runs each due job kind once."""
+        if self._attempted_on != today:
+            self._attempted_on, self._attempted = today, set()
+
+        due_kinds = set()
+        while self.heap and self.heap[0][0] <= today:
+            _, kind, pk = heapq.heappop(self.heap)
+            due_kinds.add(kind)
+            self._attempted.add((kind, pk))
+
+        for kind in sorted(due_kinds):
+            self.jobs[kind](today)
+
+        if due_kinds:
+            self.refresh(force=True)
+        return due_kinds
+
+    def tick(self) -> set[str]:
+        close_old_connections()
+        self.refresh()
+        today = timezone.localdate()
+        if self._maintained_on != today:
+            self._run_daily(today)
+            self._maintained_on = today
+
+        due_kinds = self.run_due(today)
+
+        # Retries are due at any time of the day; the indexed lookup is cheap enough for every tick
+        stats = run_retries(self.batch_size, self.lease_seconds)
+        if stats.succeeded or stats.failed:
+            self._write(f"[{timezone.now()}] Scheduled transfer retries. {stats.summary()}")
+
+        # Achievement events are queued by every transfer and drained on every tick as well
+        processed, failed = process_events(AppConfig.ACHIEVEMENT_EVENTS_BATCH_SIZE)
+        if processed or failed:
+            self._write(f"[{timezone.now()}] Achievement events. Processed: {processed}, failed: {failed}.")
+        return due_kinds
+
+    def run_forever(self) -> None:
+        self.refresh(force=True)
+        while not self._stop.is_set():
+            self.tick()
+            self._stop.wait(self.seconds_until_due())
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _write(self, message: str) -> None:
+        if self.stdout:
+            self.stdout.write(message)
+
+    def _run_daily(self, today) -> None:
+        """Once per day, before the day's jobs: close yesterday's savings balances, move the calendar."""
+        call_command('snapshot_savings_balances', date=today - timedelta(days=1), stdout=self.stdout)
+        UpcomingOccurrence.refresh_all(today)
+
+    def _run_transfers(self, today) -> None:
+        stats = run_worker(today, self.batch_size, self.lease_seconds)
+        self._write(f"[{timezone.now()}] Scheduled transfers. {stats.summary()}")
+
+    def _run_interest(self, today) -> None:
+        call_command('process_savings_interest', stdout=self.stdout)
@@ -1,15 +1,19 @@
 from rest_framework import serializers
 from django.utils import timezone
 from decimal import Decimal
+from datetime import timedelta
 
-from .models import ScheduledTransfers
+from core.config import AppConfig
+from .models import ScheduledTransfers, ScheduledTransferRun, UpcomingOccurrence
+from bank_accounts.membership import get_membership
 from bank_accounts.models import BankAccount
 from bank_accounts.serializers import PublicBankAccountSerializer
+from bank_accounts.validators import validate_account_number
 
 
 class ScheduledTransferSerializer(serializers.ModelSerializer):
-    sender_account = serializers.CharField(write_only=True, required=True)
-    receiver_account = serializers.CharField(write_only=True, required=True)
+    sender_account = serializers.CharField(write_only=True, required=True, validators=[validate_account_number])
+    receiver_account = serializers.CharField(write_only=True, required=True, validators=[validate_account_number])
 
     class Meta:
         model = ScheduledTransfers
@@ -39,11 +43,10 @@ class ScheduledTransferSerializer(serializers.ModelSerializer):
         today = timezone.localdate()
 
         try:
-            sender_account = BankAccount.objects.get(
-                account_number=sender_account,
-                status='active',
-                users__user=user
-            )
+            membership = get_membership(user).get(sender_account)
+            if membership is None or membership.status != 'active':
+                raise BankAccount.DoesNotExist
+            sender_account = BankAccount.objects.get(pk=membership.account_id)
             data['sender_account'] = sender_account
         except BankAccount.DoesNotExist:
             raise serializers.ValidationError(
@@ -95,9 +98,90 @@ class ScheduledTransferListSerializer(serializers.ModelSerializer):
             'amount',
             'description',
             'frequency',
+            'status',
             'next_occurrence_date',
             'start_date',
             'end_date',
             'created_at',
         ]
         read_only_fields = fields
+
+
+class ScheduledTransferRunSerializer(serializers.ModelSerializer):
+    transaction_id = serializers.PrimaryKeyRelatedField(source='transaction', read_only=True)
+
+    class Meta:
+        model = ScheduledTransferRun
+        fields = [
+            'id',
+            'scheduled_transfer_id',
+            'run_date',
+            'occurrence_date',
+            'amount',
+            'status',
+            'error',
+            'transaction_id',
+            'duration_ms',
+        ]
+
+
+class ForecastQuerySerializer(serializers.Serializer):
+    days = serializers.IntegerField(min_value=1, max_value=AppConfig.BALANCE_FORECAST_MAX_DAYS, default=30)
+
+
+class ForecastDaySerializer(serializers.Serializer):
+    date = serializers.DateField()
+    balance = serializers.DecimalField(max_digits=15, decimal_places=2)
+
+
+class AccountForecastSerializer(serializers.Serializer):
+    account_number = serializers.CharField()
+    currency = serializers.CharField()
+    balance = serializers.DecimalField(max_digits=15, decimal_places=2)
+    complete = serializers.BooleanField()
+    days = ForecastDaySerializer(many=True)
+
+
+class CalendarQuerySerializer(serializers.Serializer):
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+
+    def validate(self, data):
+        # Occurrences are only materialized that far ahead, a later end would silently miss payments
+        horizon = timezone.localdate() + timedelta(days=AppConfig.UPCOMING_OCCURRENCES_DAYS)
+        date_from = data.setdefault('date_from', timezone.localdate())
+        date_to = data.setdefault('date_to', horizon)
+
+        if date_to < date_from:
+            raise serializers.ValidationError({"date_to": "The end of the range cannot be before its start"})
+        if date_to > horizon:
+            raise serializers.ValidationError({"date_to": f"The calendar only reaches {horizon}"})
+
+        return data
+
+
+class UpcomingOccurrenceSerializer(serializers.ModelSerializer):
+    direction = serializers.SerializerMethodField()
+    counterparty_account = serializers.SerializerMethodField()
+    currency = serializers.CharField(source='sender_account.currency')
+    description = serializers.CharField(source='scheduled_transfer.description')
+
+    class Meta:
+        model = UpcomingOccurrence
+        fields = [
+            'scheduled_transfer_id',
+            'date',
+            'direction',
+            'amount',
+            'currency',
+            'counterparty_account',
+            'description',
+        ]
+
+    def get_direction(self, obj):
+        return 'outgoing' if obj.sender_account_id == self.context['account'].pk else 'incoming'
+
+    def get_counterparty_account(self, obj):
+        if obj.sender_account_id == self.context['account'].pk:
+            return obj.receiver_account.account_number
+        return obj.sender_account.account_number
@@ -0,0 +1,13 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .models import ScheduledTransfers, ScheduledTransferRetry, UpcomingOccurrence
+
+
+@receiver(post_save, sender=ScheduledTransfers)
+def on_scheduled_transfer_saved(sender, instance, created, update_fields=None, **kwargs):
+    # Executed schedules are regenerated in bulk by ScheduledTransfers.execute_due
+    if update_fields is None:
+        UpcomingOccurrence.regenerate([instance])
+        if instance.status != 'active':
+            ScheduledTransferRetry.cancel_pending([instance.pk])
@@ -1,3 +1,488 @@
+from datetime import date, timedelta
+from decimal import Decimal
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
 from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from achievements.models import AchievementEvent
+from bank_accounts.models import BankAccount, UserBankAccount
+from core.config import AppConfig
+from savings_accounts.models import SavingsAccount
+from transactions.models import Transaction
+from users.models import User
+from .forecast import _apply_interest
+from .models import ScheduledTransfers, ScheduledTransferRun, ScheduledTransferRetry, UpcomingOccurrence
+from .processing import RunStats, claim_batch, claim_retries, hold_leases
+from .scheduler import Scheduler
+
+
+def create_user(email: str, phone: str) -> User:
+    return User.objects.create_user(
+        email=email,
+        password="testpass123",
+        phone=phone,
+        first_name="Foo",
+        last_name="Bar",
+    )
+
+
+def create_account(user: User, balance: int = 10000) -> BankAccount:
+    account = BankAccount.objects.create(owner=user, currency="RUB", balance=balance)
+    UserBankAccount.objects.create(user=user, bank_account=account)
+    return account
+
+
+@pytest.fixture
+def accounts(db):
+    sender = create_account(create_user("sender@example.com", "+70000000001"))
+    receiver = create_account(create_user("receiver@example.com", "+70000000002"))
+    return sender, receiver
+
+
+def create_scheduled(sender, receiver, frequency: str = "daily", start_date=None) -> ScheduledTransfers:
+    return ScheduledTransfers.objects.create(
+        sender_account=sender,
+        receiver_account=receiver,
+        amount=Decimal("100.00"),
+        frequency=frequency,
+        start_date=start_date or timezone.localdate(),
+    )
+
+
+def test_claimed_batch_is_invisible_to_other_workers(accounts):
+    today = timezone.localdate()
+    scheduled = create_scheduled(*accounts)
+
+    assert [s.pk for s in claim_batch(today, "worker-a", 10, 300)] == [scheduled.pk]
+    assert claim_batch(today, "worker-b", 10, 300) == []
+
+    scheduled.refresh_from_db()
+    assert scheduled.claimed_by == "worker-a"
+
+
+def test_expired_lease_can_be_reclaimed(accounts):
+    today = timezone.localdate()
+    scheduled = create_scheduled(*accounts)
+    ScheduledTransfers.objects.filter(pk=scheduled.pk).update(
+        claimed_by="crashed-worker",
+        claimed_until=timezone.now() - timedelta(seconds=1),
+    )
+
+    assert [s.pk for s in claim_batch(today, "worker-b", 10, 300)] == [scheduled.pk]
+
+
+def test_lease_taken_over_is_not_held(accounts):
+    today = timezone.localdate()
+    scheduled = create_scheduled(*accounts)
+    claim_batch(today, "worker-a", 10, 300)
+    claimed = ScheduledTransfers.objects.filter(pk=scheduled.pk)
+
+    assert hold_leases(claimed, "worker-a", 300) == {scheduled.pk}
+
+    # worker-a stalled past its lease and worker-b reclaimed the row
+    claimed.update(claimed_by="worker-b")
+    assert hold_leases(claimed, "worker-a", 300) == set()
+
+
+def test_claimed_retries_are_invisible_to_other_workers(accounts):
+    sender, receiver = accounts
+    scheduled = create_scheduled(sender, receiver, "once")
+    retry = ScheduledTransferRetry.first_retry(scheduled, scheduled.start_date, "Insufficient funds")
+    retry.next_attempt_at = timezone.now()
+    retry.save()
+
+    claimed = claim_retries("worker-a", 10, 300)
+    assert [r.pk for r in claimed] == [retry.pk]
+    assert claim_retries("worker-b", 10, 300) == []
+
+    ScheduledTransferRetry.execute(claimed)
+    retry.refresh_from_db()
+    assert (retry.status, retry.claimed_by, retry.claimed_until) == ("succeeded", "", None)
+
+
+def test_command_executes_due_transfers_once_per_day(accounts):
+    sender, receiver = accounts
+    today = timezone.localdate()
+    daily = create_scheduled(sender, receiver, "daily")
+    once = create_scheduled(sender, receiver, "once")
+
+    call_command("process_scheduled_transfers", stdout=StringIO())
+
+    assert Transaction.objects.count() == 2
+    assert ScheduledTransfers.objects.get(pk=once.pk).status == "finished"
+
+    daily.refresh_from_db()
+    assert daily.next_occurrence_date == today + timedelta(days=1)
+    assert daily.last_processed_on == today
+    assert daily.claimed_by == ""
+    assert daily.claimed_until is None
+
+    sender.refresh_from_db()
+    assert sender.balance == Decimal("9800.00")
+
+    call_command("process_scheduled_transfers", stdout=StringIO())
+    assert Transaction.objects.count() == 2
+
+
+def test_scheduler_runs_due_transfers_and_tracks_new_schedules(accounts):
+    today = timezone.localdate()
+    scheduler = Scheduler(poll_seconds=60, batch_size=10, lease_seconds=300)
+    create_scheduled(*accounts, start_date=today + timedelta(days=3))
+
+    assert scheduler.refresh() is True
+    assert scheduler.next_due() == today + timedelta(days=3)
+    assert scheduler.tick() == set()
+
+    create_scheduled(*accounts, frequency="once")
+    assert scheduler.tick() == {"transfer"}
+    assert Transaction.objects.count() == 1
+    assert scheduler.next_due() == today + timedelta(days=3)
+
+
+def test_scheduler_follows_admin_bulk_actions(accounts, client):
+    today = timezone.localdate()
+    scheduler = Scheduler(poll_seconds=60, batch_size=10, lease_seconds=300)
+    scheduled = create_scheduled(*accounts, start_date=today + timedelta(days=3))
+    assert scheduler.refresh() is True
+
+    admin = User.objects.create_superuser(email="admin@example.com", password="testpass123", phone="+70000000060",
+                                          first_name="Ad", last_name="Min")
+    client.force_login(admin)
+    changelist = reverse("admin:scheduled_transfers_scheduledtransfers_changelist")
+    client.post(changelist, {"action": "run_today", "_selected_action": [scheduled.pk]})
+    assert scheduler.refresh() is True
+    assert scheduler.next_due() == today
+
+    client.post(changelist, {"action": "pause", "_selected_action": [scheduled.pk]})
+    assert scheduler.refresh() is True
+    assert scheduler.next_due() is None
+
+
+def test_scheduler_parks_entries_that_stay_due(accounts):
+    today = timezone.localdate()
+    scheduler = Scheduler(poll_seconds=60, batch_size=10, lease_seconds=300)
+    leased = create_scheduled(*accounts)
+    ScheduledTransfers.objects.filter(pk=leased.pk).update(
+        claimed_by="other-worker",
+        claimed_until=timezone.now() + timedelta(hours=1),
+    )
+
+    assert scheduler.tick() == {"transfer"}
+    assert scheduler.next_due() == today + timedelta(days=1)
+    assert scheduler.tick() == set()
+
+
+def test_series_ended_during_downtime_catches_up_and_finishes(accounts):
+    today = timezone.localdate()
+    expired = create_scheduled(*accounts, start_date=today - timedelta(days=10))
+    ScheduledTransfers.objects.filter(pk=expired.pk).update(end_date=today - timedelta(days=5))
+
+    call_command("process_scheduled_transfers", stdout=StringIO())
+
+    expired.refresh_from_db()
+    assert expired.status == "finished"
+    assert Transaction.objects.count() == 6
+
+
+def test_series_ending_before_its_pending_occurrence_finishes(accounts):
+    today = timezone.localdate()
+    scheduled = create_scheduled(*accounts, start_date=today - timedelta(days=3))
+    ScheduledTransfers.objects.filter(pk=scheduled.pk).update(
+        next_occurrence_date=today, end_date=today - timedelta(days=1)
+    )
+
+    call_command("process_scheduled_transfers", stdout=StringIO())
+
+    assert ScheduledTransfers.objects.get().status == "finished"
+    assert not Transaction.objects.exists()
+
+
+def test_due_occurrences_clamp_to_month_end():
+    scheduled = ScheduledTransfers(
+        frequency="monthly",
+        start_date=date(2024, 1, 31),
+        next_occurrence_date=date(2024, 1, 31),
+    )
+
+    occurrences, following = scheduled.due_occurrences(date(2024, 4, 15))
+
+    assert occurrences == [date(2024, 1, 31), date(2024, 2, 29), date(2024, 3, 31)]
+    assert following == date(2024, 4, 30)
+
+
+@pytest.mark.parametrize("catch_up, executed", [("all", 3), ("latest", 1), ("skip", 1)])
+def test_catch_up_policy(accounts, catch_up, executed):
+    sender, receiver = accounts
+    today = timezone.localdate()
+    scheduled = create_scheduled(sender, receiver, "daily", start_date=today - timedelta(days=2))
+
+    call_command("process_scheduled_transfers", catch_up=catch_up, stdout=StringIO())
+
+    assert Transaction.objects.count() == executed
+    assert ScheduledTransferRun.objects.filter(scheduled_transfer_id=scheduled.pk, status="success").count() == executed
+    scheduled.refresh_from_db()
+    assert scheduled.next_occurrence_date == today + timedelta(days=1)
+
+
+def test_runs_are_logged_and_listed_for_the_sender(accounts):
+    sender, receiver = accounts
+    ok = create_scheduled(sender, receiver, "once")
+    too_big = create_scheduled(sender, receiver, "once")
+    ScheduledTransfers.objects.filter(pk=too_big.pk).update(amount=Decimal("1000000.00"))
+
+    out = StringIO()
+    call_command("process_scheduled_transfers", stdout=out)
+    assert "1 succeeded, 1 failed" in out.getvalue()
+
+    success = ScheduledTransferRun.objects.get(scheduled_transfer_id=ok.pk)
+    assert success.status == "success"
+    assert success.transaction == Transaction.objects.get()
+
+    failure = ScheduledTransferRun.objects.get(scheduled_transfer_id=too_big.pk)
+    assert failure.status == "failed"
+    assert failure.transaction is None
+    assert failure.error
+
+    client = APIClient()
+    client.force_authenticate(sender.owner)
+    response = client.get(reverse("scheduled-transfer-runs"), {"status": "failed"})
+    assert response.status_code == 200
+    assert [run["scheduled_transfer_id"] for run in response.data] == [too_big.pk]
+
+    client.force_authenticate(receiver.owner)
+    assert client.get(reverse("scheduled-transfer-runs")).data == []
+
+
+def test_run_stats_percentiles():
+    stats = RunStats(durations=list(range(1, 101)))
+
+    assert stats.percentile(0.5) == 50
+    assert stats.percentile(0.95) == 95
+    assert RunStats().percentile(0.95) == 0
+
+
+def test_transfers_are_netted_per_sender(accounts, django_assert_max_num_queries):
+    sender, receiver = accounts
+    BankAccount.objects.filter(pk=sender.pk).update(balance=Decimal("250.00"))
+    other_receiver = create_account(create_user("other@example.com", "+70000000003"))
+    schedules = [create_scheduled(sender, r, "once") for r in (receiver, other_receiver, receiver)]
+    today = timezone.localdate()
+
+    with TestCase.captureOnCommitCallbacks(execute=True):
+        with django_assert_max_num_queries(19):
+            runs = []
+            assert ScheduledTransfers.execute_due(schedules, today, "all", runs) is False
+
+    assert [run.status for run in runs] == ["success", "success", "failed"]
+    assert "Insufficient funds" in runs[2].error
+
+    sender.refresh_from_db()
+    receiver.refresh_from_db()
+    other_receiver.refresh_from_db()
+    assert sender.balance == Decimal("50.00")
+    assert receiver.balance == Decimal("10100.00")
+    assert other_receiver.balance == Decimal("10100.00")
+
+    assert Transaction.objects.count() == 2
+    created = {run.transaction.pk for run in runs[:2]}
+    assert set(AchievementEvent.objects.values_list("object_id", flat=True)) == created
+
+
+def test_balance_forecast_expands_schedules_and_interest(accounts):
+    sender, receiver = accounts
+    today = timezone.localdate()
+    create_scheduled(sender, receiver, "weekly", start_date=today + timedelta(days=1))
+    savings = SavingsAccount.create(
+        bank_account=receiver,
+        goal_name="Goal",
+        goal_amount=Decimal("50000"),
+        interest_period="monthly",
+    )
+    SavingsAccount.objects.filter(pk=savings.pk).update(is_first_deposit=False, min_balance=Decimal("1000"))
+    accrual = (savings.next_interest_date - today).days
+
+    client = APIClient()
+    client.force_authenticate(sender.owner)
+    response = client.get(reverse("scheduled-transfer-forecast"), {"days": 14})
+    assert response.status_code == 200
+    [forecast] = response.data
+    balances = [Decimal(day["balance"]) for day in forecast["days"]]
+    assert len(balances) == 15
+    assert balances[0] == Decimal("10000.00")
+    assert balances[1] == balances[7] == Decimal("9900.00")
+    assert balances[8] == balances[14] == Decimal("9800.00")
+
+    client.force_authenticate(receiver.owner)
+    response = client.get(reverse("scheduled-transfer-forecast"), {"days": accrual})
+    balances = [Decimal(day["balance"]) for day in response.data[0]["days"]]
+    weeks_before_accrual = len(range(1, accrual, 7))
+    assert balances[accrual - 1] == Decimal("10000.00") + 100 * weeks_before_accrual
+    assert balances[accrual] - balances[accrual - 1] == Decimal("10.00") + (100 if accrual % 7 == 1 else 0)
+
+    assert client.get(reverse("scheduled-transfer-forecast"), {"days": 0}).status_code == 400
+
+
+def test_forecast_pays_nothing_for_a_period_opened_empty(accounts):
+    _, receiver = accounts
+    today = timezone.localdate()
+    savings = SavingsAccount.create(
+        bank_account=receiver,
+        goal_name="Goal",
+        goal_amount=Decimal("50000"),
+        interest_period="monthly",
+    )
+    first = (savings.next_interest_date - today).days
+    second = (savings.calculate_next_interest_date(from_date=savings.next_interest_date) - today).days
+    curve = [Decimal("10000.00")] * (second + 1)
+
+    _apply_interest(curve, savings, today, second)
+
+    assert curve[first] == Decimal("10000.00")
+    assert curve[second] == Decimal("10100.00")
+
+
+def test_failed_occurrence_is_retried_with_backoff(accounts):
+    sender, receiver = accounts
+    scheduled = create_scheduled(sender, receiver, "once")
+    ScheduledTransfers.objects.filter(pk=scheduled.pk).update(amount=Decimal("20000.00"))
+
+    call_command("process_scheduled_transfers", stdout=StringIO())
+
+    retry = ScheduledTransferRetry.objects.get()
+    # The series has no occurrence left but waits for its retry
+    assert ScheduledTransfers.objects.values_list("status", "next_occurrence_date").get() == ("active", None)
+    assert (retry.status, retry.attempts) == ("pending", 1)
+    assert retry.next_attempt_at > timezone.now()
+
+    ScheduledTransferRetry.objects.update(next_attempt_at=timezone.now())
+    call_command("process_scheduled_transfers", stdout=StringIO())
+    retry.refresh_from_db()
+    assert (retry.status, retry.attempts) == ("pending", 2)
+    assert retry.next_attempt_at - timezone.now() > ScheduledTransferRetry.backoff(1)
+
+    BankAccount.objects.filter(pk=sender.pk).update(balance=Decimal("30000.00"))
+    ScheduledTransferRetry.objects.update(next_attempt_at=timezone.now())
+    call_command("process_scheduled_transfers", stdout=StringIO())
+    retry.refresh_from_db()
+    assert retry.status == "succeeded"
+    assert ScheduledTransfers.objects.get().status == "finished"
+    assert Transaction.objects.get().amount == Decimal("20000.00")
+    assert ScheduledTransferRun.objects.filter(scheduled_transfer_id=scheduled.pk, attempt=3, status="success").exists()
+
+
+def test_retries_stop_after_max_attempts(accounts, monkeypatch):
+    monkeypatch.setattr("core.config.AppConfig.SCHEDULED_TRANSFERS_RETRY_MAX_ATTEMPTS", 2)
+    sender, receiver = accounts
+    scheduled = create_scheduled(sender, receiver, "once")
+    ScheduledTransfers.objects.filter(pk=scheduled.pk).update(amount=Decimal("20000.00"))
+
+    call_command("process_scheduled_transfers", stdout=StringIO())
+    ScheduledTransferRetry.objects.update(next_attempt_at=timezone.now())
+    call_command("process_scheduled_transfers", stdout=StringIO())
+
+    retry = ScheduledTransferRetry.objects.get()
+    assert (retry.status, retry.attempts) == ("exhausted", 2)
+    assert ScheduledTransfers.objects.get().status == "finished"
+
+
+def test_retries_of_deleted_or_paused_schedules_are_cancelled(accounts):
+    sender, receiver = accounts
+    user = sender.owner
+    kept, paused, deleted = (create_scheduled(sender, receiver, "once") for _ in range(3))
+    ScheduledTransfers.objects.update(amount=Decimal("20000.00"))
+    call_command("process_scheduled_transfers", stdout=StringIO())
+    assert ScheduledTransferRetry.objects.filter(status="pending").count() == 3
+
+    client = APIClient()
+    client.force_authenticate(user=user)
+    assert client.delete(reverse("scheduled-transfer-detail-or-destroy", args=[deleted.pk])).status_code == 200
+    assert not ScheduledTransferRetry.objects.filter(scheduled_transfer_id=deleted.pk).exists()
+
+    paused.refresh_from_db()
+    paused.status = "paused"
+    paused.save()
+    assert ScheduledTransferRetry.objects.get(scheduled_transfer=paused).status == "cancelled"
+    assert ScheduledTransfers.objects.get(pk=paused.pk).status == "finished"
+
+    # Paused between the claim and the attempt
+    BankAccount.objects.filter(pk=sender.pk).update(balance=Decimal("30000.00"))
+    retry = ScheduledTransferRetry.objects.get(scheduled_transfer=kept)
+    ScheduledTransfers.objects.filter(pk=kept.pk).update(status="paused")
+    assert ScheduledTransferRetry.execute([retry]) == []
+    retry.refresh_from_db()
+    assert retry.status == "cancelled"
+    assert not Transaction.objects.exists()
+
+
+def test_upcoming_occurrences_follow_the_schedule(accounts, django_assert_num_queries):
+    sender, receiver = accounts
+    today = timezone.localdate()
+    scheduled = create_scheduled(sender, receiver, "weekly")
+
+    dates = list(UpcomingOccurrence.objects.values_list("date", flat=True))
+    assert dates == [today + timedelta(weeks=i) for i in range(13)]
+
+    call_command("process_scheduled_transfers", stdout=StringIO())
+    dates = list(UpcomingOccurrence.objects.values_list("date", flat=True))
+    assert dates == [today + timedelta(weeks=i) for i in range(1, 13)]
+
+    client = APIClient()
+    client.force_authenticate(receiver.owner)
+    url = reverse("account-payments-calendar", args=[receiver.account_number])
+    params = {"date_from": today.isoformat(), "date_to": (today + timedelta(days=14)).isoformat()}
+    with django_assert_num_queries(2):
+        response = client.get(url, params)
+    assert response.status_code == 200
+    assert [(o["date"], o["direction"], o["counterparty_account"]) for o in response.data] == [
+        ((today + timedelta(weeks=1)).isoformat(), "incoming", sender.account_number),
+        ((today + timedelta(weeks=2)).isoformat(), "incoming", sender.account_number),
+    ]
+
+    client.force_authenticate(sender.owner)
+    response = client.get(reverse("account-payments-calendar", args=[sender.account_number]), params)
+    assert {o["direction"] for o in response.data} == {"outgoing"}
+
+    params["date_to"] = (today + timedelta(days=AppConfig.UPCOMING_OCCURRENCES_DAYS + 1)).isoformat()
+    assert client.get(reverse("account-payments-calendar", args=[sender.account_number]), params).status_code == 400
+
+    scheduled.delete()
+    assert not UpcomingOccurrence.objects.exists()
+
+
+def test_calendar_window_moves_forward_incrementally(accounts):
+    today = timezone.localdate()
+    weekly = create_scheduled(*accounts, "weekly")
+    paused = create_scheduled(*accounts, "weekly")
+    call_command("process_scheduled_transfers", stdout=StringIO())
+    ScheduledTransfers.objects.filter(pk=paused.pk).update(status="paused")
+    UpcomingOccurrence.objects.filter(scheduled_transfer=paused).delete()
+    kept = set(UpcomingOccurrence.objects.values_list("pk", flat=True))
+
+    next_week = today + timedelta(weeks=1)
+    assert UpcomingOccurrence.refresh_all(next_week) == 1
+    assert UpcomingOccurrence.refresh_all(next_week) == 1
+
+    rows = UpcomingOccurrence.objects.filter(scheduled_transfer=weekly)
+    assert list(rows.values_list("date", flat=True)) == [today + timedelta(weeks=i) for i in range(1, 14)]
+    assert kept < set(rows.values_list("pk", flat=True))
+    assert not UpcomingOccurrence.objects.filter(scheduled_transfer=paused).exists()
+
+
+def test_paused_and_finished_series_are_not_due(accounts):
+    today = timezone.localdate()
+    paused = create_scheduled(*accounts)
+    finished = create_scheduled(*accounts)
+    ScheduledTransfers.objects.filter(pk=paused.pk).update(status="paused")
+    ScheduledTransfers.objects.filter(pk=finished.pk).update(status="finished")
+
+    assert claim_batch(today, "worker-a", 10, 300) == []
 
-# Create your tests here.
+    client = APIClient()
+    client.force_authenticate(accounts[0].owner)
+    response = client.get(reverse("scheduled-transfer-list"))
+    assert [s["id"] for s in response.data] == [paused.pk]
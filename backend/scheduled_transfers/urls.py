@@ -4,14 +4,22 @@ from .views import (
     ScheduledTransferCreateView,
     ScheduledTransferListView,
     ScheduledTransferDetailView,
-    AccountNumberScheduledTransfersView
+    AccountNumberScheduledTransfersView,
+    ScheduledTransferRunListView,
+    BalanceForecastView,
+    AccountPaymentsCalendarView
 )
 
 urlpatterns = [
     path('scheduled-transfers/create/', ScheduledTransferCreateView.as_view(), name='scheduled-transfer-create'),
     path('scheduled-transfers/', ScheduledTransferListView.as_view(), name='scheduled-transfer-list'),
+    path('scheduled-transfers/runs/', ScheduledTransferRunListView.as_view(), name='scheduled-transfer-runs'),
+    path('scheduled-transfers/forecast/', BalanceForecastView.as_view(), name='scheduled-transfer-forecast'),
     path('scheduled-transfers/<int:pk>/', ScheduledTransferDetailView.as_view(), name='scheduled-transfer-detail-or-destroy'), # noqa
-    path('scheduled-transfers/account/<str:account_number>/',
+    path('scheduled-transfers/account/<account_number:account_number>/',
          AccountNumberScheduledTransfersView.as_view(),
          name='account-number-scheduled-transfers'),
+    path('scheduled-transfers/account/<account_number:account_number>/calendar/',
+         AccountPaymentsCalendarView.as_view(),
+         name='account-payments-calendar'),
 ]
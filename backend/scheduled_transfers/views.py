@@ -2,10 +2,22 @@ from django.db.models import Q
 from rest_framework import generics, status
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-from rest_framework.exceptions import NotFound
-
-from .models import ScheduledTransfers
-from .serializers import ScheduledTransferSerializer, ScheduledTransferListSerializer
+from rest_framework.views import APIView
+from django.utils import timezone
+from rest_framework.exceptions import NotFound, ValidationError
+
+from .forecast import forecast_balances
+from .models import ScheduledTransfers, ScheduledTransferRun, UpcomingOccurrence
+from .serializers import (
+    ScheduledTransferSerializer,
+    ScheduledTransferListSerializer,
+    ScheduledTransferRunSerializer,
+    ForecastQuerySerializer,
+    AccountForecastSerializer,
+    CalendarQuerySerializer,
+    UpcomingOccurrenceSerializer
+)
+from bank_accounts.membership import get_membership
 from bank_accounts.models import BankAccount
 
 
@@ -39,7 +51,7 @@ class ScheduledTransferListView(generics.ListAPIView):
     def get_queryset(self):
         return ScheduledTransfers.objects.filter(
             sender_account__users__user=self.request.user
-        )
+        ).exclude(status='finished')
 
 
 class ScheduledTransferDetailView(generics.RetrieveDestroyAPIView):
@@ -48,14 +60,13 @@ class ScheduledTransferDetailView(generics.RetrieveDestroyAPIView):
     The user must be the sender of the transfer.
     """
     permission_classes = [IsAuthenticated]
-    queryset = ScheduledTransfers.objects.all()
     serializer_class = ScheduledTransferListSerializer
     lookup_field = 'pk'
 
     def get_queryset(self):
         return ScheduledTransfers.objects.filter(
             sender_account__users__user=self.request.user
-        )
+        ).exclude(status='finished')
 
     def destroy(self, request, *args, **kwargs):
         instance = self.get_object()
@@ -77,17 +88,83 @@ class AccountNumberScheduledTransfersView(generics.GenericAPIView):
     serializer_class = ScheduledTransferListSerializer
 
     def get(self, request, account_number):
+        membership = get_membership(request.user).get(account_number)
+        if membership is None:
+            raise NotFound({"detail": "Bank account not found."})
+
+        scheduled_transfers = ScheduledTransfers.objects.filter(
+            Q(sender_account_id=membership.account_id)
+        ).exclude(status='finished')
+
+        serializer = self.get_serializer(scheduled_transfers, many=True)
+        return Response(serializer.data)
+
+
+class ScheduledTransferRunListView(generics.ListAPIView):
+    """
+    API view to view the execution history of scheduled transfers sent from the user's accounts.
+    Can be narrowed with ?scheduled_transfer=<id> and ?status=<success|failed>.
+    """
+    permission_classes = [IsAuthenticated]
+    serializer_class = ScheduledTransferRunSerializer
+
+    def get_queryset(self):
+        runs = ScheduledTransferRun.objects.filter(
+            sender_account__users__user=self.request.user
+        )
+
+        scheduled_transfer = self.request.query_params.get('scheduled_transfer')
+        if scheduled_transfer:
+            if not scheduled_transfer.isdigit():
+                raise ValidationError({"scheduled_transfer": "Must be an integer."})
+            runs = runs.filter(scheduled_transfer_id=scheduled_transfer)
+
+        status_filter = self.request.query_params.get('status')
+        if status_filter:
+            runs = runs.filter(status=status_filter)
+
+        return runs
+
+
+class BalanceForecastView(APIView):
+    """
+    API view projecting the daily balance of the user's accounts over the next ?days=N days
+    from their scheduled transfers and savings interest. `complete` is false for an account
+    whose incoming transfers could not be converted from another currency.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        query = ForecastQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+
+        forecast = forecast_balances(request.user, timezone.localdate(), query.validated_data['days'])
+        return Response(AccountForecastSerializer(forecast, many=True).data)
+
+
+class AccountPaymentsCalendarView(APIView):
+    """
+    API view returning the incoming and outgoing scheduled payments of an account
+    between ?date_from and ?date_to, read from the materialized upcoming occurrences.
+    Authenticated user must be a member of the account.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, account_number):
+        query = CalendarQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+
         try:
-            requested_account = BankAccount.objects.get(
-                users__user=request.user,
-                account_number=account_number
-            )
+            account = BankAccount.objects.get(users__user=request.user, account_number=account_number)
         except BankAccount.DoesNotExist:
             raise NotFound({"detail": "Bank account not found."})
 
-        scheduled_transfers = ScheduledTransfers.objects.filter(
-            Q(sender_account=requested_account)
+        occurrences = (
+            UpcomingOccurrence.objects
+            .filter(Q(sender_account=account) | Q(receiver_account=account))
+            .filter(date__range=(query.validated_data['date_from'], query.validated_data['date_to']))
+            .select_related('sender_account', 'receiver_account', 'scheduled_transfer')
         )
 
-        serializer = self.get_serializer(scheduled_transfers, many=True)
+        serializer = UpcomingOccurrenceSerializer(occurrences, many=True, context={'account': account})
         return Response(serializer.data)
@@ -1,5 +1,6 @@
 import requests
 
+from collections import defaultdict
 from rest_framework.serializers import ValidationError
 from decimal import Decimal
 from django.db import models
@@ -7,6 +8,7 @@ from django.db import transaction as db_transaction
 
 from bank_accounts.models import BankAccount
 from core.config import AppConfig
+from .signals import transactions_bulk_created, balances_changed
 
 
 class TransactionType(models.Model):
@@ -91,27 +93,15 @@ class Transaction(models.Model):
             raise ValueError(f"Currency conversion between different currencies is currently unavailable: {e}")
 
     @classmethod
-    def _update_savings_account_min_balance(cls, bank_account):
-        """Updates the min_balance for a savings account based on the current balance"""
-        if not hasattr(bank_account, 'saving_account'):
-            return
-
-        saving_account = bank_account.saving_account
-        current_balance = bank_account.balance
-
-        if saving_account.is_first_deposit:
-            saving_account.min_balance = min(
-                current_balance,
-                AppConfig.MAXIMUM_ACCRUAL_BALANCE
-            )
-            saving_account.is_first_deposit = False
-        else:
-            saving_account.min_balance = min(
-                saving_account.min_balance,
-                current_balance
-            )
-
-        saving_account.save()
+    def notify_balances_changed(cls, account_ids):
+        """Sends balances_changed for the savings accounts among `account_ids`, if there are any."""
+        savings_ids = list(
+            BankAccount.objects
+            .filter(pk__in=account_ids, saving_account__isnull=False)
+            .values_list('pk', flat=True)
+        )
+        if savings_ids:
+            balances_changed.send(sender=cls, account_ids=savings_ids)
 
     @classmethod
     def create_transaction(cls, sender_account, receiver_account, amount, description=""):
@@ -151,12 +141,84 @@ class Transaction(models.Model):
 
             sender_account.refresh_from_db()
             receiver_account.refresh_from_db()
-
-            cls._update_savings_account_min_balance(sender_account)
-            cls._update_savings_account_min_balance(receiver_account)
+            cls.notify_balances_changed([sender_account.pk, receiver_account.pk])
 
         return transaction
 
+    @classmethod
+    def create_transactions(cls, sender_account, transfers):
+        """
+        Executes several transfers from one sender account at once.
+
+        Transfers are checked in the given order against the sender's running balance,
+        so a transfer that doesn't fit fails without affecting the others. Balances of
+        all touched accounts change with a single UPDATE, the transactions are inserted
+        with one bulk_create and each currency pair is converted once.
+
+        Args:
+            transfers: list of (receiver_account, amount, description)
+
+        Returns:
+            list: Per transfer, the created Transaction or the exception explaining the failure
+        """
+        results = []
+        created = []
+
+        with db_transaction.atomic():
+            sender_account = BankAccount.objects.select_for_update().get(pk=sender_account.pk)
+            transaction_type, _ = TransactionType.objects.get_or_create(
+                name="Transfer",
+                defaults={'name': 'Transfer'}
+            )
+
+            rates = {}
+            deltas = defaultdict(Decimal)
+
+            for receiver_account, amount, description in transfers:
+                try:
+                    cls.validate_accounts(sender_account, receiver_account, amount)
+
+                    if sender_account.currency != receiver_account.currency:
+                        pair = (sender_account.currency, receiver_account.currency)
+                        if pair not in rates:
+                            rates[pair] = cls.convert_to(*pair, Decimal('1'))
+                        converted_amount = amount * rates[pair]
+                    else:
+                        converted_amount = amount
+                except (ValidationError, ValueError) as e:
+                    results.append(e)
+                    continue
+
+                sender_account.balance -= amount
+                deltas[sender_account.pk] -= amount
+                deltas[receiver_account.pk] += converted_amount
+
+                transaction = cls(
+                    type_id=transaction_type,
+                    status='completed',
+                    description=description,
+                    amount=amount,
+                    converted_amount=converted_amount,
+                    sender_account=sender_account,
+                    receiver_account=receiver_account
+                )
+                results.append(transaction)
+                created.append(transaction)
+
+            if not created:
+                return results
+
+            cls.objects.bulk_create(created)
+            BankAccount.objects.filter(pk__in=deltas).update(balance=models.Case(
+                *[models.When(pk=pk, then=models.F('balance') + delta) for pk, delta in deltas.items()],
+                output_field=models.DecimalField()
+            ))
+
+            cls.notify_balances_changed(list(deltas))
+            transactions_bulk_created.send(sender=cls, transactions=created)
+
+        return results
+
     def __str__(self):
         return (f"Transaction {self.transaction_id} - {self.amount} ({self.sender_account.currency}) → "
                 f"{self.converted_amount or self.amount} ({self.receiver_account.currency})")
@@ -1,12 +1,14 @@
 from rest_framework import serializers
 
+from bank_accounts.membership import get_membership
+from bank_accounts.validators import validate_account_number
 from .models import BankAccount, Transaction
 from decimal import Decimal
 
 
 class TransactionSerializer(serializers.Serializer):
-    sender_account = serializers.CharField(max_length=20)
-    receiver_account = serializers.CharField(max_length=20)
+    sender_account = serializers.CharField(max_length=20, validators=[validate_account_number])
+    receiver_account = serializers.CharField(max_length=20, validators=[validate_account_number])
     amount = serializers.DecimalField(
         max_digits=15,
         decimal_places=2,
@@ -19,20 +21,18 @@ class TransactionSerializer(serializers.Serializer):
     )
 
     def validate_sender_account(self, value):
-        try:
-            account = BankAccount.objects.get(account_number=value)
-            request = self.context.get('request')
+        request = self.context.get('request')
+        if not request:
+            raise serializers.ValidationError("Request context is missing")
 
-            if not request:
-                raise serializers.ValidationError("Request context is missing")
-
-            if not account.users.filter(user=request.user).exists() and account.owner != request.user:
+        membership = get_membership(request.user).get(value)
+        if membership is None:
+            if BankAccount.objects.filter(account_number=value).exists():
                 raise serializers.ValidationError("You are not a member of the bank account")
-
-            return account
-        except BankAccount.DoesNotExist:
             raise serializers.ValidationError("Sender account does not exist")
 
+        return BankAccount.objects.get(pk=membership.account_id)
+
     def validate_receiver_account(self, value):
         try:
             account = BankAccount.objects.get(account_number=value)
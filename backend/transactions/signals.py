@@ -0,0 +1,10 @@
+from django.dispatch import Signal
+
+# Sent after Transaction.create_transactions inserted transactions with bulk_create,
+# which doesn't send post_save. Receives `transactions`: the created Transaction list.
+transactions_bulk_created = Signal()
+
+# Sent inside the transaction that moved money, once the balances are updated, if it
+# moved money in or out of savings accounts (nothing listens for regular accounts).
+# Receives `account_ids`: primary keys of the savings accounts whose balance changed.
+balances_changed = Signal()
@@ -10,7 +10,8 @@ from django.utils import timezone
 
 from .models import Transaction
 from .serializers import TransactionSerializer
-from bank_accounts.models import BankAccount
+from bank_accounts.membership import get_membership
+from bank_accounts.validators import is_valid_account_number
 from users.serializers import UserSerializer
 
 
@@ -126,15 +127,17 @@ class UserTransactionsView(APIView):
         period = data.get('period', 'all')  # all, year, month, week, today, yesterday, YYYY-MM-DD
         account_number = data.get('account', 'all')
 
+        if account_number != 'all' and not is_valid_account_number(account_number):
+            return Response(
+                {"account": "Invalid account number."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        membership = get_membership(user)
         if account_number == 'all':
-            user_accounts = BankAccount.objects.filter(
-                users__user=user
-            ).values_list('bank_account_id', flat=True)
+            user_accounts = list(membership.account_ids)
         else:
-            user_accounts = BankAccount.objects.filter(
-                users__user=user,
-                account_number=account_number
-            ).values_list('bank_account_id', flat=True)
+            user_accounts = [m.account_id for m in [membership.get(account_number)] if m is not None]
 
         if not user_accounts:
             return Response(